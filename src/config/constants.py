@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).parent.parent.parent
@@ -19,12 +20,145 @@ AVAILABLE_LANGUAGES = {
 
 TESSERACT_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 OCR_CONFIG = r'--psm 6 --oem 1'
+OCR_LANG = 'por'
+# 'auto' keeps a persistent tesserocr engine when installed, else pytesseract
+OCR_BACKEND = 'auto'
+# OCR preprocessing stages in order, see src/utils/preprocessing.py
+# ('mask' is available but leaves Otsu output unchanged, 'resize' is the
+# old fixed 2x scaling, 'regions' crops to text and skips OCR without any)
+PREPROCESS_STAGES = ['grayscale', 'threshold', 'regions', 'invert', 'border', 'scale']
+# Pixels kept around the detected text blocks
+OCR_REGION_MARGIN = 4
+# Captures up to this many pixels tall are OCRed whole when no text block
+# is found in them, instead of being skipped
+OCR_REGION_FALLBACK_HEIGHT = 64
+# Connected components taller than this are never taken for glyphs
+OCR_MAX_GLYPH_HEIGHT = 120
+# Adaptive scaling: median glyph height in pixels to scale text to, and
+# the scale factor limits
+OCR_TARGET_GLYPH_HEIGHT = 24
+OCR_MIN_SCALE = 0.5
+OCR_MAX_SCALE = 4.0
+# Largest image handed to the OCR engine after scaling, in pixels
+OCR_MAX_OUTPUT_PIXELS = 4_000_000
+
+# Cached OCR results for text line strips (0 disables the cache)
+OCR_LINE_CACHE_SIZE = 512
+# Worker processes used to OCR line strips in parallel (0 disables). One
+# core is left for capture, the event loop and Tk, and more than four
+# workers rarely pays off for the few lines of a chat box
+OCR_WORKERS = min(4, max(0, (os.cpu_count() or 1) - 1))
+
+TRANSLATION_CACHE_PATH = ROOT_DIR / 'translation_cache.sqlite3'
+TRANSLATION_CACHE_MEMORY_SIZE = 2048
+TRANSLATION_CACHE_MAX_ROWS = 100000
+TRANSLATION_CACHE_TTL = 30 * 24 * 3600
+
+# Google rejects requests over 5000 characters
+TRANSLATION_BATCH_MAX_CHARS = 4500
+TRANSLATION_BATCH_CONCURRENCY = 4
+
+# Translation backends tried by the router, see src/core/backends.py
+TRANSLATION_BACKENDS = ['google']
+# Requests kept per backend for rolling latency/error statistics
+BACKEND_STATS_WINDOW = 100
+# Seconds a failing backend is kept out of rotation
+BACKEND_COOLDOWN = 30.0
+# Seconds to wait before hedging: the backend's p95, but at least the
+# minimum, and the default until the backend has latency samples
+HEDGE_MIN_DELAY = 0.05
+HEDGE_DEFAULT_DELAY = 1.5
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Shared HTTP connections: pool limits, seconds an idle connection is kept,
+# timeouts, and seconds between keep-alive pings while the overlay is shown
+# (below the usual 60 s server idle timeout)
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE = 10
+HTTP_KEEPALIVE_EXPIRY = 120.0
+HTTP_CONNECT_TIMEOUT = 5.0
+HTTP_TIMEOUT = 30.0
+HTTP_KEEPALIVE_INTERVAL = 25.0
+# Hosts kept warm for each translation backend
+BACKEND_WARM_URLS = {
+    'google': 'https://translate.google.com',
+    'mymemory': 'https://api.mymemory.translated.net'
+}
+
+# LLM output budgets: max_tokens is estimated from the input at about
+# four characters per token, times a ratio covering the translation being
+# longer, plus per-line overhead, within [LLM_MIN_TOKENS, LLM_MAX_TOKENS].
+# Image requests budget LLM_TOKENS_PER_IMAGE_LINE per detected text line.
+LLM_DEFAULT_MAX_TOKENS = 300
+LLM_CHARS_PER_TOKEN = 4
+LLM_OUTPUT_RATIO = 1.3
+LLM_TOKENS_PER_LINE = 4
+LLM_MIN_TOKENS = 32
+LLM_MAX_TOKENS = 2048
+LLM_TOKENS_PER_IMAGE_LINE = 32
+# Text with more lines than this is split into message-aligned chunks
+# streamed concurrently, at most LLM_CHUNK_CONCURRENCY at a time
+LLM_CHUNK_LINES = 15
+LLM_CHUNK_CONCURRENCY = 4
+
+# Provider rate limits enforced by RequestScheduler: requests and tokens
+# per minute (None is unlimited), keyed by analyzer provider or backend name.
+# Buckets hold RATE_LIMIT_BURST_SECONDS worth of rate.
+RATE_LIMITS = {
+    'openrouter': {'rpm': 60, 'tpm': 100000},
+    'google': {'rpm': 120, 'tpm': None},
+    'mymemory': {'rpm': 30, 'tpm': None}
+}
+RATE_LIMIT_BURST_SECONDS = 10.0
+
+# Earlier chat messages sent with new ones to the LLM for context
+CONVERSATION_CONTEXT_LINES = 3
+
+# Model used for chat translation and vision requests
+LLM_MODEL = 'openai/gpt-4o-mini-2024-07-18'
+# Headers of a text request carrying earlier messages as context, the
+# offline stub model strips everything up to LLM_TRANSLATE_HEADER
+LLM_CONTEXT_HEADER = "Earlier messages, for context only, do not translate:\n"
+LLM_TRANSLATE_HEADER = "Translate each of these messages, one per line:\n"
+
+# Vision uploads: glyph height in pixels kept when downscaling a capture
+# and JPEG quality tried against PNG
+VISION_MIN_GLYPH_HEIGHT = 14
+VISION_JPEG_QUALITY = 80
+# Otsu separation (between-class over total variance, 0 to 1) a capture
+# needs before its 1-bit version is offered for upload. Text on a flat chat
+# box scores about 0.9, text over game scenery well under 0.8 and loses
+# strokes when binarized
+VISION_BINARIZE_MIN_SEPARATION = 0.85
+# Image input tokens per model as (base, per 512px tile) at high detail,
+# matched by model name prefix. gpt-4o-mini counts about 33x the tokens of
+# gpt-4o for the same image
+VISION_TOKEN_COSTS = {
+    'gpt-4o-mini': (2833, 5667),
+    'gpt-4o': (85, 170)
+}
+
+# Milliseconds of typing inactivity before translate-as-you-type fires
+TRANSLATE_AS_YOU_TYPE_DELAY = 400
 
 HOTKEYS = {
     'select_area': 'ctrl+alt+x',
     'toggle_overlay': 'ctrl+alt+c',
     'clear_fields': 'ctrl+alt+d',
-    'copy_translation': 'ctrl+shift+c'
+    'copy_translation': 'ctrl+shift+c',
+    'toggle_watch': 'ctrl+alt+w'
 }
+# Seconds a combo must stay quiet before it triggers again, so key
+# auto-repeat while held fires the command once
+HOTKEY_DEBOUNCE = 0.3
+
+# Watch mode: seconds between re-captures of the last selected area
+WATCH_INTERVAL = 1.0
+# Frame change detection: thumbnail width, per-pixel delta and fraction of
+# changed pixels needed before a frame is considered new
+WATCH_THUMBNAIL_WIDTH = 256
+WATCH_PIXEL_THRESHOLD = 24
+WATCH_CHANGE_RATIO = 0.002
 
 SAVE_DEBUG_IMAGES = False
\ No newline at end of file
@@ -1,6 +1,13 @@
 import json
-from typing import Dict, Any
-from src.config.constants import ROOT_DIR
+from typing import Dict, Any, List
+from src.config.constants import (
+    ROOT_DIR,
+    WATCH_INTERVAL,
+    OCR_BACKEND,
+    OCR_WORKERS,
+    PREPROCESS_STAGES,
+    TRANSLATION_BACKENDS
+)
 
 class Settings:
     def __init__(self):
@@ -21,6 +28,14 @@ class Settings:
             'save_debug_images': False,
             'overlay_opacity': 0.8,
             'overlay_position': {'x': 100, 'y': 100},
+            'watch_interval': WATCH_INTERVAL,
+            'ocr_backend': OCR_BACKEND,
+            'ocr_workers': OCR_WORKERS,
+            'translate_as_you_type': False,
+            'translation_backends': TRANSLATION_BACKENDS,
+            'backend_options': {},
+            'draft_translation': True,
+            'preprocess_stages': PREPROCESS_STAGES,
             'version': '1.0.2'
         }
 
@@ -54,4 +69,48 @@ class Settings:
     
     @property
     def overlay_position(self) -> Dict[str, int]:
-        return self._settings['overlay_position']
\ No newline at end of file
+        return self._settings['overlay_position']
+    
+    @property
+    def watch_interval(self) -> float:
+        return self._settings.get('watch_interval', WATCH_INTERVAL)
+    
+    @property
+    def ocr_backend(self) -> str:
+        return self._settings.get('ocr_backend', OCR_BACKEND)
+    
+    @property
+    def ocr_workers(self) -> int:
+        return self._settings.get('ocr_workers', OCR_WORKERS)
+    
+    @property
+    def hotkeys(self) -> Dict[str, str]:
+        """Per-command hotkey overrides for HOTKEYS"""
+        return self._settings.get('hotkeys', {})
+    
+    @property
+    def translate_as_you_type(self) -> bool:
+        return self._settings.get('translate_as_you_type', False)
+    
+    @property
+    def translation_backends(self) -> List[str]:
+        """Names of the translation backends the router may use"""
+        return self._settings.get('translation_backends', TRANSLATION_BACKENDS)
+    
+    @property
+    def backend_options(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Constructor options per translation backend, e.g.
+        {'libre': {'api_key': '...', 'base_url': 'https://...'}}
+        """
+        return self._settings.get('backend_options', {})
+    
+    @property
+    def draft_translation(self) -> bool:
+        """Show a machine translation of captures until the LLM's arrives"""
+        return self._settings.get('draft_translation', True)
+    
+    @property
+    def preprocess_stages(self) -> List[str]:
+        """OCR preprocessing stage names in order"""
+        return self._settings.get('preprocess_stages', PREPROCESS_STAGES)
\ No newline at end of file
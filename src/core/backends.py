@@ -0,0 +1,417 @@
+"""Translation backends and latency-aware routing between them"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+from deep_translator import GoogleTranslator, LibreTranslator, MyMemoryTranslator
+from src.config.constants import (
+    BACKEND_STATS_WINDOW,
+    BACKEND_COOLDOWN,
+    HEDGE_MIN_DELAY,
+    HEDGE_DEFAULT_DELAY
+)
+from src.core.scheduler import Priority, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+class LatencyStats:
+    """Rolling latency and error statistics for one backend"""
+
+    def __init__(self, window: int = BACKEND_STATS_WINDOW, cooldown: float = BACKEND_COOLDOWN):
+        self.cooldown = cooldown
+        self._latencies = deque(maxlen=window)
+        self._errors = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.unhealthy_until = 0.0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._errors.append(not ok)
+            if ok:
+                self._latencies.append(latency)
+            elif self._error_rate() > 0.5 and len(self._errors) >= 3:
+                # Take the backend out of rotation, it is probed again later
+                self.unhealthy_until = time.monotonic() + self.cooldown
+                self._errors.clear()
+
+    def _error_rate(self) -> float:
+        return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile in seconds, None without samples"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return ordered[index]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    def as_dict(self) -> Dict[str, Any]:
+        p50, p95 = self.p50, self.p95
+        return {
+            'samples': self.samples,
+            'p50_ms': p50 * 1000 if p50 is not None else None,
+            'p95_ms': p95 * 1000 if p95 is not None else None,
+            'error_rate': self.error_rate,
+            'healthy': self.healthy
+        }
+
+class TranslationBackend(ABC):
+    """Interface for a provider turning text into a translation"""
+    name = 'base'
+
+    def __init__(self):
+        self.stats = LatencyStats()
+
+    @abstractmethod
+    def translate(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> str:
+        """
+        Translate text, blocking until the provider answers
+
+        Args:
+            text: Text to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            priority: Scheduling class, for backends queueing their own requests
+
+        Returns:
+            Translated text
+        """
+
+class DeepTranslatorBackend(TranslationBackend):
+    """Any deep-translator provider taking source/target language codes"""
+
+    def __init__(self, name: str, translator_cls: type, **options):
+        """
+        Args:
+            name: Backend name used in settings and logs
+            translator_cls: deep-translator class, e.g. GoogleTranslator
+            **options: Extra constructor arguments such as api_key or base_url
+        """
+        super().__init__()
+        self.name = name
+        self.translator_cls = translator_cls
+        self.options = options
+        # deep-translator keeps request state on the instance, so each
+        # thread gets its own translators
+        self._local = threading.local()
+
+    def _get_translator(self, source_lang: str, target_lang: str):
+        """Get or create this thread's translator for a language pair"""
+        translators = getattr(self._local, 'translators', None)
+        if translators is None:
+            translators = self._local.translators = {}
+        key = f"{source_lang}-{target_lang}"
+        if key not in translators:
+            translators[key] = self.translator_cls(
+                source=source_lang,
+                target=target_lang,
+                **self.options
+            )
+        return translators[key]
+
+    def translate(self, text, source_lang, target_lang, priority=Priority.INTERACTIVE):
+        return self._get_translator(source_lang, target_lang).translate(text)
+
+class LLMBackend(TranslationBackend):
+    """Translates through OpenAIChatAnalyzer on the application's event loop"""
+    name = 'llm'
+
+    def __init__(
+        self,
+        analyzer,
+        get_loop: Callable[[], Optional[asyncio.AbstractEventLoop]],
+        timeout: float = 30.0
+    ):
+        """
+        Args:
+            analyzer: OpenAIChatAnalyzer instance
+            get_loop: Returns the running event loop owning the analyzer's
+                client, called per request since the loop may start after
+                the backend is created
+            timeout: Seconds to wait for a response
+        """
+        super().__init__()
+        self.analyzer = analyzer
+        self.get_loop = get_loop
+        self.timeout = timeout
+
+    def translate(self, text, source_lang, target_lang, priority=Priority.INTERACTIVE):
+        loop = self.get_loop()
+        if loop is None:
+            raise RuntimeError("LLM backend has no event loop")
+        future = asyncio.run_coroutine_threadsafe(
+            self.analyzer.translate_text(text, source_lang, target_lang, priority=priority),
+            loop
+        )
+        return future.result(self.timeout)
+
+class StubBackend(TranslationBackend):
+    """
+    Local backend with injected latency and failures, for offline use and
+    exercising the router
+    """
+
+    def __init__(
+        self,
+        name: str = 'stub',
+        delay: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rng: Optional[random.Random] = None
+    ):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = rng or random.Random()
+
+    def translate(self, text, source_lang, target_lang, priority=Priority.INTERACTIVE):
+        time.sleep(self.delay + self.rng.uniform(0, self.jitter))
+        if self.rng.random() < self.error_rate:
+            raise RuntimeError(f"{self.name} injected failure")
+        return f"[{target_lang}] {text}"
+
+def _libre_backend(api_key: Optional[str] = None, base_url: Optional[str] = None, **options):
+    """
+    LibreTranslate through deep-translator
+
+    Args:
+        api_key: LibreTranslate API key, required by deep-translator
+        base_url: Instance to use, libretranslate.com if omitted
+    """
+    if not api_key:
+        raise ValueError("The libre backend needs an api_key in backend_options")
+    if base_url:
+        options['custom_url'] = base_url
+    return DeepTranslatorBackend('libre', LibreTranslator, api_key=api_key, **options)
+
+BACKEND_REGISTRY: Dict[str, Callable[..., TranslationBackend]] = {
+    'google': lambda **options: DeepTranslatorBackend('google', GoogleTranslator, **options),
+    'mymemory': lambda **options: DeepTranslatorBackend('mymemory', MyMemoryTranslator, **options),
+    'libre': _libre_backend,
+    'llm': lambda **options: LLMBackend(**options),
+    'stub': lambda **options: StubBackend(**options)
+}
+
+def register_backend(name: str, factory: Callable[..., TranslationBackend]):
+    """Make a backend available to create_backend and settings"""
+    BACKEND_REGISTRY[name] = factory
+
+def create_backend(name: str, **options) -> TranslationBackend:
+    """Create a registered backend by name"""
+    if name not in BACKEND_REGISTRY:
+        raise ValueError(f"Unknown translation backend: {name}")
+    return BACKEND_REGISTRY[name](**options)
+
+class BackendRouter:
+    """
+    Sends each request to the fastest healthy backend and hedges slow ones.
+
+    Backends are ranked by their rolling median latency, backends without
+    samples first so they get measured. When the chosen backend has not
+    answered within its p95 latency, a second request goes to the next
+    backend (or the same one if it is the only healthy one) and the first
+    successful answer wins.
+
+    With a scheduler, a request waits for its rate limit slot before it is
+    sent and timed. A hedge is only sent when its backend has a slot free
+    right away, so it never queues behind other requests or spends a slot
+    after the primary already answered.
+    """
+
+    def __init__(
+        self,
+        backends: List[TranslationBackend],
+        hedge: bool = True,
+        min_hedge_delay: float = HEDGE_MIN_DELAY,
+        default_hedge_delay: float = HEDGE_DEFAULT_DELAY,
+        max_workers: int = 8,
+        scheduler: Optional[RequestScheduler] = None
+    ):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = backends
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.scheduler = scheduler
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backend')
+        # Counters are updated from the executor threads
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+    def ranked(self) -> List[TranslationBackend]:
+        """Healthy backends from fastest to slowest, all of them if none is healthy"""
+        healthy = [backend for backend in self.backends if backend.stats.healthy]
+        candidates = healthy or list(self.backends)
+        return sorted(
+            candidates,
+            key=lambda backend: backend.stats.p50 if backend.stats.samples else -1.0
+        )
+
+    def hedge_delay(self, backend: TranslationBackend) -> float:
+        """How long to wait on a backend before hedging"""
+        p95 = backend.stats.p95
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p95)
+
+    def _call(
+        self,
+        backend: TranslationBackend,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: Priority
+    ) -> str:
+        """Run one admitted backend request and record its latency"""
+        start = time.perf_counter()
+        try:
+            result = backend.translate(text, source_lang, target_lang, priority=priority)
+        except Exception:
+            backend.stats.record(time.perf_counter() - start, ok=False)
+            raise
+        backend.stats.record(time.perf_counter() - start, ok=True)
+        return result
+
+    def _acquire(self, backend: TranslationBackend, text: str, priority: Priority, block: bool = True) -> bool:
+        """
+        Take a rate limit slot for a request to backend
+
+        Blocks until the slot is granted unless block is False, then only a
+        slot free right away is taken.
+        """
+        if self.scheduler is None:
+            return True
+        tokens = len(text) / 4
+        if not block:
+            return self.scheduler.try_acquire(backend.name, priority, tokens)
+        self.scheduler.acquire_blocking(backend.name, priority, tokens)
+        return True
+
+    def _submit(
+        self,
+        backend: TranslationBackend,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: Priority,
+        hedge: bool = False
+    ) -> Future:
+        future = self._executor.submit(self._call, backend, text, source_lang, target_lang, priority)
+        future.backend = backend
+        future.hedge = hedge
+        return future
+
+    def translate(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> str:
+        """
+        Translate text on the best available backend
+
+        Raises:
+            Exception: The last backend error if every backend failed
+        """
+        with self._lock:
+            self.requests += 1
+        ranked = self.ranked()
+        primary = ranked[0]
+        # Waiting for the rate limit happens before the hedge timer starts
+        self._acquire(primary, text, priority)
+        in_flight = {self._submit(primary, text, source_lang, target_lang, priority)}
+        remaining = ranked[1:]
+        last_error: Optional[Exception] = None
+
+        done, _ = wait(in_flight, timeout=self.hedge_delay(primary))
+        if not done and self.hedge:
+            hedge_backend = remaining[0] if remaining else primary
+            if self._acquire(hedge_backend, text, priority, block=False):
+                if remaining:
+                    remaining.pop(0)
+                with self._lock:
+                    self.hedged += 1
+                logger.debug(f"Hedging {primary.name} with {hedge_backend.name}")
+                in_flight.add(self._submit(hedge_backend, text, source_lang, target_lang, priority, hedge=True))
+            else:
+                with self._lock:
+                    self.hedges_skipped += 1
+                logger.debug(f"Not hedging {primary.name}, {hedge_backend.name} is rate limited")
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Backend {future.backend.name} failed: {e}")
+                    continue
+                if future.hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return result
+
+            # Everything submitted so far failed, fall through the ranking
+            if not in_flight and remaining:
+                fallback = remaining.pop(0)
+                self._acquire(fallback, text, priority)
+                in_flight = {self._submit(fallback, text, source_lang, target_lang, priority)}
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'hedges_skipped': self.hedges_skipped
+            }
+        return {
+            **counters,
+            'backends': {backend.name: backend.stats.as_dict() for backend in self.backends}
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,250 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from src.config.constants import (
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_MEMORY_SIZE,
+    TRANSLATION_CACHE_MAX_ROWS,
+    TRANSLATION_CACHE_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+class TranslationCache:
+    """
+    Two-tier translation cache: an in-memory LRU in front of an SQLite store.
+
+    Entries are keyed by (source, target, normalized text), so casing and
+    whitespace differences in what players type share one entry. The most
+    recently used rows are loaded into memory on startup.
+
+    Reads never commit: last_used times of hit entries are collected and
+    written with the next put, or in one batch every TOUCH_BATCH hits.
+    Lookups that may reach the disk belong off the event loop, see
+    get_many and put_many.
+    """
+
+    # Hits whose last_used update may wait before being written
+    TOUCH_BATCH = 256
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = TRANSLATION_CACHE_PATH,
+        memory_size: int = TRANSLATION_CACHE_MEMORY_SIZE,
+        max_rows: int = TRANSLATION_CACHE_MAX_ROWS,
+        ttl: float = TRANSLATION_CACHE_TTL,
+        warm_start: bool = True
+    ):
+        """
+        Args:
+            path: SQLite database file, None keeps the cache in memory only
+            memory_size: Entries kept in the in-memory LRU tier
+            max_rows: Rows kept on disk, least recently used are pruned first
+            ttl: Seconds before an entry expires
+            warm_start: Load the most recently used rows into memory
+        """
+        self.memory_size = memory_size
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._memory: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: Dict[CacheKey, float] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if path is not None:
+            try:
+                self._db = self._open(path)
+                if warm_start:
+                    self._warm()
+            except sqlite3.Error as e:
+                logger.error(f"Translation cache unavailable, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse whitespace and casing differences"""
+        return ' '.join(text.split()).lower()
+
+    def _open(self, path: Union[str, Path]) -> sqlite3.Connection:
+        """Open the database and create the table if needed"""
+        db = sqlite3.connect(str(path), check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'source TEXT NOT NULL, target TEXT NOT NULL, text TEXT NOT NULL, '
+            'translation TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL, '
+            'PRIMARY KEY (source, target, text))'
+        )
+        db.execute(
+            'CREATE INDEX IF NOT EXISTS translations_last_used '
+            'ON translations (last_used)'
+        )
+        db.execute('DELETE FROM translations WHERE created < ?', (time.time() - self.ttl,))
+        db.commit()
+        return db
+
+    def _warm(self):
+        """Load the most recently used rows into the memory tier"""
+        rows = self._db.execute(
+            'SELECT source, target, text, translation, created FROM translations '
+            'ORDER BY last_used DESC LIMIT ?',
+            (self.memory_size,)
+        ).fetchall()
+        for source, target, text, translation, created in reversed(rows):
+            self._memory[(source, target, text)] = (translation, created)
+        logger.info(f"Translation cache warmed with {len(rows)} entries")
+
+    def get(self, source: str, target: str, text: str) -> Optional[str]:
+        """
+        Look up a cached translation
+
+        Args:
+            source: Source language code
+            target: Target language code
+            text: Text to translate
+
+        Returns:
+            Cached translation, or None on a miss
+        """
+        return self.get_many(source, target, [text])[0]
+
+    def get_many(self, source: str, target: str, texts: Iterable[str]) -> List[Optional[str]]:
+        """Look up several texts of one language pair, None for each miss"""
+        now = time.time()
+        with self._lock:
+            results = [self._get((source, target, self.normalize(text)), now) for text in texts]
+            if len(self._touched) >= self.TOUCH_BATCH:
+                try:
+                    self._write_touched()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Translation cache write failed: {e}")
+            return results
+
+    def _get(self, key: CacheKey, now: float) -> Optional[str]:
+        """Look up one key in both tiers, called with the lock held"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            translation, created = entry
+            if now - created <= self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self._touch(key, now)
+                return translation
+            del self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                'SELECT translation, created FROM translations '
+                'WHERE source = ? AND target = ? AND text = ?',
+                key
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                self._touch(key, now)
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def _touch(self, key: CacheKey, now: float):
+        """Remember a hit, its last_used is written with the next commit"""
+        if self._db is not None:
+            self._touched[key] = now
+
+    def _write_touched(self):
+        """Write collected last_used times, called with the lock held"""
+        if self._db is None or not self._touched:
+            return
+        self._db.executemany(
+            'UPDATE translations SET last_used = ? '
+            'WHERE source = ? AND target = ? AND text = ?',
+            [(used, *key) for key, used in self._touched.items()]
+        )
+        self._touched.clear()
+
+    def put(self, source: str, target: str, text: str, translation: str):
+        """Store a translation in both tiers"""
+        self.put_many(source, target, [(text, translation)])
+
+    def put_many(self, source: str, target: str, items: Iterable[Tuple[str, str]]):
+        """Store several (text, translation) pairs of one language pair in one commit"""
+        now = time.time()
+        with self._lock:
+            rows = []
+            for text, translation in items:
+                key = (source, target, self.normalize(text))
+                self._remember(key, translation, now)
+                self._touched.pop(key, None)
+                rows.append((*key, translation, now, now))
+            if self._db is None or not rows:
+                return
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO translations '
+                    '(source, target, text, translation, created, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                self._write_touched()
+                previous = self._writes
+                self._writes += len(rows)
+                if self._writes // 100 != previous // 100:
+                    self._prune(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Translation cache write failed: {e}")
+
+    def _remember(self, key: CacheKey, translation: str, created: float):
+        """Insert into the memory tier, evicting the least recently used"""
+        self._memory[key] = (translation, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now: float):
+        """Drop expired rows and rows beyond max_rows"""
+        self._db.execute('DELETE FROM translations WHERE created < ?', (now - self.ttl,))
+        self._db.execute(
+            'DELETE FROM translations WHERE rowid IN ('
+            'SELECT rowid FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (self.max_rows,)
+        )
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'memory_entries': len(self._memory),
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate
+        }
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._write_touched()
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Translation cache write failed: {e}")
+                self._db.close()
+                self._db = None
+        logger.debug(f"Translation cache stats: {self.stats()}")
@@ -1,5 +1,7 @@
 from typing import Dict
+import threading
 import mss
+import numpy as np
 from PIL import Image
 import logging
 
@@ -7,25 +9,63 @@ logger = logging.getLogger(__name__)
 
 class ScreenCapture:
     def __init__(self):
-        self.screen_capture = mss.mss()
+        # mss handles are bound to the thread that created them, so each
+        # thread capturing (UI or pipeline executor) gets its own
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
     
-    def capture_area(self, area: Dict[str, int]) -> Image.Image:
+    @property
+    def screen_capture(self) -> mss.base.MSSBase:
+        """mss handle for the calling thread"""
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = mss.mss()
+            self._local.handle = handle
+            with self._lock:
+                self._handles.append(handle)
+        return handle
+
+    def capture_area_array(self, area: Dict[str, int]) -> np.ndarray:
         """
-        Capture a specific area of the screen
-        
+        Capture a specific area of the screen without copying pixel data
+
         Args:
             area: Dictionary with left, top, width, height keys
-            
+
         Returns:
-            PIL Image of the captured area
+            HxWx4 uint8 BGRA array viewing the raw mss buffer
         """
         try:
             screenshot = self.screen_capture.grab(area)
-            return Image.frombytes('RGB', screenshot.size, screenshot.rgb)
+            return np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(
+                screenshot.height, screenshot.width, 4
+            )
         except Exception as e:
             logger.error(f"Screen capture failed: {e}")
             raise
 
+    def capture_area(self, area: Dict[str, int]) -> Image.Image:
+        """
+        Capture a specific area of the screen
+
+        Compatibility wrapper around capture_area_array for callers that
+        need a PIL Image.
+
+        Args:
+            area: Dictionary with left, top, width, height keys
+
+        Returns:
+            PIL Image of the captured area
+        """
+        frame = self.capture_area_array(area)
+        height, width = frame.shape[:2]
+        # Decode BGRA straight into RGB in a single pass
+        return Image.frombuffer('RGB', (width, height), frame, 'raw', 'BGRX', 0, 1)
+
     def cleanup(self):
         """Clean up resources"""
-        self.screen_capture.close()
\ No newline at end of file
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for handle in handles:
+            handle.close()
@@ -0,0 +1,109 @@
+"""Incremental parsing of streamed LLM output into chat lines"""
+import re
+import time
+from typing import Dict, List, Optional
+
+CHAT_LINE = re.compile(r'^\[(?P<team>[^\]]*)\]\s*(?P<name>[^:\[\]]+?)\s*:\s*(?P<message>.*)$')
+# Lines like "Here's the translation:" some replies start with
+PREAMBLE = re.compile(r"here'?s|translation", re.IGNORECASE)
+
+class ChatLine:
+    """One translated chat line, team and name are None when unformatted"""
+    __slots__ = ('team', 'name', 'message')
+
+    def __init__(self, team: Optional[str], name: Optional[str], message: str):
+        self.team = team
+        self.name = name
+        self.message = message
+
+    @classmethod
+    def parse(cls, line: str) -> "ChatLine":
+        match = CHAT_LINE.match(line)
+        if match is None:
+            return cls(None, None, line)
+        return cls(match.group('team'), match.group('name'), match.group('message'))
+
+    @property
+    def formatted(self) -> bool:
+        return self.name is not None
+
+    def __str__(self) -> str:
+        if not self.formatted:
+            return self.message
+        return f"[{self.team}] {self.name}: {self.message}"
+
+    def __repr__(self) -> str:
+        return f"ChatLine({self.team!r}, {self.name!r}, {self.message!r})"
+
+class StreamParser:
+    """
+    Turns streamed text deltas into ChatLine records as lines complete.
+
+    Applies the same cleanup as OpenAIChatAnalyzer._clean_response, line by
+    line: code fences and blank lines are dropped, and so is an introductory
+    line before the first chat line.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self.lines = 0
+        self.start = time.perf_counter()
+        self.first_line_ms: Optional[float] = None
+
+    def feed(self, delta: str) -> List[ChatLine]:
+        """Add a delta, returning the lines it completed"""
+        self._buffer += delta
+        if '\n' not in self._buffer:
+            return []
+        *complete, self._buffer = self._buffer.split('\n')
+        return self._parse(complete)
+
+    def close(self) -> List[ChatLine]:
+        """Flush the final unterminated line"""
+        remainder, self._buffer = self._buffer, ''
+        return self._parse([remainder])
+
+    def _parse(self, lines: List[str]) -> List[ChatLine]:
+        records = []
+        for line in lines:
+            line = line.replace('```', '').strip()
+            if not line:
+                continue
+            record = ChatLine.parse(line)
+            if not self.lines and not record.formatted and PREAMBLE.search(line) and line.endswith(':'):
+                continue
+            if self.first_line_ms is None:
+                self.first_line_ms = (time.perf_counter() - self.start) * 1000
+            self.lines += 1
+            records.append(record)
+        return records
+
+class StreamStats:
+    """Latency of streamed responses: first token, first line and completion"""
+
+    def __init__(self):
+        self.streams = 0
+        self.lines = 0
+        self.first_token_ms = 0.0
+        self.first_line_ms = 0.0
+        self.total_ms = 0.0
+        self.last_first_line_ms: Optional[float] = None
+
+    def record(self, first_token_ms: Optional[float], parser: StreamParser, total_ms: float):
+        self.streams += 1
+        self.lines += parser.lines
+        self.first_token_ms += first_token_ms or total_ms
+        self.first_line_ms += parser.first_line_ms or total_ms
+        self.total_ms += total_ms
+        self.last_first_line_ms = parser.first_line_ms
+
+    def as_dict(self) -> Dict[str, float]:
+        streams = self.streams or 1
+        return {
+            'streams': self.streams,
+            'lines': self.lines,
+            'avg_first_token_ms': self.first_token_ms / streams,
+            'avg_first_line_ms': self.first_line_ms / streams,
+            'avg_total_ms': self.total_ms / streams,
+            'last_first_line_ms': self.last_first_line_ms
+        }
@@ -0,0 +1,194 @@
+"""Shared keep-alive HTTP connections for the translation providers"""
+import asyncio
+import importlib.util
+import logging
+import time
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from src.config.constants import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_TIMEOUT
+)
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 multiplexes requests over one connection but needs the h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+# deep-translator modules that call requests.get/post directly
+DEEP_TRANSLATOR_MODULES = ['google', 'mymemory', 'libre']
+
+class _TimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to requests that set none"""
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+class _SessionModule:
+    """
+    Stands in for the requests module inside deep-translator
+
+    The HTTP methods go through the shared session, everything else, e.g.
+    requests.exceptions, still comes from the real module.
+    """
+    METHODS = ('request', 'get', 'options', 'head', 'post', 'put', 'patch', 'delete')
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def __getattr__(self, name: str):
+        if name in self.METHODS:
+            return getattr(self.session, name)
+        return getattr(requests, name)
+
+class ConnectionPool:
+    """
+    Long-lived HTTP clients shared by every outbound translation request.
+
+    The async client backs AsyncOpenAI and the requests session backs
+    deep-translator, so both reuse open TLS connections instead of paying
+    DNS, TCP and TLS setup on each call. warm_up opens the connections ahead
+    of the first translation and ping keeps them from idling out.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        timeout: float = HTTP_TIMEOUT
+    ):
+        """
+        Args:
+            max_connections: Open connections allowed per client
+            max_keepalive: Idle connections kept open per client
+            keepalive_expiry: Seconds an idle connection is kept
+            connect_timeout: Seconds allowed to establish a connection
+            timeout: Seconds allowed for a response
+        """
+        self.session = requests.Session()
+        adapter = _TimeoutAdapter(
+            (connect_timeout, timeout),
+            pool_connections=max_keepalive,
+            pool_maxsize=max_connections
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.async_client = None
+        if httpx is not None:
+            self.async_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive,
+                    keepalive_expiry=keepalive_expiry
+                ),
+                timeout=httpx.Timeout(timeout, connect=connect_timeout)
+            )
+
+        self.async_urls: List[str] = []
+        self.sync_urls: List[str] = []
+        self.pings = 0
+        self.failures = 0
+        # Last round trip per URL in milliseconds
+        self.latency: Dict[str, float] = {}
+
+    def add_async_url(self, url: str):
+        """Keep connections to a host used through async_client warm"""
+        if self.async_client is not None and url not in self.async_urls:
+            self.async_urls.append(url)
+
+    def add_sync_url(self, url: str):
+        """Keep connections to a host used through session warm"""
+        if url not in self.sync_urls:
+            self.sync_urls.append(url)
+
+    def install_deep_translator(self):
+        """
+        Route deep-translator's provider calls through the shared session
+
+        The providers call requests.get/post at module level, which opens a
+        new connection per call. Their module global is swapped for a proxy
+        sending those calls through the session.
+        """
+        for name in DEEP_TRANSLATOR_MODULES:
+            try:
+                module = importlib.import_module(f'deep_translator.{name}')
+            except ImportError:
+                continue
+            module.requests = _SessionModule(self.session)
+
+    def _head_sync(self, url: str) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            self.session.head(url, allow_redirects=False)
+        except requests.RequestException as e:
+            self.failures += 1
+            logger.debug(f"Keep-alive request to {url} failed: {e}")
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    async def _head_async(self, url: str) -> Optional[float]:
+        start = time.perf_counter()
+        try:
+            await self.async_client.head(url)
+        except httpx.HTTPError as e:
+            self.failures += 1
+            logger.debug(f"Keep-alive request to {url} failed: {e}")
+            return None
+        return (time.perf_counter() - start) * 1000
+
+    async def ping(self):
+        """
+        Send a cheap request to every registered host
+
+        Opens connections that are not open yet and resets the idle timer
+        of those that are. Failures are only logged.
+        """
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(self._head_async(url) for url in self.async_urls),
+            *(loop.run_in_executor(None, self._head_sync, url) for url in self.sync_urls)
+        )
+        self.pings += 1
+        for url, latency in zip(self.async_urls + self.sync_urls, results):
+            if latency is not None:
+                self.latency[url] = latency
+
+    async def warm_up(self):
+        """Open connections ahead of the first translation"""
+        await self.ping()
+        logger.debug(f"Connections warmed up: {self.stats()}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'http2': HTTP2_AVAILABLE and self.async_client is not None,
+            'pings': self.pings,
+            'failures': self.failures,
+            'latency_ms': dict(self.latency)
+        }
+
+    async def aclose(self):
+        """Close the async client, must run on the loop that used it"""
+        if self.async_client is not None:
+            await self.async_client.aclose()
+
+    def close(self):
+        self.session.close()
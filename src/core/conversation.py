@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from src.config.constants import CONVERSATION_CONTEXT_LINES
+from src.core.cache import TranslationCache
+from src.core.chat_parser import ChatLine
+from src.core.openai import OpenAIChatAnalyzer
+from src.core.scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+# LLM translations carry the chat format, so they are cached apart from
+# machine translations of the same language pair
+LLM_CACHE_TAG = '+llm'
+
+# on_line(index, translation, final)
+LineCallback = Callable[[int, str, bool], Awaitable[None]]
+# draft(message bodies) -> translations in the same order
+DraftTranslator = Callable[[List[str]], Awaitable[List[str]]]
+
+class IncrementalStats:
+    """What incremental translation sent compared to resending everything"""
+
+    def __init__(self):
+        self.requests = 0
+        self.llm_requests = 0
+        self.lines_total = 0
+        self.lines_sent = 0
+        self.chars_sent = 0
+        self.chars_full = 0
+        self.last_first_line_ms: Optional[float] = None
+        self.last_draft_ms: Optional[float] = None
+
+    @property
+    def reuse_ratio(self) -> float:
+        if not self.lines_total:
+            return 0.0
+        return 1 - self.lines_sent / self.lines_total
+
+    @property
+    def tokens_saved(self) -> int:
+        """Rough prompt tokens saved, at about four characters per token"""
+        return max(0, self.chars_full - self.chars_sent) // 4
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'requests': self.requests,
+            'llm_requests': self.llm_requests,
+            'lines_total': self.lines_total,
+            'lines_sent': self.lines_sent,
+            'reuse_ratio': self.reuse_ratio,
+            'tokens_saved': self.tokens_saved,
+            'last_first_line_ms': self.last_first_line_ms,
+            'last_draft_ms': self.last_draft_ms
+        }
+
+class IncrementalTranslator:
+    """
+    Conversation-aware layer around OpenAIChatAnalyzer.analyze_text_only.
+
+    Chat messages that were translated before are served from the cache and
+    only new ones are sent to the LLM, together with a few preceding
+    messages as context. The output is stitched back in chat order and
+    streamed line by line as soon as each line is known. A fast draft
+    translation can be shown meanwhile, see translate_lines.
+    """
+
+    def __init__(
+        self,
+        analyzer: OpenAIChatAnalyzer,
+        cache: Optional[TranslationCache] = None,
+        context_lines: int = CONVERSATION_CONTEXT_LINES,
+        source_lang: str = 'pt',
+        target_lang: str = 'en'
+    ):
+        """
+        Args:
+            analyzer: Analyzer used for the new messages
+            cache: Translation cache, a memory-only one is created if omitted
+            context_lines: Earlier messages sent along as context
+            source_lang: Chat language code
+            target_lang: Translation language code
+        """
+        self.analyzer = analyzer
+        self.cache = cache or TranslationCache(path=None)
+        self.context_lines = context_lines
+        self.source_lang = source_lang
+        self.cache_target = target_lang + LLM_CACHE_TAG
+        self.stats = IncrementalStats()
+
+    async def _lookup(self, messages: List[str]) -> List[Optional[str]]:
+        """Cached translations of messages, read off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.cache.get_many, self.source_lang, self.cache_target, messages
+        )
+
+    async def _store(self, items: List[Tuple[str, str]]):
+        """Cache (message, translation) pairs off the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, self.cache.put_many, self.source_lang, self.cache_target, items
+        )
+
+    @staticmethod
+    def split_messages(text: str) -> List[str]:
+        """OCR text as the list of chat messages translate_lines works on"""
+        return [line.strip() for line in text.split('\n') if line.strip()]
+
+    async def translate(
+        self,
+        text: str,
+        callback: Optional[Callable[[str], Awaitable[None]]] = None,
+        stream_key: Optional[Hashable] = None,
+        priority: Priority = Priority.CAPTURE
+    ) -> str:
+        """
+        Translate OCR text, sending only messages not translated before
+
+        Args:
+            text: OCR text, one chat message per line
+            callback: Optional coroutine function receiving output deltas
+            stream_key: Passed to analyze_text_only so a newer request for
+                the same display cancels this one
+            priority: Scheduling class of the LLM request
+
+        Returns:
+            Translated chat, one message per line
+        """
+        ready: Dict[int, str] = {}
+        emitted = 0
+
+        async def emit_ready(index: int, line: str, final: bool):
+            # Emit the longest translated prefix not shown yet
+            nonlocal emitted
+            if not final:
+                return
+            ready[index] = line
+            while emitted in ready:
+                if callback:
+                    await callback(ready[emitted] + '\n')
+                emitted += 1
+
+        translations = await self.translate_lines(text, emit_ready, stream_key, priority=priority)
+        return '\n'.join(translations)
+
+    async def translate_lines(
+        self,
+        text: str,
+        on_line: Optional[LineCallback] = None,
+        stream_key: Optional[Hashable] = None,
+        draft: Optional[DraftTranslator] = None,
+        priority: Priority = Priority.CAPTURE
+    ) -> List[str]:
+        """
+        Translate OCR text message by message, reporting each line as it is known
+
+        Cached messages are reported right away. When a draft translator is
+        given it runs next to the LLM request and its lines are reported
+        as provisional, to be replaced by the LLM line for the same message.
+
+        Args:
+            text: OCR text, one chat message per line
+            on_line: Optional coroutine function called with the message
+                index, its translation and whether the translation is final
+            stream_key: Passed to analyze_text_only so a newer request for
+                the same display cancels this one, also when it has nothing
+                new to send
+            draft: Optional coroutine function translating a list of message
+                bodies quickly, e.g. with a machine translation backend
+            priority: Scheduling class of the LLM request
+
+        Returns:
+            Final translations, one per message of split_messages(text)
+        """
+        start = time.perf_counter()
+        messages = self.split_messages(text)
+        translations = await self._lookup(messages)
+        new = [index for index, translation in enumerate(translations) if translation is None]
+
+        self.stats.requests += 1
+        self.stats.lines_total += len(messages)
+        self.stats.lines_sent += len(new)
+        self.stats.chars_full += len(text)
+        self.stats.last_draft_ms = None
+
+        if on_line:
+            for index, translation in enumerate(translations):
+                if translation is not None:
+                    await on_line(index, translation, True)
+
+        if not new and stream_key is not None:
+            # Nothing to send, but an older stream must stop writing here
+            self.analyzer.cancel_stream(stream_key)
+
+        if new:
+            drafts: Dict[int, str] = {}
+            draft_task = None
+            if draft is not None:
+                draft_task = asyncio.ensure_future(
+                    self._draft(messages, translations, new, draft, drafts, on_line, start)
+                )
+            try:
+                await self._translate_new(
+                    messages, translations, new, drafts, on_line, start, stream_key, priority
+                )
+            finally:
+                if draft_task is not None and not draft_task.done():
+                    draft_task.cancel()
+
+        logger.debug(f"Incremental translation: {self.stats.as_dict()}")
+        return translations
+
+    async def _draft(self, messages, translations, new, draft, drafts, on_line, start):
+        """Report quick provisional translations of messages the LLM has not sent yet"""
+        prefixes = []
+        bodies = []
+        for index in new:
+            # Keep "[Team] Name:" as is, machine translation mangles names
+            record = ChatLine.parse(messages[index])
+            prefixes.append(f"[{record.team}] {record.name}: " if record.formatted else '')
+            bodies.append(record.message)
+
+        try:
+            translated = await draft(bodies)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Draft translation failed: {e}")
+            return
+
+        self.stats.last_draft_ms = (time.perf_counter() - start) * 1000
+        for index, prefix, body in zip(new, prefixes, translated):
+            if not body:
+                continue
+            drafts[index] = prefix + body
+            if translations[index] is None and on_line:
+                await on_line(index, drafts[index], False)
+
+    async def _translate_new(self, messages, translations, new, drafts, on_line, start, stream_key, priority):
+        """Stream translations of the new messages into their slots"""
+        first = new[0]
+        context = messages[max(0, first - self.context_lines):first]
+        new_text = '\n'.join(messages[index] for index in new)
+        self.stats.llm_requests += 1
+        self.stats.chars_sent += len(new_text) + sum(len(line) + 1 for line in context)
+        self.stats.last_first_line_ms = None
+
+        received: List[str] = []
+
+        async def assign(record: ChatLine):
+            line = str(record)
+            received.append(line)
+            if len(received) > len(new):
+                return
+            index = new[len(received) - 1]
+            translations[index] = line
+            if self.stats.last_first_line_ms is None:
+                self.stats.last_first_line_ms = (time.perf_counter() - start) * 1000
+            if on_line:
+                await on_line(index, line, True)
+
+        # The analyzer parses the stream once and hands over each line
+        await self.analyzer.analyze_text_only(
+            new_text,
+            context=context,
+            stream_key=stream_key,
+            priority=priority,
+            line_callback=assign
+        )
+
+        if len(received) == len(new):
+            await self._store([(messages[index], translations[index]) for index in new])
+            return
+
+        # The reply does not line up with the request: show it, cache nothing
+        logger.warning(
+            f"LLM returned {len(received)} lines for {len(new)} messages, not caching"
+        )
+        if len(received) > len(new):
+            last = new[-1]
+            translations[last] = ' '.join([translations[last]] + received[len(new):])
+            if on_line:
+                await on_line(last, translations[last], True)
+        for index in new[len(received):]:
+            # Fall back to the draft, or the original when there is none
+            translations[index] = drafts.get(index, messages[index])
+            if on_line:
+                await on_line(index, translations[index], True)
@@ -3,25 +3,295 @@ import cv2
 import numpy as np
 import pytesseract
 import logging
-from typing import Optional
+import os
+import re
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
-from src.config.constants import OCR_CONFIG, DEBUG_DIR
-from src.utils.image_processing import preprocess_image
+from src.config.constants import (
+    OCR_CONFIG,
+    OCR_LANG,
+    OCR_BACKEND,
+    OCR_LINE_CACHE_SIZE,
+    OCR_WORKERS,
+    PREPROCESS_STAGES,
+    DEBUG_DIR
+)
+from src.utils.image_processing import preprocess_image, preprocess_array, split_line_strips
+from src.utils.preprocessing import PreprocessPipeline
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 logger = logging.getLogger(__name__)
 
+class OCRBackend(ABC):
+    """Interface for engines turning a preprocessed image into raw text"""
+    name = 'base'
+    # Whether calls are cheap enough to OCR line strips one by one
+    persistent = False
+    
+    @abstractmethod
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], single_line: bool = False) -> str:
+        """
+        Run OCR on a preprocessed image
+        
+        Args:
+            image: Preprocessed grayscale image
+            single_line: Treat the image as one text line (--psm 7)
+            
+        Returns:
+            Raw text as returned by the engine
+        """
+    
+    def close(self):
+        """Release engine resources"""
+        pass
+
+class PytesseractBackend(OCRBackend):
+    """
+    Runs the tesseract binary through pytesseract.
+    
+    Every call writes a temp file, spawns a process and reloads the language
+    model, so this is only used when no persistent engine is available.
+    """
+    name = 'pytesseract'
+    
+    def __init__(self, tesseract_path: str, lang: str = OCR_LANG, config: str = OCR_CONFIG):
+        self.lang = lang
+        self.config = config
+        self.line_config = _with_psm(config, 7)
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], single_line: bool = False) -> str:
+        return pytesseract.image_to_string(
+            image,
+            lang=self.lang,
+            config=self.line_config if single_line else self.config
+        )
+
+class TesserocrBackend(OCRBackend):
+    """
+    Long-lived in-process Tesseract handle via the tesserocr C-API bindings.
+    
+    The language model is loaded once and reused for every call.
+    """
+    name = 'tesserocr'
+    persistent = True
+    
+    def __init__(self, tesseract_path: str, lang: str = OCR_LANG, config: str = OCR_CONFIG):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        
+        options = {'lang': lang}
+        psm = _config_value(config, 'psm')
+        if psm is not None:
+            options['psm'] = psm
+        oem = _config_value(config, 'oem')
+        if oem is not None:
+            options['oem'] = oem
+        
+        # Reuse the traineddata shipped next to the configured binary
+        tessdata = os.path.join(os.path.dirname(tesseract_path), 'tessdata')
+        if os.path.isdir(tessdata):
+            options['path'] = tessdata
+        
+        self._api = tesserocr.PyTessBaseAPI(**options)
+        self._page_mode = self._api.GetPageSegMode()
+        # A single API handle must not be used from several threads at once
+        self._lock = threading.Lock()
+    
+    def image_to_string(self, image: Union[Image.Image, np.ndarray], single_line: bool = False) -> str:
+        with self._lock:
+            self._api.SetPageSegMode(tesserocr.PSM.SINGLE_LINE if single_line else self._page_mode)
+            if isinstance(image, Image.Image):
+                self._api.SetImage(image)
+            else:
+                image = np.ascontiguousarray(image)
+                height, width = image.shape[:2]
+                channels = 1 if image.ndim == 2 else image.shape[2]
+                self._api.SetImageBytes(
+                    image.tobytes(), width, height, channels, width * channels
+                )
+            return self._api.GetUTF8Text()
+    
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+def _config_value(config: str, option: str) -> Optional[int]:
+    """Read an integer option such as --psm from a tesseract config string"""
+    match = re.search(rf'--{option}\s+(\d+)', config)
+    return int(match.group(1)) if match else None
+
+def _with_psm(config: str, psm: int) -> str:
+    """Config string with its --psm option replaced or added"""
+    if _config_value(config, 'psm') is None:
+        return f"{config} --psm {psm}".strip()
+    return re.sub(r'--psm\s+\d+', f'--psm {psm}', config)
+
+def create_ocr_backend(
+    tesseract_path: str,
+    backend: str = OCR_BACKEND,
+    lang: str = OCR_LANG,
+    config: str = OCR_CONFIG
+) -> OCRBackend:
+    """
+    Create an OCR backend, falling back to pytesseract when needed
+    
+    Args:
+        tesseract_path: Path to the tesseract binary
+        backend: 'auto', 'tesserocr' or 'pytesseract'
+        lang: Tesseract language code
+        config: Tesseract config string
+        
+    Returns:
+        Ready to use OCR backend
+    """
+    if backend in ('auto', 'tesserocr'):
+        try:
+            return TesserocrBackend(tesseract_path, lang, config)
+        except Exception as e:
+            log = logger.warning if backend == 'tesserocr' else logger.info
+            log(f"Persistent OCR engine unavailable, using pytesseract: {e}")
+    return PytesseractBackend(tesseract_path, lang, config)
+
+# Backend owned by an OCR worker process, created by _init_worker
+_worker_backend: Optional[OCRBackend] = None
+
+def _init_worker(tesseract_path: str, backend: str, lang: str, config: str):
+    """Create the per-process OCR engine once when a worker starts"""
+    global _worker_backend
+    _worker_backend = create_ocr_backend(tesseract_path, backend, lang, config)
+
+def _ocr_worker(image: np.ndarray, single_line: bool = False) -> str:
+    """OCR one strip, or a stack of strips, inside a worker process"""
+    return _worker_backend.image_to_string(image, single_line)
+
+class LineCache:
+    """Bounded LRU cache of OCR results keyed by line strip pixel hash"""
+    
+    # Rough per-entry overhead of the key tuple, digest and dict slot
+    ENTRY_OVERHEAD = 200
+    
+    def __init__(self, max_entries: int = OCR_LINE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int, bytes], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(strip: np.ndarray) -> Tuple[int, int, bytes]:
+        """Hash a strip's pixels together with its shape"""
+        strip = np.ascontiguousarray(strip)
+        digest = hashlib.blake2b(strip.data, digest_size=16).digest()
+        return strip.shape[0], strip.shape[1], digest
+    
+    def get(self, key: Tuple[int, int, bytes]) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+    
+    def put(self, key: Tuple[int, int, bytes], text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory held by cached entries"""
+        with self._lock:
+            return sum(
+                len(text.encode('utf-8')) + self.ENTRY_OVERHEAD
+                for text in self._entries.values()
+            )
+    
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+            'memory_bytes': self.memory_bytes
+        }
+
 class OCRProcessor:
-    def __init__(self, tesseract_path: str):
+    def __init__(
+        self,
+        tesseract_path: str,
+        backend: str = OCR_BACKEND,
+        line_cache_size: int = OCR_LINE_CACHE_SIZE,
+        workers: int = OCR_WORKERS,
+        preprocess_stages: Sequence[str] = PREPROCESS_STAGES
+    ):
+        """
+        Args:
+            tesseract_path: Path to the tesseract binary
+            backend: OCR backend name, see create_ocr_backend
+            line_cache_size: Cached line strips, 0 disables the line cache
+            workers: OCR worker processes, 0 runs OCR in this process
+            preprocess_stages: Default preprocessing stage names in order
+        """
         self.tesseract_path = tesseract_path
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self.backend_name = backend
+        self.backend = create_ocr_backend(tesseract_path, backend)
+        self.workers = workers
+        self.preprocess = PreprocessPipeline.from_names(preprocess_stages)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.line_cache = LineCache(line_cache_size) if line_cache_size > 0 else None
+        self.calls = 0
+        self.engine_time = 0.0
+        # Frames the region stage found no text in, OCR never ran for them
+        self.skipped = 0
+        logger.info(f"OCR backend: {self.backend.name}")
+    
+    @property
+    def avg_engine_ms(self) -> float:
+        """Average time spent inside the OCR engine per call"""
+        return self.engine_time * 1000 / self.calls if self.calls else 0.0
         
-    def process_image(self, image: Image.Image, save_debug: bool = False) -> str:
+    def process_image(
+        self,
+        image: Image.Image,
+        save_debug: bool = False,
+        pipeline: Optional[PreprocessPipeline] = None
+    ) -> str:
         """
         Process image and extract text
         
         Args:
             image: PIL Image to process
             save_debug: Whether to save debug images
+            pipeline: Preprocessing for this region, the default if omitted
             
         Returns:
             Extracted text from the image
@@ -30,22 +300,144 @@ class OCRProcessor:
             processed_image = preprocess_image(
                 image, 
                 save_debug=save_debug, 
-                debug_dir=DEBUG_DIR
+                debug_dir=DEBUG_DIR,
+                pipeline=pipeline or self.preprocess
             )            
             return self._extract_text(processed_image)
         except Exception as e:
             logger.error(f"OCR processing failed: {e}")
             raise
     
-    def _extract_text(self, image: Image.Image) -> str:
-        """Extract text from processed image"""
-        text = pytesseract.image_to_string(
-            image,
-            lang='por',
-            config=OCR_CONFIG
+    def process_array(
+        self,
+        frame: np.ndarray,
+        save_debug: bool = False,
+        pipeline: Optional[PreprocessPipeline] = None
+    ) -> str:
+        """
+        Process a raw captured frame and extract text
+        
+        Args:
+            frame: BGRA array from ScreenCapture.capture_area_array
+            save_debug: Whether to save debug images
+            pipeline: Preprocessing for this region, the default if omitted
+            
+        Returns:
+            Extracted text from the frame
+        """
+        try:
+            processed_image = preprocess_array(
+                frame,
+                save_debug=save_debug,
+                debug_dir=DEBUG_DIR,
+                pipeline=pipeline or self.preprocess
+            )
+            return self._extract_text(processed_image)
+        except Exception as e:
+            logger.error(f"OCR processing failed: {e}")
+            raise
+    
+    def _extract_text(self, image: Optional[Union[Image.Image, np.ndarray]]) -> str:
+        """Extract text from processed image, None when preprocessing found no text"""
+        if image is None:
+            self.skipped += 1
+            return ''
+        if self.line_cache is not None or self.workers > 0:
+            text = self._extract_lines(np.asarray(image))
+        else:
+            text = self._run_engine(image)
+        return self._reconstruct_messages(text)
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the worker pool on first use"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.tesseract_path, self.backend_name, OCR_LANG, OCR_CONFIG)
+            )
+            logger.info(f"Started {self.workers} OCR worker processes")
+        return self._pool
+    
+    def _run_engine_many(self, images: List[np.ndarray], single_line: bool = False) -> List[str]:
+        """OCR several images, across the worker pool when enabled"""
+        if not images:
+            return []
+        if self.workers <= 0 or len(images) == 1:
+            return [self._run_engine(image, single_line) for image in images]
+        
+        start = time.perf_counter()
+        texts = list(self._get_pool().map(_ocr_worker, images, [single_line] * len(images)))
+        elapsed = time.perf_counter() - start
+        self.calls += len(images)
+        self.engine_time += elapsed
+        logger.debug(
+            f"Parallel OCR: {len(images)} images on {self.workers} workers "
+            f"in {elapsed * 1000:.1f} ms"
         )
+        return texts
+    
+    def _run_engine(self, image: Union[Image.Image, np.ndarray], single_line: bool = False) -> str:
+        """Run the OCR engine once and record its cost"""
+        start = time.perf_counter()
+        text = self.backend.image_to_string(image, single_line)
+        self.calls += 1
+        self.engine_time += time.perf_counter() - start
+        return text
+    
+    def _extract_lines(self, image: np.ndarray) -> str:
+        """OCR line strips, reusing cached results for strips seen before"""
+        cache = self.line_cache
+        lines = []
+        missing = []
+        for top, bottom in split_line_strips(image):
+            strip = image[top:bottom]
+            key = cache.key(strip) if cache is not None else None
+            text = cache.get(key) if cache is not None else None
+            if text is None:
+                missing.append((len(lines), key, strip))
+            lines.append(text)
         
-        # Clean and reconstruct messages
+        texts = self._ocr_strips([strip for _, _, strip in missing])
+        for (index, key, _), (text, cacheable) in zip(missing, texts):
+            if cacheable and cache is not None:
+                cache.put(key, text)
+            lines[index] = text
+        
+        if cache is not None:
+            logger.debug(f"Line cache: {cache.stats()}")
+        return '\n'.join(lines)
+    
+    def _ocr_strips(self, strips: List[np.ndarray]) -> List[Tuple[str, bool]]:
+        """
+        OCR line strips, returning (text, cacheable) per strip
+        
+        A persistent engine reads each strip as a single line (--psm 7).
+        Otherwise every call spawns a process, so the strips are stacked
+        into one image per worker and the result is split by line. A stack
+        whose line count does not match its strips keeps its text in place
+        of its first strip and is not cached.
+        """
+        if not strips:
+            return []
+        if self.backend.persistent:
+            return [(text.strip(), True) for text in self._run_engine_many(strips, single_line=True)]
+        
+        groups = np.array_split(np.arange(len(strips)), max(1, min(self.workers, len(strips))))
+        stacks = [np.vstack([strips[index] for index in group]) for group in groups]
+        results = []
+        for group, text in zip(groups, self._run_engine_many(stacks)):
+            group_lines = [line.strip() for line in text.split('\n') if line.strip()]
+            if len(group_lines) == len(group):
+                results.extend((line, True) for line in group_lines)
+            else:
+                # Lines merged or dropped, they can't be told apart
+                results.append(('\n'.join(group_lines), False))
+                results.extend(('', False) for _ in group[1:])
+        return results
+    
+    def _reconstruct_messages(self, text: str) -> str:
+        """Join wrapped chat lines back into one line per message"""
         lines = text.split('\n')
         cleaned_lines = []
         temp_message = []
@@ -68,4 +460,16 @@ class OCRProcessor:
         if temp_message:
             cleaned_lines.append(' '.join(temp_message))
         
-        return '\n'.join(cleaned_lines)
\ No newline at end of file
+        return '\n'.join(cleaned_lines)
+    
+    def close(self):
+        """Release the OCR engine and worker processes"""
+        logger.debug(f"Preprocessing ms per stage: {self.preprocess.timings.as_dict()}")
+        logger.debug(
+            f"Preprocessing stage stats: {self.preprocess.stage_stats}, "
+            f"OCR skipped for {self.skipped} frames without text"
+        )
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self.backend.close()
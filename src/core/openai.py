@@ -1,14 +1,66 @@
 import base64
-from io import BytesIO
 import logging
 from openai import AsyncOpenAI
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple, Union
 from PIL import Image
-import random
 import asyncio
+import time
+import math
+from src.config.constants import (
+    OPENROUTER_BASE_URL,
+    CONVERSATION_CONTEXT_LINES,
+    LLM_DEFAULT_MAX_TOKENS,
+    LLM_CHARS_PER_TOKEN,
+    LLM_OUTPUT_RATIO,
+    LLM_TOKENS_PER_LINE,
+    LLM_MIN_TOKENS,
+    LLM_MAX_TOKENS,
+    LLM_TOKENS_PER_IMAGE_LINE,
+    LLM_CHUNK_LINES,
+    LLM_CHUNK_CONCURRENCY,
+    LLM_MODEL,
+    LLM_CONTEXT_HEADER,
+    LLM_TRANSLATE_HEADER
+)
+from src.core.scheduler import Priority, RequestScheduler
+from src.core.chat_parser import ChatLine, StreamParser, StreamStats
+from src.utils.vision_payload import VisionPayload, VisionStats, image_token_costs, optimize_vision_image
+
+if TYPE_CHECKING:
+    from src.utils.stub_llm import StubModel
 
 logger = logging.getLogger(__name__)
 
+def estimate_output_tokens(text: str) -> int:
+    """
+    Response budget for translating text
+    
+    Large enough not to truncate the translation, small enough not to
+    reserve the full default for a single short message.
+    """
+    lines = text.count('\n') + 1
+    estimate = len(text) / LLM_CHARS_PER_TOKEN * LLM_OUTPUT_RATIO + lines * LLM_TOKENS_PER_LINE
+    return max(LLM_MIN_TOKENS, min(LLM_MAX_TOKENS, math.ceil(estimate)))
+
+def estimate_image_output_tokens(lines: int) -> int:
+    """Response budget for an image with the given number of text lines"""
+    if lines <= 0:
+        return LLM_DEFAULT_MAX_TOKENS
+    return max(LLM_MIN_TOKENS, min(LLM_MAX_TOKENS, lines * LLM_TOKENS_PER_IMAGE_LINE))
+
+def split_chunks(lines: List[str], chunk_lines: int = LLM_CHUNK_LINES) -> List[List[str]]:
+    """Split messages into evenly sized chunks of at most chunk_lines"""
+    count = max(1, math.ceil(len(lines) / chunk_lines))
+    # The first len(lines) % count chunks take one line more
+    size, extra = divmod(len(lines), count)
+    chunks = []
+    start = 0
+    for index in range(count):
+        end = start + size + (index < extra)
+        chunks.append(lines[start:end])
+        start = end
+    return chunks
+
 class OpenAIChatAnalyzer:
     """
     A class to handle chat analysis and translation using OpenAI's vision model.
@@ -16,37 +68,54 @@ class OpenAIChatAnalyzer:
     translated text.
     """
     
-    def __init__(self, api_key: str, dev_mode: bool = False):
+    def __init__(
+        self,
+        api_key: str,
+        dev_mode: bool = False,
+        http_client=None,
+        base_url: str = OPENROUTER_BASE_URL,
+        stub_model: Optional["StubModel"] = None
+    ):
         """
         Initialize the OpenAI client with the provided API key.
         
         Args:
             api_key (str): OpenAI API key for authentication
-            dev_mode (bool): If True, use mock responses instead of real API calls
+            dev_mode (bool): If True, requests go to a simulated model instead
+                of the API: text is echoed, images get a canned reply
+            http_client: Optional shared httpx.AsyncClient, see ConnectionPool
+            base_url (str): API endpoint, e.g. a local StubServer
+            stub_model (StubModel): Timing and failure settings of the
+                simulated model used in dev mode
         """
         self.dev_mode = dev_mode
-        if not dev_mode:
+        self.model = LLM_MODEL
+        if dev_mode:
+            # The offline stand-in is only loaded in dev mode
+            from src.utils.stub_llm import SimulatedClient
+            self.client = SimulatedClient(stub_model)
+        else:
             self.client = AsyncOpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=api_key
+                base_url=base_url,
+                api_key=api_key,
+                http_client=http_client
             )
         
+        self._in_flight: Dict[tuple, _Flight] = {}
+        self._streams: Dict[Hashable, _Stream] = {}
+        self.deduplicated = 0
+        self.superseded = 0
+        self.vision_stats = VisionStats()
+        self.stream_stats = StreamStats()
+        # Rate limit key and scheduler shared with the translation backends
+        self.provider = 'openrouter'
+        self.scheduler: Optional[RequestScheduler] = None
+        
         self.system_prompt = """You translate game chat from Portuguese to English. Format: [Team] Name: message
 Do not include explanations or original text."""
 
-        self.mock_responses = [
-            """[Team] Player1: hi everyone, wanna play?
-[Team] Player2: yeah, let's go!
-[Team] Player3: wait a moment please""",
-
-            """[Team] TeamLeader: does anyone know how to play Hulk?
-[Team] Pro_Gamer: just smash everything lol
-[Team] NewPlayer: I need help with the controls""",
-
-            """[Team] Player4: nice play!
-[Team] Player5: thanks for the help
-[Team] Player6: let's win this match"""
-        ]
+        # Canned image replies of the simulated model, see add_mock_response
+        self.mock_responses: List[str] = self.client.model.vision_replies if dev_mode else []
 
     def _encode_image_file(self, image_path: str) -> str:
         """
@@ -61,26 +130,34 @@ Do not include explanations or original text."""
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
-    def _encode_pil_image(self, image: Image.Image) -> str:
+    def _encode_pil_image(self, image: Image.Image) -> Tuple[str, VisionPayload]:
         """
-        Encode a PIL Image to base64 string.
+        Encode a PIL Image to base64 string, cropped and shrunk for upload.
         
         Args:
             image (PIL.Image.Image): PIL Image object
             
         Returns:
-            str: Base64 encoded image string
+            Tuple[str, VisionPayload]: Base64 encoded image string and the
+                payload it was encoded from
         """
-        buffered = BytesIO()
-        image.save(buffered, format="JPEG")
-        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+        start = time.perf_counter()
+        payload = optimize_vision_image(image, model=self.model)
+        self.vision_stats.record(payload, time.perf_counter() - start)
+        logger.debug(
+            f"Vision payload {image.size} -> {payload.size} {payload.mime}, "
+            f"{len(payload.data)} bytes, ~{payload.tokens} tokens "
+            f"(was ~{payload.original_tokens})"
+        )
+        return base64.b64encode(payload.data).decode('utf-8'), payload
 
-    def _prepare_image_payload(self, image_data: str) -> dict:
+    def _prepare_image_payload(self, image_data: str, mime: str = "image/jpeg") -> dict:
         """
         Prepare the image payload for the OpenAI API.
         
         Args:
             image_data (str): Base64 encoded image or image URL
+            mime (str): MIME type of the encoded image
             
         Returns:
             dict: Formatted image payload for the API
@@ -88,32 +165,30 @@ Do not include explanations or original text."""
         return {
             "type": "image_url",
             "image_url": {
-                "url": f"data:image/jpeg;base64,{image_data}"
+                "url": f"data:{mime};base64,{image_data}"
                 if "http" not in image_data
                 else image_data
             }
         }
 
-    async def _get_mock_response(self) -> str:
-        """Get a random mock response for development mode"""
-        await asyncio.sleep(random.uniform(0.5, 2.0))
-        return random.choice(self.mock_responses)
-
     async def analyze_chat(
         self,
         image_input: Union[str, Image.Image],
-        max_tokens: int = 300,
+        max_tokens: Optional[int] = None,
         temperature: float = 0.7,
-        is_url: bool = False
+        is_url: bool = False,
+        priority: Priority = Priority.CAPTURE
     ) -> Optional[str]:
         """
         Analyze a chat image and return translated content.
         
         Args:
             image_input: Path to image file, URL, or PIL Image object
-            max_tokens (int): Maximum tokens for response
+            max_tokens (int): Maximum tokens for response, estimated from
+                the text lines found in the image when omitted
             temperature (float): Temperature for response generation
             is_url (bool): Whether the image_input is a URL
+            priority (Priority): Scheduling class when rate limited
             
         Returns:
             Optional[str]: Translated and processed chat content
@@ -122,20 +197,26 @@ Do not include explanations or original text."""
             Exception: If there's an error in processing the image or API call
         """
         try:
-            if self.dev_mode:
-                return await self._get_mock_response()
-
+            mime = "image/jpeg"
+            lines = 0
+            # Size unknown for files and URLs, count one tile
+            image_tokens = sum(image_token_costs(self.model))
             if isinstance(image_input, Image.Image):
-                image_data = self._encode_pil_image(image_input)
+                image_data, payload = self._encode_pil_image(image_input)
+                mime, lines, image_tokens = payload.mime, payload.lines, payload.tokens
             elif is_url:
                 image_data = image_input
             else:
                 image_data = self._encode_image_file(image_input)
 
-            image_payload = self._prepare_image_payload(image_data)
+            image_payload = self._prepare_image_payload(image_data, mime)
+            if max_tokens is None:
+                max_tokens = estimate_image_output_tokens(lines)
+            await self._admit(priority, image_tokens + max_tokens)
             
+            start = time.perf_counter()
             response = await self.client.chat.completions.create(
-                model="openai/gpt-4o-mini-2024-07-18",
+                model=self.model,
                 messages=[
                     {
                         "role": "system",
@@ -156,6 +237,8 @@ Do not include explanations or original text."""
                 temperature=temperature
             )
             
+            self.vision_stats.request_time += time.perf_counter() - start
+            
             content = response.choices[0].message.content
             return self._clean_response(content)
             
@@ -163,6 +246,58 @@ Do not include explanations or original text."""
             logger.error(f"Error processing chat image: {str(e)}")
             raise 
             
+    async def translate_text(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        max_tokens: Optional[int] = None,
+        temperature: float = 0.3,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> str:
+        """
+        Translate plain text between two languages without streaming.
+        
+        Args:
+            text: Text to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            max_tokens: Maximum tokens for response, estimated from the
+                text when omitted
+            temperature: Temperature for response generation
+            priority: Scheduling class when rate limited
+            
+        Returns:
+            str: Translated text
+        """
+        if max_tokens is None:
+            max_tokens = estimate_output_tokens(text)
+        await self._admit(priority, len(text) / LLM_CHARS_PER_TOKEN + max_tokens)
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            f"Translate the user's text from language code {source_lang} "
+                            f"to language code {target_lang}. Reply with the translation only."
+                        )
+                    },
+                    {
+                        "role": "user",
+                        "content": text
+                    }
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            logger.error(f"Error translating text: {str(e)}")
+            raise
+            
     def update_system_prompt(self, new_prompt: str) -> None:
         """
         Update the system prompt used for chat analysis.
@@ -196,7 +331,8 @@ Do not include explanations or original text."""
 
     def add_mock_response(self, response: str) -> None:
         """
-        Add a new mock response to the pool of possible responses.
+        Add a new mock response to the pool the simulated model picks
+        image replies from in dev mode.
         
         Args:
             response (str): New mock response to add
@@ -206,22 +342,278 @@ Do not include explanations or original text."""
     async def analyze_text_only(
         self,
         text: str,
-        max_tokens: int = 300,
+        max_tokens: Optional[int] = None,
         temperature: float = 0.7,
-        callback = None
+        callback = None,
+        context: Optional[List[str]] = None,
+        stream_key: Optional[Hashable] = None,
+        priority: Priority = Priority.CAPTURE,
+        line_callback = None
     ) -> Optional[str]:
         """
         Test method for analyzing raw text with streaming support.
         
+        Text longer than LLM_CHUNK_LINES lines is split into message-aligned
+        chunks streamed concurrently; the callback still receives the output
+        in input order. Concurrent calls with identical arguments share one
+        API request per chunk; a caller joining late first receives
+        everything streamed so far.
+        
         Args:
             text: Raw text from OCR
-            max_tokens: Maximum tokens for response
+            max_tokens: Maximum tokens per request, estimated from the
+                input when omitted
             temperature: Temperature for response generation
-            callback: Optional callback function to handle streaming chunks
+            callback: Optional coroutine function receiving each streamed
+                text delta (not the accumulated text)
+            context: Earlier chat messages sent for context only, they are
+                not translated
+            stream_key: Streams sharing a key supersede each other: starting
+                a different request cancels the one in progress, unless a
+                caller under another key still follows it
+            priority: Scheduling class when rate limited, the first caller's
+                applies to a shared request
+            line_callback: Optional coroutine function receiving each
+                ChatLine as soon as its line is complete
+            
+        Raises:
+            RequestSuperseded: A newer request with the same stream_key
+                cancelled this one
+        """
+        lines = [line for line in text.split('\n') if line.strip()] or [text]
+        chunks = split_chunks(lines)
+        limiter = asyncio.Semaphore(LLM_CHUNK_CONCURRENCY) if len(chunks) > 1 else None
+        
+        flights = []
+        preceding = list(context or ())
+        keep = max(len(preceding), CONVERSATION_CONTEXT_LINES)
+        for chunk in chunks:
+            chunk_text = '\n'.join(chunk)
+            # Later chunks get the messages just before them as context
+            chunk_context = preceding[-keep:] if len(chunks) > 1 else context
+            budget = max_tokens if max_tokens is not None else estimate_output_tokens(chunk_text)
+            flights.append(self._join_flight(chunk_text, budget, temperature, chunk_context, limiter, priority))
+            preceding.extend(chunk)
+        
+        stream = _Stream(stream_key, flights)
+        if stream_key is not None:
+            self._supersede(stream_key, stream)
+        
+        try:
+            if len(flights) == 1:
+                return await self._follow(flights[0], stream, callback, text, line_callback)
+            return await self._follow_ordered(flights, stream, callback, text, line_callback)
+        finally:
+            stream.release()
+            if stream_key is not None and self._streams.get(stream_key) is stream:
+                del self._streams[stream_key]
+    
+    def _join_flight(
+        self,
+        text: str,
+        max_tokens: int,
+        temperature: float,
+        context: Optional[List[str]],
+        limiter: Optional[asyncio.Semaphore],
+        priority: Priority
+    ) -> "_Flight":
+        """Return the in-flight request for these arguments, starting one if needed"""
+        key = (text, tuple(context or ()), max_tokens, temperature)
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.deduplicated += 1
+            return flight
+        
+        flight = _Flight()
+        flight.task = asyncio.ensure_future(
+            self._run_flight(text, max_tokens, temperature, context, flight, limiter, priority)
+        )
+        self._in_flight[key] = flight
+        flight.task.add_done_callback(lambda _: self._end_flight(key, flight))
+        return flight
+    
+    def cancel_stream(self, stream_key: Hashable):
         """
+        Cancel whatever is streaming under stream_key
+        
+        For a newer request on the same display that needs no LLM call,
+        e.g. because all of its lines are cached.
+        """
+        self._supersede(stream_key, None)
+    
+    def _supersede(self, stream_key: Hashable, stream: Optional["_Stream"]):
+        """
+        Detach the caller previously streaming under stream_key
+        
+        Its requests are cancelled unless a caller under another key, or
+        one without a key, still follows them.
+        """
+        previous = self._streams.pop(stream_key, None)
+        if stream is not None:
+            self._streams[stream_key] = stream
+        if previous is None:
+            return
+        
+        previous.release()
+        kept = stream.flights if stream is not None else ()
+        replaced = [
+            flight for flight in previous.flights
+            if flight not in kept and not flight.task.done()
+        ]
+        if not replaced:
+            return
+        previous.detached.set_result(None)
+        self.superseded += 1
+        for flight in replaced:
+            if not flight.holders:
+                flight.task.cancel()
+    
+    async def _follow(self, flight: "_Flight", stream: "_Stream", callback, text: str, line_callback=None) -> str:
+        """Subscribe to a flight and wait for its result or for the stream to be superseded"""
+        if callback:
+            # Replay what was already streamed before subscribing; callbacks
+            # must not suspend so no delta slips in between
+            if flight.deltas:
+                await callback(''.join(flight.deltas))
+            flight.callbacks.append(callback)
+        if line_callback:
+            for record in list(flight.records):
+                await line_callback(record)
+            flight.line_callbacks.append(line_callback)
+        
+        try:
+            # Waiting doesn't cancel the flight when this caller goes away,
+            # the other callers may still need it
+            await asyncio.wait((flight.task, stream.detached), return_when=asyncio.FIRST_COMPLETED)
+            if stream.detached.done() and not (flight.task.done() and not flight.task.cancelled()):
+                raise RequestSuperseded(text)
+            return flight.task.result()
+        finally:
+            if callback in flight.callbacks:
+                flight.callbacks.remove(callback)
+            if line_callback in flight.line_callbacks:
+                flight.line_callbacks.remove(line_callback)
+    
+    async def _follow_ordered(self, flights: List["_Flight"], stream: "_Stream", callback, text: str, line_callback=None) -> str:
+        """
+        Follow chunk flights at once, passing their output on in order
+        
+        The earliest unfinished chunk streams straight to the callbacks,
+        later ones are buffered until every chunk before them finished.
+        """
+        buffers: List[List[str]] = [[] for _ in flights]
+        line_buffers: List[List[ChatLine]] = [[] for _ in flights]
+        finished = [False] * len(flights)
+        current = 0
+        
+        def chunk_callback(index: int):
+            async def on_delta(delta: str):
+                if index == current:
+                    await callback(delta)
+                else:
+                    buffers[index].append(delta)
+            return on_delta
+        
+        def chunk_line_callback(index: int):
+            async def on_line(record: ChatLine):
+                if index == current:
+                    await line_callback(record)
+                else:
+                    line_buffers[index].append(record)
+            return on_line
+        
+        async def advance():
+            nonlocal current
+            while current < len(flights) and finished[current]:
+                current += 1
+                if current < len(flights):
+                    if callback:
+                        pending = ''.join(buffers[current])
+                        buffers[current].clear()
+                        await callback('\n' + pending)
+                    if line_callback:
+                        records = line_buffers[current][:]
+                        line_buffers[current].clear()
+                        for record in records:
+                            await line_callback(record)
+        
+        async def run(index: int) -> str:
+            result = await self._follow(
+                flights[index],
+                stream,
+                chunk_callback(index) if callback else None,
+                text,
+                chunk_line_callback(index) if line_callback else None
+            )
+            finished[index] = True
+            await advance()
+            return result
+        
+        results = await asyncio.gather(
+            *(run(index) for index in range(len(flights))),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return '\n'.join(results)
+    
+    def _end_flight(self, key: tuple, flight: "_Flight"):
+        """Forget a finished request so later identical calls start fresh"""
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+    
+    async def _run_flight(
+        self,
+        text: str,
+        max_tokens: int,
+        temperature: float,
+        context: Optional[List[str]],
+        flight: "_Flight",
+        limiter: Optional[asyncio.Semaphore],
+        priority: Priority
+    ) -> str:
+        """Stream one request, waiting for a limiter slot first if given"""
+        if limiter is None:
+            return await self._stream_text(text, max_tokens, temperature, context, flight, priority)
+        async with limiter:
+            return await self._stream_text(text, max_tokens, temperature, context, flight, priority)
+    
+    async def _admit(self, priority: Priority, tokens: float):
+        """Wait for the scheduler to admit a request, if one is set"""
+        if self.scheduler is not None:
+            await self.scheduler.acquire(self.provider, priority, tokens)
+    
+    async def _stream_text(
+        self,
+        text: str,
+        max_tokens: int,
+        temperature: float,
+        context: Optional[List[str]],
+        flight: "_Flight",
+        priority: Priority = Priority.CAPTURE
+    ) -> str:
+        """
+        Run one streaming request, fanning deltas and parsed lines out to
+        subscribers
+        
+        Returns the cleaned response text.
+        """
+        if context:
+            text = (
+                LLM_CONTEXT_HEADER
+                + '\n'.join(context)
+                + "\n\n" + LLM_TRANSLATE_HEADER
+                + text
+            )
+        
+        await self._admit(priority, len(text) / LLM_CHARS_PER_TOKEN + max_tokens)
+        parser = StreamParser()
+        first_token_ms = None
+        
         try:
             stream = await self.client.chat.completions.create(
-                model="openai/gpt-4o-mini-2024-07-18",
+                model=self.model,
                 messages=[
                     {
                         "role": "system",
@@ -237,18 +629,78 @@ Do not include explanations or original text."""
                 stream=True
             )
             
-            collected_content = []
             async for chunk in stream:
                 if chunk.choices[0].delta.content is not None:
                     content = chunk.choices[0].delta.content
-                    collected_content.append(content)
+                    flight.deltas.append(content)
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - parser.start) * 1000
                     
-                    if callback:
-                        await callback(''.join(collected_content))
+                    for callback in list(flight.callbacks):
+                        await callback(content)
+                    
+                    await self._publish_lines(flight, parser.feed(content))
             
-            final_content = ''.join(collected_content)
-            return self._clean_response(final_content)
+            await self._publish_lines(flight, parser.close())
+            self.stream_stats.record(
+                first_token_ms,
+                parser,
+                (time.perf_counter() - parser.start) * 1000
+            )
+            return self._clean_response(''.join(flight.deltas))
                 
+        except asyncio.CancelledError:
+            logger.debug("Text stream cancelled")
+            raise
         except Exception as e:
             logger.error(f"Error processing text: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def _publish_lines(self, flight: "_Flight", records: List[ChatLine]):
+        """Hand completed lines to the flight's line subscribers"""
+        for record in records:
+            logger.debug(f"Translated line: {record}")
+            flight.records.append(record)
+            for line_callback in list(flight.line_callbacks):
+                await line_callback(record)
+
+class RequestSuperseded(Exception):
+    """Raised to callers of a stream cancelled by a newer request"""
+
+class _Flight:
+    """One in-flight streaming request shared by identical callers"""
+    __slots__ = ('task', 'deltas', 'callbacks', 'records', 'line_callbacks', 'holders')
+    
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.deltas: List[str] = []
+        self.callbacks: List = []
+        self.records: List[ChatLine] = []
+        self.line_callbacks: List = []
+        # Callers following this flight, counted per stream key
+        self.holders: Dict[Optional[Hashable], int] = {}
+
+class _Stream:
+    """One caller's hold on the flights its request was split into"""
+    __slots__ = ('key', 'flights', 'detached', 'released')
+    
+    def __init__(self, key: Optional[Hashable], flights: List[_Flight]):
+        self.key = key
+        self.flights = flights
+        # Resolved when a newer request under the same key replaces this one
+        self.detached = asyncio.get_running_loop().create_future()
+        self.released = False
+        for flight in flights:
+            flight.holders[key] = flight.holders.get(key, 0) + 1
+    
+    def release(self):
+        """Stop counting as a holder of the flights, once"""
+        if self.released:
+            return
+        self.released = True
+        for flight in self.flights:
+            remaining = flight.holders[self.key] - 1
+            if remaining:
+                flight.holders[self.key] = remaining
+            else:
+                del flight.holders[self.key]
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from src.core.capture import ScreenCapture
+from src.core.ocr import OCRProcessor
+from src.core.scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+class PipelineStats:
+    """Per-stage cost of the capture → OCR → translation pipeline"""
+
+    def __init__(self):
+        self.frames = 0
+        self.dropped = 0
+        self.superseded = 0
+        self.capture_time = 0.0
+        self.ocr_time = 0.0
+        self.translate_time = 0.0
+        self.last_ocr_ms = 0.0
+        self.last_translate_ms = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'superseded': self.superseded,
+            'capture_ms': self.capture_time * 1000,
+            'ocr_ms': self.ocr_time * 1000,
+            'translate_ms': self.translate_time * 1000,
+            'last_ocr_ms': self.last_ocr_ms,
+            'last_translate_ms': self.last_translate_ms
+        }
+
+class TranslationPipeline:
+    """
+    Staged capture → OCR → translation pipeline that keeps the event loop free.
+
+    Capture and OCR run on a small thread pool and are awaited from the loop.
+    Frames submitted for continuous processing pass between stages through
+    one-slot queues where a newer item replaces one not yet picked up, so
+    capture of frame N+1, OCR of frame N and streaming of frame N-1 overlap
+    and stale frames are dropped instead of queueing up. A newer OCR text
+    cancels the translation still streaming for an older one. Submitted
+    frames are translated at background priority, so they yield to
+    captures the user asked for.
+    """
+
+    def __init__(
+        self,
+        capture: ScreenCapture,
+        ocr: OCRProcessor,
+        translate: Callable[[str, Priority], Awaitable[None]],
+        workers: int = 2
+    ):
+        """
+        Args:
+            capture: Screen capture
+            ocr: OCR processor
+            translate: Coroutine function streaming the translation of OCR
+                text at the given priority
+            workers: Threads used for the capture and OCR stages
+        """
+        self.capture = capture
+        self.ocr = ocr
+        self.translate = translate
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='pipeline'
+        )
+        self.stats = PipelineStats()
+        self._frames: Optional[asyncio.Queue] = None
+        self._texts: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def capture_area(self, area: Dict[str, int]) -> np.ndarray:
+        """Capture an area on the pipeline executor"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        frame = await loop.run_in_executor(
+            self.executor, self.capture.capture_area_array, area
+        )
+        self.stats.capture_time += time.perf_counter() - start
+        return frame
+
+    async def extract_text(self, frame: np.ndarray) -> str:
+        """Run OCR on a frame on the pipeline executor"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        text = await loop.run_in_executor(
+            self.executor, self.ocr.process_array, frame
+        )
+        elapsed = time.perf_counter() - start
+        self.stats.ocr_time += elapsed
+        self.stats.last_ocr_ms = elapsed * 1000
+        return text
+
+    async def run_translation(self, text: str, priority: Priority = Priority.CAPTURE):
+        """Stream the translation of OCR text and record its duration"""
+        start = time.perf_counter()
+        try:
+            await self.translate(text, priority)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.translate_time += elapsed
+            self.stats.last_translate_ms = elapsed * 1000
+
+    def start(self):
+        """Start the OCR and translation stages, must be called from the event loop"""
+        if self.running:
+            return
+        self._frames = asyncio.Queue(maxsize=1)
+        self._texts = asyncio.Queue(maxsize=1)
+        self._tasks = [
+            asyncio.ensure_future(self._ocr_stage()),
+            asyncio.ensure_future(self._translate_stage())
+        ]
+
+    def stop(self):
+        """Stop the stages, dropping frames still in flight"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        logger.debug(f"Pipeline stats: {self.stats.as_dict()}")
+
+    def submit(self, frame: np.ndarray):
+        """Queue a captured frame for OCR and translation"""
+        self.start()
+        self.stats.frames += 1
+        self._put_latest(self._frames, frame)
+
+    def shutdown(self):
+        """Stop the stages and release the executor"""
+        self.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _put_latest(self, queue: asyncio.Queue, item):
+        """Put an item, replacing the pending one if the stage is busy"""
+        if queue.full():
+            queue.get_nowait()
+            self.stats.dropped += 1
+        queue.put_nowait(item)
+
+    async def _ocr_stage(self):
+        while True:
+            frame = await self._frames.get()
+            try:
+                text = await self.extract_text(frame)
+            except Exception as e:
+                logger.error(f"Pipeline OCR failed: {e}")
+                continue
+            self._put_latest(self._texts, text)
+
+    async def _translate_stage(self):
+        current: Optional[asyncio.Task] = None
+        try:
+            while True:
+                text = await self._texts.get()
+                # The newer capture replaces what is on screen, so the
+                # older stream is not worth finishing
+                if current is not None and not current.done():
+                    current.cancel()
+                    self.stats.superseded += 1
+                current = asyncio.ensure_future(self._translate_text(text))
+        finally:
+            if current is not None:
+                current.cancel()
+
+    async def _translate_text(self, text: str):
+        try:
+            await self.run_translation(text, Priority.BACKGROUND)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Pipeline translation failed: {e}")
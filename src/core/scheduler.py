@@ -0,0 +1,288 @@
+"""Rate-limited, priority-ordered admission of outbound provider requests"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from enum import IntEnum
+from typing import Callable, Dict, List, Optional, Tuple
+from src.config.constants import RATE_LIMITS, RATE_LIMIT_BURST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Request classes, lower values are served first"""
+    INTERACTIVE = 0
+    CAPTURE = 1
+    BACKGROUND = 2
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously from a clock
+
+    A cost larger than the capacity is admitted once the bucket is full and
+    leaves it in debt, so oversized requests are slowed down but never
+    blocked forever.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until cost can be taken, 0 if it can be now"""
+        self._refill()
+        needed = min(cost, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+    def take(self, cost: float):
+        self._refill()
+        self.level -= cost
+
+class FakeClock:
+    """Manually advanced clock and timer source for deterministic tests"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def call_later(self, delay: float, callback: Callable[[], None]):
+        heapq.heappush(self._timers, (self.now + delay, next(self._sequence), callback))
+
+    def advance(self, seconds: float):
+        """Move time forward, firing the timers that came due in order"""
+        target = self.now + seconds
+        while self._timers and self._timers[0][0] <= target:
+            due, _, callback = heapq.heappop(self._timers)
+            self.now = max(self.now, due)
+            callback()
+        self.now = target
+
+def _thread_call_later(delay: float, callback: Callable[[], None]):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+
+class _Waiter:
+    __slots__ = ('priority', 'tokens', 'enqueued', 'grant', 'cancelled', 'granted')
+
+    def __init__(self, priority: Priority, tokens: float, enqueued: float, grant: Callable[[], None]):
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = enqueued
+        self.grant = grant
+        self.cancelled = False
+        self.granted = False
+
+class _Provider:
+    """Buckets and waiting queue of one provider"""
+
+    def __init__(self, rpm: Optional[float], tpm: Optional[float], burst_seconds: float, clock):
+        self.requests = TokenBucket(rpm, burst_seconds, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds, clock) if tpm else None
+        self.queue: List[Tuple[int, int, _Waiter]] = []
+        self.timer_due: Optional[float] = None
+
+    def wait_time(self, tokens: float) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.wait_time(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    def take(self, tokens: float):
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+class SchedulerStats:
+    """Queue depth and waiting time per priority class"""
+
+    def __init__(self):
+        self.granted = {priority: 0 for priority in Priority}
+        self.waited = {priority: 0.0 for priority in Priority}
+        self.depth = {priority: 0 for priority in Priority}
+        self.max_depth = {priority: 0 for priority in Priority}
+        self.cancelled = 0
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {
+            priority.name.lower(): {
+                'granted': self.granted[priority],
+                'avg_wait_ms': self.waited[priority] * 1000 / (self.granted[priority] or 1),
+                'queue_depth': self.depth[priority],
+                'max_queue_depth': self.max_depth[priority]
+            }
+            for priority in Priority
+        }
+
+class RequestScheduler:
+    """
+    Admits requests to rate-limited providers in priority order.
+
+    Every provider with configured limits gets a requests-per-minute and a
+    tokens-per-minute bucket. Requests wait in a per-provider queue ordered
+    by priority, then arrival; only the head of the queue may take from the
+    buckets, so a burst of captures cannot get ahead of a queued interactive
+    message. Providers without limits are admitted immediately.
+
+    Usable from the event loop (acquire) and from worker threads
+    (acquire_blocking).
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Dict[str, Optional[float]]]] = None,
+        burst_seconds: float = RATE_LIMIT_BURST_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        call_later: Callable[[float, Callable[[], None]], None] = _thread_call_later
+    ):
+        """
+        Args:
+            limits: Per provider {'rpm': ..., 'tpm': ...}, None or missing
+                values are unlimited; defaults to RATE_LIMITS
+            burst_seconds: Seconds of rate a bucket can hold
+            clock: Monotonic time source, e.g. a FakeClock
+            call_later: Timer used to retry when buckets are empty, e.g.
+                FakeClock.call_later
+        """
+        self.clock = clock
+        self.call_later = call_later
+        self._lock = threading.RLock()
+        self._sequence = itertools.count()
+        self._providers: Dict[str, _Provider] = {}
+        for name, limit in (RATE_LIMITS if limits is None else limits).items():
+            self._providers[name] = _Provider(limit.get('rpm'), limit.get('tpm'), burst_seconds, clock)
+        self.stats = SchedulerStats()
+
+    def _enqueue(self, provider: str, priority: Priority, tokens: float, grant: Callable[[], None]) -> Optional[_Waiter]:
+        """Queue a request, None when the provider is not rate limited"""
+        state = self._providers.get(provider)
+        if state is None:
+            with self._lock:
+                self.stats.granted[priority] += 1
+            grant()
+            return None
+        waiter = _Waiter(priority, tokens, self.clock(), grant)
+        with self._lock:
+            heapq.heappush(state.queue, (int(priority), next(self._sequence), waiter))
+            self.stats.depth[priority] += 1
+            self.stats.max_depth[priority] = max(self.stats.max_depth[priority], self.stats.depth[priority])
+            self._dispatch(provider)
+        return waiter
+
+    def _cancel(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.granted or waiter.cancelled:
+                return
+            waiter.cancelled = True
+            self.stats.depth[waiter.priority] -= 1
+            self.stats.cancelled += 1
+
+    def _dispatch(self, provider: str):
+        """Admit queued requests while the buckets allow, then arm a timer"""
+        with self._lock:
+            state = self._providers[provider]
+            while state.queue:
+                waiter = state.queue[0][2]
+                if waiter.cancelled:
+                    heapq.heappop(state.queue)
+                    continue
+                wait = state.wait_time(waiter.tokens)
+                if wait > 0:
+                    due = self.clock() + wait
+                    if state.timer_due is None or due < state.timer_due:
+                        state.timer_due = due
+                        self.call_later(wait, lambda: self._on_timer(provider))
+                    return
+                heapq.heappop(state.queue)
+                state.take(waiter.tokens)
+                waiter.granted = True
+                self.stats.depth[waiter.priority] -= 1
+                self.stats.granted[waiter.priority] += 1
+                self.stats.waited[waiter.priority] += self.clock() - waiter.enqueued
+                waiter.grant()
+
+    def _on_timer(self, provider: str):
+        with self._lock:
+            self._providers[provider].timer_due = None
+            self._dispatch(provider)
+
+    async def acquire(self, provider: str, priority: Priority = Priority.CAPTURE, tokens: float = 1):
+        """
+        Wait on the event loop until a request may be sent
+
+        Args:
+            provider: Rate limit key, e.g. 'openrouter' or 'google'
+            priority: Request class
+            tokens: Estimated tokens the request consumes
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def grant():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(provider, priority, tokens, grant)
+        if waiter is None:
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+
+    def try_acquire(self, provider: str, priority: Priority = Priority.CAPTURE, tokens: float = 1) -> bool:
+        """
+        Take a slot only if one is free right now, never waiting
+
+        Requests already queued for the provider go first, so this fails
+        while any are waiting.
+        """
+        with self._lock:
+            state = self._providers.get(provider)
+            if state is not None:
+                if any(not waiter.cancelled for _, _, waiter in state.queue):
+                    return False
+                if state.wait_time(tokens) > 0:
+                    return False
+                state.take(tokens)
+            self.stats.granted[priority] += 1
+            return True
+
+    def acquire_blocking(
+        self,
+        provider: str,
+        priority: Priority = Priority.CAPTURE,
+        tokens: float = 1,
+        timeout: Optional[float] = None
+    ):
+        """
+        Block the calling thread until a request may be sent
+
+        Raises:
+            TimeoutError: Not admitted within timeout seconds
+        """
+        event = threading.Event()
+        waiter = self._enqueue(provider, priority, tokens, event.set)
+        if waiter is None:
+            return
+        if not event.wait(timeout):
+            self._cancel(waiter)
+            if not waiter.granted:
+                raise TimeoutError(f"{provider} rate limit wait exceeded {timeout} s")
@@ -1,21 +1,48 @@
-from deep_translator import GoogleTranslator
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from typing import Dict, List, Optional, Tuple
 import logging
+from src.config.constants import (
+    TRANSLATION_BATCH_MAX_CHARS,
+    TRANSLATION_BATCH_CONCURRENCY
+)
+from src.core.backends import BackendRouter, create_backend
+from src.core.cache import TranslationCache
+from src.core.scheduler import Priority
 
 logger = logging.getLogger(__name__)
 
 class TranslationService:
-    def __init__(self):
-        """Initialize the translation service"""
-        self._translators = {}
+    def __init__(
+        self,
+        cache: Optional[TranslationCache] = None,
+        router: Optional[BackendRouter] = None
+    ):
+        """
+        Initialize the translation service
+        
+        Args:
+            cache: Optional cache consulted before calling the backend
+            router: Backend router, defaults to Google only
+        """
+        self.cache = cache
+        self.router = router or BackendRouter([create_backend('google')])
+        self.requests = 0
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='translate')
 
-    def translate(self, text: str, target_lang: str) -> Dict[str, str]:
+    def translate(
+        self,
+        text: str,
+        target_lang: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, str]:
         """
         Translate text from English to target language
         
         Args:
             text: English text to translate
             target_lang: Target language code
+            priority: Scheduling class when the backend is rate limited
             
         Returns:
             Dictionary with original text and translation
@@ -27,8 +54,7 @@ class TranslationService:
             }
         
         try:
-            translator = self._get_translator('en', target_lang)
-            translation = translator.translate(text)
+            translation = self._cached_translate(text, 'en', target_lang, priority)
             
             return {
                 'text': text,
@@ -39,12 +65,206 @@ class TranslationService:
             logger.error(f"Translation failed: {e}")
             raise
     
-    def _get_translator(self, source_lang: str, target_lang: str) -> GoogleTranslator:
-        """Get or create translator for language pair"""
-        key = f"{source_lang}-{target_lang}"
-        if key not in self._translators:
-            self._translators[key] = GoogleTranslator(
-                source=source_lang,
-                target=target_lang
+    async def translate_async(
+        self,
+        text: str,
+        target_lang: str,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict[str, str]:
+        """
+        Translate text from English to target language off the event loop
+        
+        Cancelling the awaiting task abandons the result; the backend call
+        already in flight finishes on the worker thread.
+        
+        Args:
+            text: English text to translate
+            target_lang: Target language code
+            priority: Scheduling class when the backend is rate limited
+            
+        Returns:
+            Dictionary with original text and translation
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.translate, text, target_lang, priority)
+    
+    def _cached_translate(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        priority: Priority
+    ) -> str:
+        """Translate through the cache when one is configured"""
+        if self.cache is not None:
+            cached = self.cache.get(source_lang, target_lang, text)
+            if cached is not None:
+                return cached
+        
+        translation = self._request(text, source_lang, target_lang, priority)
+        
+        if self.cache is not None and translation:
+            self.cache.put(source_lang, target_lang, text, translation)
+        return translation
+    
+    def translate_batch(
+        self,
+        texts: List[str],
+        target_lang: str,
+        source_lang: str = 'en',
+        max_chars: int = TRANSLATION_BATCH_MAX_CHARS,
+        max_concurrency: int = TRANSLATION_BATCH_CONCURRENCY,
+        priority: Priority = Priority.CAPTURE
+    ) -> List[str]:
+        """
+        Translate many short lines with as few backend calls as possible
+        
+        Lines missing from the cache are packed into newline-joined requests
+        of up to max_chars characters, which run concurrently. A line longer
+        than max_chars is split at sentence or word boundaries and its
+        translated pieces joined again.
+        
+        Args:
+            texts: Lines to translate
+            target_lang: Target language code
+            source_lang: Source language code
+            max_chars: Size limit of a single backend request
+            max_concurrency: Maximum requests in flight at once
+            priority: Scheduling class when the backend is rate limited
+            
+        Returns:
+            Translations in the same order as texts
+        """
+        # Newlines are the delimiter, so each line must be a single line
+        lines = [' '.join(text.split()) for text in texts]
+        results: List[Optional[str]] = [None if line else '' for line in lines]
+        
+        cached: Dict[str, Optional[str]] = {}
+        if self.cache is not None:
+            unique = list(dict.fromkeys(line for line in lines if line))
+            cached = dict(zip(unique, self.cache.get_many(source_lang, target_lang, unique)))
+        pending: Dict[str, List[int]] = {}
+        for index, line in enumerate(lines):
+            if not line:
+                continue
+            if cached.get(line) is not None:
+                results[index] = cached[line]
+                continue
+            pending.setdefault(line, []).append(index)
+        
+        # Pieces of every pending line, spans map a line to its pieces
+        segments: List[str] = []
+        spans: Dict[str, Tuple[int, int]] = {}
+        for line in pending:
+            start = len(segments)
+            segments.extend(self._split_line(line, max_chars))
+            spans[line] = (start, len(segments))
+        
+        packs = self._pack(segments, max_chars)
+        translated_packs = []
+        if len(packs) == 1:
+            translated_packs = [self._translate_pack(packs[0], source_lang, target_lang, priority)]
+        elif packs:
+            workers = min(max_concurrency, len(packs))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                translated_packs = list(executor.map(
+                    lambda pack: self._translate_pack(pack, source_lang, target_lang, priority),
+                    packs
+                ))
+        
+        # Packs keep segment order, so the flattened results line up
+        translated = [translation for translations in translated_packs for translation in translations]
+        fresh = []
+        for line, (start, end) in spans.items():
+            translation = ' '.join(translated[start:end])
+            for index in pending[line]:
+                results[index] = translation
+            if translation:
+                fresh.append((line, translation))
+        if self.cache is not None and fresh:
+            self.cache.put_many(source_lang, target_lang, fresh)
+        
+        logger.debug(
+            f"Batch translated {len(texts)} lines with {len(packs)} requests"
+        )
+        return results
+    
+    async def translate_batch_async(
+        self,
+        texts: List[str],
+        target_lang: str,
+        source_lang: str = 'en',
+        priority: Priority = Priority.CAPTURE
+    ) -> List[str]:
+        """translate_batch off the event loop, see translate_async"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            lambda: self.translate_batch(texts, target_lang, source_lang, priority=priority)
+        )
+    
+    @staticmethod
+    def _split_line(line: str, max_chars: int) -> List[str]:
+        """Split a line longer than max_chars at sentence or word boundaries"""
+        pieces = []
+        while len(line) > max_chars:
+            window = line[:max_chars + 1]
+            cut = max(window.rfind(mark) + 1 for mark in ('. ', '! ', '? '))
+            if cut <= 0:
+                cut = window.rfind(' ')
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(line[:cut].strip())
+            line = line[cut:].strip()
+        pieces.append(line)
+        return pieces
+    
+    @staticmethod
+    def _pack(lines: List[str], max_chars: int) -> List[List[str]]:
+        """Group lines into packs whose joined length fits max_chars"""
+        packs = []
+        current = []
+        size = 0
+        for line in lines:
+            added = len(line) + (1 if current else 0)
+            if current and size + added > max_chars:
+                packs.append(current)
+                current = []
+                size = 0
+                added = len(line)
+            current.append(line)
+            size += added
+        if current:
+            packs.append(current)
+        return packs
+    
+    def _translate_pack(
+        self,
+        pack: List[str],
+        source_lang: str,
+        target_lang: str,
+        priority: Priority
+    ) -> List[str]:
+        """Translate a pack in one request, per line if it does not unpack cleanly"""
+        if len(pack) > 1:
+            translated = self._request('\n'.join(pack), source_lang, target_lang, priority)
+            parts = [part.strip() for part in translated.split('\n') if part.strip()]
+            if len(parts) == len(pack):
+                return parts
+            logger.debug(
+                f"Pack of {len(pack)} lines came back as {len(parts)}, retrying per line"
             )
-        return self._translators[key]
\ No newline at end of file
+        return [self._request(line, source_lang, target_lang, priority) for line in pack]
+    
+    def _request(self, text: str, source_lang: str, target_lang: str, priority: Priority) -> str:
+        """Single routed backend round trip"""
+        self.requests += 1
+        return self.router.translate(text, source_lang, target_lang, priority)
+    
+    def close(self):
+        """Release worker threads and cache resources"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.router.close()
+        logger.debug(f"Translation router stats: {self.router.stats()}")
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Union
+import cv2
+import numpy as np
+from PIL import Image
+from src.config.constants import (
+    WATCH_INTERVAL,
+    WATCH_THUMBNAIL_WIDTH,
+    WATCH_PIXEL_THRESHOLD,
+    WATCH_CHANGE_RATIO
+)
+from src.core.pipeline import TranslationPipeline
+from src.utils.image_processing import to_grayscale
+
+logger = logging.getLogger(__name__)
+
+class FrameChangeDetector:
+    """
+    Cheap frame difference check used to skip OCR/LLM work on unchanged frames.
+
+    Each frame is reduced to a small grayscale thumbnail (area averaged, so a
+    single changed line of text still moves the affected thumbnail pixels) and
+    compared with the thumbnail of the last frame that was reported as changed.
+    """
+
+    def __init__(
+        self,
+        thumbnail_width: int = WATCH_THUMBNAIL_WIDTH,
+        pixel_threshold: int = WATCH_PIXEL_THRESHOLD,
+        change_ratio: float = WATCH_CHANGE_RATIO
+    ):
+        self.thumbnail_width = thumbnail_width
+        self.pixel_threshold = pixel_threshold
+        self.change_ratio = change_ratio
+        self._reference: Optional[np.ndarray] = None
+
+    def reset(self):
+        """Forget the reference frame so the next frame counts as changed"""
+        self._reference = None
+
+    def _thumbnail(self, image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+        """Reduce a frame to a small grayscale thumbnail"""
+        if isinstance(image, Image.Image):
+            image = np.asarray(image.convert('L'))
+
+        height, width = image.shape[:2]
+        if width > self.thumbnail_width:
+            # Shrink before the color conversion so it runs on few pixels
+            scale = self.thumbnail_width / width
+            size = (self.thumbnail_width, max(1, int(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return to_grayscale(image)
+
+    def has_changed(self, image: Union[Image.Image, np.ndarray]) -> bool:
+        """
+        Check whether a frame differs from the last changed frame
+
+        Args:
+            image: Captured BGRA frame or PIL Image
+
+        Returns:
+            True if the frame should be processed
+        """
+        thumbnail = self._thumbnail(image)
+        reference = self._reference
+
+        if reference is None or reference.shape != thumbnail.shape:
+            self._reference = thumbnail
+            return True
+
+        delta = cv2.absdiff(thumbnail, reference)
+        changed = np.count_nonzero(delta > self.pixel_threshold)
+        if changed > self.change_ratio * delta.size:
+            self._reference = thumbnail
+            return True
+        return False
+
+class WatchStats:
+    """Counters describing watch mode cost, used to tune the interval"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.skipped = 0
+        self.check_time = 0.0
+        self.last_check_ms = 0.0
+        self.last_tick_ms = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.ticks - self.skipped
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.ticks if self.ticks else 0.0
+
+    @property
+    def avg_check_ms(self) -> float:
+        return self.check_time * 1000 / self.ticks if self.ticks else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'processed': self.processed,
+            'skip_ratio': self.skip_ratio,
+            'avg_check_ms': self.avg_check_ms,
+            'last_check_ms': self.last_check_ms,
+            'last_tick_ms': self.last_tick_ms
+        }
+
+class AreaWatcher:
+    """
+    Re-captures a screen area on an interval and submits changed frames to
+    the translation pipeline
+    """
+
+    def __init__(
+        self,
+        pipeline: TranslationPipeline,
+        interval: float = WATCH_INTERVAL,
+        detector: Optional[FrameChangeDetector] = None
+    ):
+        """
+        Args:
+            pipeline: Pipeline capturing frames and processing changed ones
+            interval: Seconds between ticks
+            detector: Change detector, a default one is created if omitted
+        """
+        self.pipeline = pipeline
+        self.interval = interval
+        self.detector = detector or FrameChangeDetector()
+        self.stats = WatchStats()
+        self.area: Optional[Dict[str, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, area: Dict[str, int]):
+        """Start watching an area, must be called from the event loop"""
+        self.stop()
+        self.area = area
+        self.stats = WatchStats()
+        self.detector.reset()
+        self._task = asyncio.ensure_future(self._run())
+        logger.info(f"Watching area {area} every {self.interval:.2f}s")
+
+    def stop(self):
+        """Stop watching"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.pipeline.stop()
+            logger.info(f"Watch stopped: {self.stats.as_dict()}")
+
+    async def tick(self) -> bool:
+        """
+        Run a single capture and change check
+
+        Changed frames are handed to the pipeline without waiting for OCR
+        or translation, so the next capture overlaps their processing.
+
+        Returns:
+            True if the frame changed and was submitted
+        """
+        start = time.perf_counter()
+        frame = await self.pipeline.capture_area(self.area)
+        changed = self.detector.has_changed(frame)
+        check_time = time.perf_counter() - start
+
+        self.stats.ticks += 1
+        self.stats.check_time += check_time
+        self.stats.last_check_ms = check_time * 1000
+
+        if changed:
+            self.pipeline.submit(frame)
+        else:
+            self.stats.skipped += 1
+
+        self.stats.last_tick_ms = (time.perf_counter() - start) * 1000
+        return changed
+
+    async def _run(self):
+        """Watch loop"""
+        while True:
+            started = time.perf_counter()
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Watch tick failed: {e}")
+
+            if self.stats.ticks % 50 == 0:
+                logger.debug(f"Watch stats: {self.stats.as_dict()}")
+
+            elapsed = time.perf_counter() - started
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
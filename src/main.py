@@ -1,10 +1,15 @@
 from src.core.capture import ScreenCapture
 from src.core.ocr import OCRProcessor
 from src.core.translator import TranslationService
+from src.core.cache import TranslationCache
+from src.core.backends import BackendRouter, create_backend
+from src.core.connections import ConnectionPool
+from src.core.scheduler import RequestScheduler
 from src.core.openai import OpenAIChatAnalyzer
 from src.ui.components.overlay import TranslationOverlay
 from src.utils.hotkeys import HotkeyManager
 from src.config.settings import Settings
+from src.config.constants import OPENROUTER_BASE_URL, BACKEND_WARM_URLS
 from src.utils.logger import setup_logger
 
 OPEN_ROUTER_API_KEY=""
@@ -16,13 +21,48 @@ def main():
     try:
         settings = Settings()
         capture = ScreenCapture()
-        ocr = OCRProcessor(settings.tesseract_path)
-        translator = TranslationService()
-        analyzer = OpenAIChatAnalyzer(OPEN_ROUTER_API_KEY, dev_mode=False)
+        ocr = OCRProcessor(
+            settings.tesseract_path,
+            settings.ocr_backend,
+            workers=settings.ocr_workers,
+            preprocess_stages=settings.preprocess_stages
+        )
+        connections = ConnectionPool()
+        connections.install_deep_translator()
+        connections.add_async_url(OPENROUTER_BASE_URL)
+        backend_options = settings.backend_options
+        for name in settings.translation_backends:
+            url = backend_options.get(name, {}).get('base_url') or BACKEND_WARM_URLS.get(name)
+            if url:
+                connections.add_sync_url(url)
+        analyzer = OpenAIChatAnalyzer(
+            OPEN_ROUTER_API_KEY,
+            dev_mode=False,
+            http_client=connections.async_client
+        )
+        # One scheduler for every rate-limited provider, see RATE_LIMITS
+        scheduler = RequestScheduler()
+        analyzer.scheduler = scheduler
+        app = None
         
-        app = TranslationOverlay(capture, ocr, translator, analyzer, settings)
+        def app_loop():
+            # The analyzer's client lives on the overlay's event loop,
+            # which starts with the overlay below
+            return app.async_helper.loop if app is not None else None
+        
+        backends = [
+            create_backend(name, analyzer=analyzer, get_loop=app_loop) if name == 'llm'
+            else create_backend(name, **backend_options.get(name, {}))
+            for name in settings.translation_backends
+        ]
+        translator = TranslationService(
+            TranslationCache(),
+            BackendRouter(backends, scheduler=scheduler)
+        )
+        
+        app = TranslationOverlay(capture, ocr, translator, analyzer, settings, connections)
         app.toggle_overlay()
-        hotkey_manager = HotkeyManager(app)
+        hotkey_manager = HotkeyManager(app, settings.hotkeys)
         hotkey_manager.start()
         
         app.mainloop()
@@ -1,47 +1,67 @@
 import tkinter as tk
 from tkinter import ttk
 import logging
-import queue
 import asyncio
-from src.config.constants import AVAILABLE_LANGUAGES
+import threading
+import concurrent.futures
+from typing import Optional
+from src.config.constants import (
+    AVAILABLE_LANGUAGES,
+    TRANSLATE_AS_YOU_TYPE_DELAY,
+    HTTP_KEEPALIVE_INTERVAL
+)
 from src.ui.styles.theme import OVERLAY_THEME, FONTS, COLORS
 from src.core.capture import ScreenCapture
 from src.core.ocr import OCRProcessor
-from src.core.openai import OpenAIChatAnalyzer
+from src.core.openai import OpenAIChatAnalyzer, RequestSuperseded
+from src.core.conversation import IncrementalTranslator
+from src.core.connections import ConnectionPool
+from src.core.scheduler import Priority
 from src.core.translator import TranslationService
+from src.core.pipeline import TranslationPipeline
+from src.core.watcher import AreaWatcher
 from src.config.settings import Settings
 from src.ui.components.area_selector import AreaSelector
+from src.ui.components.streaming_text import StreamingText
+from src.ui.dispatcher import UIDispatcher
 
 logger = logging.getLogger(__name__)
 
 class AsyncTkHelper:
-    """Helper class to run async tasks in Tkinter"""
+    """Runs the asyncio event loop in its own thread next to Tkinter"""
     def __init__(self, root: tk.Tk):
         self.root = root
-        self.loop = None
-        self._setup_async_loop()
-
-    def _setup_async_loop(self):
-        """Set up the async event loop"""
-        try:
-            self.loop = asyncio.get_event_loop()
-        except RuntimeError:
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
+        self.dispatcher = UIDispatcher(root)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self._run_loop,
+            name='asyncio-loop',
+            daemon=True
+        )
+        self.thread.start()
 
-    async def run_async(self, coro):
-        """Run an async coroutine and return its result"""
-        return await coro
+    def _run_loop(self):
+        """Run the event loop until stop is called"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
 
-    def run_coroutine(self, coro):
+    def run_coroutine(self, coro) -> concurrent.futures.Future:
         """Schedule a coroutine to run in the event loop"""
-        asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
-    def process_async(self):
-        """Process async events"""
-        self.loop.call_soon(self.loop.stop)
-        self.loop.run_forever()
-        self.root.after(50, self.process_async)
+    def call_soon(self, callback, *args):
+        """Run a plain callback on the event loop thread"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_ui(self, callback, *args, key=None):
+        """Run a callback on the Tk main thread, see UIDispatcher.post"""
+        self.dispatcher.post(callback, *args, key=key)
+
+    def stop(self):
+        """Stop the event loop and wait for its thread"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1.0)
+        logger.debug(f"UI dispatch stats: {self.dispatcher.stats.as_dict()}")
 
 class TranslationOverlay(tk.Tk):
     def __init__(
@@ -50,7 +70,8 @@ class TranslationOverlay(tk.Tk):
         ocr: OCRProcessor,
         translator: TranslationService,
         chat_analyzer: OpenAIChatAnalyzer,
-        settings: Settings
+        settings: Settings,
+        connections: Optional[ConnectionPool] = None
     ):
         super().__init__()
         
@@ -61,17 +82,33 @@ class TranslationOverlay(tk.Tk):
         self.chat_analyzer = chat_analyzer
         self.translator = translator
         self.settings = settings
-        
-        self.command_queue = queue.Queue()
-        self.result_queue = queue.Queue()
+        self.connections = connections
+        self._keep_alive_id = None
+        self.conversation = IncrementalTranslator(chat_analyzer, translator.cache)
+        
+        self._input_request = None
+        self._input_generation = 0
+        self._last_input = None
+        self._debounce_id = None
+        
+        self.last_area = None
+        self._watch_on_select = False
+        self.pipeline = TranslationPipeline(capture, ocr, self._stream_translation)
+        self.watcher = AreaWatcher(
+            self.pipeline,
+            interval=settings.watch_interval
+        )
         
         self.setup_window()
         
         self.setup_ui()
         
-        self.check_command_queue()
-        
-        self.async_helper.process_async()
+        if self.connections is not None:
+            self.async_helper.run_coroutine(self.connections.warm_up())
+            self._keep_alive_id = self.after(
+                int(HTTP_KEEPALIVE_INTERVAL * 1000),
+                self._keep_alive
+            )
         
     def setup_window(self):
         """Configure main window properties"""
@@ -140,7 +177,8 @@ class TranslationOverlay(tk.Tk):
         """Setup instructions label"""
         instructions_text = (
             "Press Ctrl+Alt+X to select area and translate\n"
-            "Ctrl+Alt+C to toggle overlay"
+            "Ctrl+Alt+C to toggle overlay\n"
+            "Ctrl+Alt+W to watch the last area"
         )
         
         label_config = OVERLAY_THEME['label'].copy()
@@ -186,16 +224,17 @@ class TranslationOverlay(tk.Tk):
         )
         padding_frame.pack(fill='x', padx=10, pady=10)
         
-        self.translation_text = tk.Label(
+        self.translation_text = StreamingText(
             padding_frame,
-            text="No translation yet",
-            wraplength=300,
-            justify='left',
+            self.async_helper.dispatcher,
+            width=40,
             bg=COLORS['secondary'],
             fg=COLORS['text'],
             font=FONTS['main']
         )
+        self.translation_text.tag_configure('draft', foreground=COLORS['text_secondary'])
         self.translation_text.pack(fill='x')
+        self.translation_text.set_text("No translation yet")
         
         self.loading_label = tk.Label(
             padding_frame,
@@ -227,6 +266,7 @@ class TranslationOverlay(tk.Tk):
         self.input_field.pack(fill='x', pady=(5, 10))
         self.input_field.focus_set()
         self.input_field.bind('<Return>', lambda event: self.translate_input())
+        self.input_field.bind('<KeyRelease>', self._on_input_key)
         
         self.setup_translation_target()
     
@@ -349,23 +389,24 @@ class TranslationOverlay(tk.Tk):
     def set_input_focus(self):
         """Set focus to the input field"""
         self.input_field.focus_force()
-    def check_command_queue(self):
-        """Process commands from queue"""
-        try:
-            while True:
-                command = self.command_queue.get_nowait()
-                if command == 'select_area':
-                    self.start_area_selection()
-                elif command == 'toggle_overlay':
-                    self.toggle_overlay()
-                elif command == 'clear_fields':
-                    self.clear_fields()
-                elif command == 'copy_translation':
-                    self.copy_translation()
-        except queue.Empty:
-            pass
-        finally:
-            self.after(100, self.check_command_queue)
+    def dispatch_command(self, command: str):
+        """Run a command on the Tk main thread, safe to call from any thread"""
+        self.async_helper.call_ui(self.run_command, command)
+    
+    def run_command(self, command: str):
+        """Run a named overlay command"""
+        commands = {
+            'select_area': self.start_area_selection,
+            'toggle_overlay': self.toggle_overlay,
+            'clear_fields': self.clear_fields,
+            'copy_translation': self.copy_translation,
+            'toggle_watch': self.toggle_watch
+        }
+        handler = commands.get(command)
+        if handler is None:
+            logger.warning(f"Unknown command: {command}")
+            return
+        handler()
     
     def start_area_selection(self):
         """Start area selection process"""
@@ -375,42 +416,119 @@ class TranslationOverlay(tk.Tk):
     async def handle_area_selection(self, area):
         """Handle selected area with streaming support"""
         if area:
+            self.last_area = area
+            if self.watcher.running or self._watch_on_select:
+                self._watch_on_select = False
+                self.watcher.start(area)
+                return
             try:
-                self.deiconify()
-                self.after(0, lambda: self.translation_text.config(text=""))
-                self.after(0, lambda: self.loading_label.config(text="Translating..."))
-                
-                chat_image = self.capture.capture_area(area)
-                text = self.ocr.process_image(chat_image)
-                
-                await self.chat_analyzer.analyze_text_only(
-                    text,
-                    callback=self.update_streaming_translation
-                )
-                
-                self.after(0, lambda: self.loading_label.config(text=""))
+                self.async_helper.call_ui(self.deiconify)
+                # Feedback while OCR runs, _stream_translation resets the
+                # box once the text is ready
+                self.async_helper.call_ui(self.loading_label.config, {'text': "Translating..."})
                 
+                frame = await self.pipeline.capture_area(area)
+                text = await self.pipeline.extract_text(frame)
+                await self.pipeline.run_translation(text)
             except Exception as e:
                 logger.error(f"Translation failed: {e}")
-                self.after(0, lambda: self._update_translation(f"Error: {str(e)}"))
-                self.after(0, lambda: self.loading_label.config(text=""))
+                self.async_helper.call_ui(self._update_translation, f"Error: {str(e)}")
+                self.async_helper.call_ui(self.loading_label.config, {'text': ""})
+    
+    async def _stream_translation(self, text: str, priority: Priority = Priority.CAPTURE):
+        """
+        Stream the translation of OCR text into the overlay
+        
+        Watch ticks come in at background priority, so they yield to
+        manual captures and typed messages even while watching.
+        """
+        self._begin_translation()
+        draft = None
+        if self.settings.draft_translation:
+            draft = lambda messages: self._draft_translation(messages, priority)
+        
+        try:
+            # Every capture streams into the same text box, so a newer one
+            # cancels whatever is still streaming there
+            await self.conversation.translate_lines(
+                text,
+                on_line=self.update_translation_line,
+                stream_key='translation_text',
+                draft=draft,
+                priority=priority
+            )
+        except RequestSuperseded:
+            logger.debug("Translation superseded by a newer capture")
+        finally:
+            self.async_helper.call_ui(
+                lambda: self.loading_label.config(text=self._watch_status())
+            )
+    
+    def _begin_translation(self):
+        """Clear the previous translation and show the loading label"""
+        self.translation_text.reset()
+        self.async_helper.call_ui(self.loading_label.config, {'text': "Translating..."})
+    
+    def _watch_status(self) -> str:
+        """Short watch mode summary for the loading label"""
+        if not self.watcher.running:
+            return ""
+        stats = self.watcher.stats
+        return (
+            f"Watching ({stats.skip_ratio:.0%} skipped, "
+            f"{stats.avg_check_ms:.1f} ms/check)"
+        )
+    
+    def toggle_watch(self):
+        """Toggle continuous translation of the last selected area"""
+        if self.watcher.running:
+            self.async_helper.call_soon(self.watcher.stop)
+            self.loading_label.config(text="")
+        elif self.last_area:
+            self.async_helper.call_soon(self.watcher.start, self.last_area)
+            self.loading_label.config(text="Watching...")
+        else:
+            self._watch_on_select = True
+            self.start_area_selection()
     
     def _update_translation(self, result: str):
         """Update translation UI in the main thread"""
-        self.translation_text.config(text=result)
+        self.translation_text.set_text(result)
         self.deiconify()
     
-    async def update_streaming_translation(self, text: str):
-        """Update the translation text with streaming content"""
-        self.after(0, lambda: self.translation_text.config(text=text))
+    async def _draft_translation(self, messages, priority: Priority):
+        """Machine-translate chat messages for display until the LLM answers"""
+        return await self.translator.translate_batch_async(
+            messages,
+            'en',
+            source_lang='pt',
+            priority=priority
+        )
+    
+    async def update_translation_line(self, index: int, line: str, final: bool):
+        """Show one translated line, drafts greyed out until replaced"""
+        self.translation_text.set_line(index, line, None if final else 'draft')
 
     def toggle_overlay(self):
         """Toggle overlay visibility"""
         if self.state() == 'withdrawn':
             self.ensure_window_visibility()
+            # Connections may have idled out while hidden, reopen them
+            # before the user's first request
+            if self.connections is not None:
+                self.async_helper.run_coroutine(self.connections.ping())
         else:
             self.withdraw()
     
+    def _keep_alive(self):
+        """Ping the translation hosts periodically while the overlay is shown"""
+        if self.state() != 'withdrawn':
+            self.async_helper.run_coroutine(self.connections.ping())
+        self._keep_alive_id = self.after(
+            int(HTTP_KEEPALIVE_INTERVAL * 1000),
+            self._keep_alive
+        )
+    
     def clear_fields(self):
         """Clear all input fields"""
         self.input_field.delete(0, tk.END)
@@ -419,27 +537,80 @@ class TranslationOverlay(tk.Tk):
         self.result_field.config(state='readonly')
     
     def translate_input(self):
-        """Translate input text"""
+        """Translate input text without blocking the UI, latest request wins"""
         text = self.input_field.get().strip()
         if text:
-            try:
-                target = AVAILABLE_LANGUAGES[self.target_lang.get()]
-                result = self.translator.translate(text, target)
-                
-                self.result_field.config(state='normal')
-                self.result_field.delete(0, tk.END)
-                self.result_field.insert(0, result['translation'])
-                self.result_field.config(state='readonly')
-                self.set_input_focus()
-            except Exception as e:
-                logger.error(f"Translation failed: {e}")
-                self.result_field.config(state='normal')
-                self.result_field.delete(0, tk.END)
-                self.result_field.insert(0, f"Error: {str(e)}")
-                self.result_field.config(state='readonly')
-                self.set_input_focus()
+            target = AVAILABLE_LANGUAGES[self.target_lang.get()]
+            self._cancel_debounce()
+            if self._input_request is not None:
+                self._input_request.cancel()
+            
+            self._input_generation += 1
+            self._last_input = (text, target)
+            self._input_request = self.async_helper.run_coroutine(
+                self._translate_input_async(text, target, self._input_generation)
+            )
+    
+    async def _translate_input_async(self, text: str, target: str, generation: int):
+        """Run the translation off the UI thread and post the result"""
+        try:
+            result = await self.translator.translate_async(text, target)
+            self.async_helper.call_ui(self._show_input_result, result['translation'], generation)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Translation failed: {e}")
+            self.async_helper.call_ui(self._show_input_result, f"Error: {str(e)}", generation)
+    
+    def _show_input_result(self, translation: str, generation: int):
+        """Show a translation result unless a newer request superseded it"""
+        if generation != self._input_generation:
+            return
+        self._input_request = None
+        self.result_field.config(state='normal')
+        self.result_field.delete(0, tk.END)
+        self.result_field.insert(0, translation)
+        self.result_field.config(state='readonly')
+        self.set_input_focus()
+    
+    def _on_input_key(self, event):
+        """Debounce translate-as-you-type"""
+        if not self.settings.translate_as_you_type:
+            return
+        self._cancel_debounce()
+        self._debounce_id = self.after(TRANSLATE_AS_YOU_TYPE_DELAY, self._translate_if_changed)
+    
+    def _translate_if_changed(self):
+        """Translate typed text unless it was already translated"""
+        self._debounce_id = None
+        text = self.input_field.get().strip()
+        target = AVAILABLE_LANGUAGES[self.target_lang.get()]
+        if (text, target) != self._last_input:
+            self.translate_input()
+    
+    def _cancel_debounce(self):
+        if self._debounce_id is not None:
+            self.after_cancel(self._debounce_id)
+            self._debounce_id = None
     
     def quit_app(self):
         """Exit application"""
+        self.async_helper.call_soon(self.watcher.stop)
+        self.async_helper.call_soon(self.pipeline.shutdown)
+        logger.debug(f"LLM stream stats: {self.chat_analyzer.stream_stats.as_dict()}")
+        if self.chat_analyzer.scheduler is not None:
+            logger.debug(f"Scheduler stats: {self.chat_analyzer.scheduler.stats.as_dict()}")
+        if self.connections is not None:
+            if self._keep_alive_id is not None:
+                self.after_cancel(self._keep_alive_id)
+            logger.debug(f"Connection stats: {self.connections.stats()}")
+            try:
+                self.async_helper.run_coroutine(self.connections.aclose()).result(timeout=1.0)
+            except Exception as e:
+                logger.debug(f"Closing HTTP client failed: {e}")
+            self.connections.close()
+        self.async_helper.stop()
         self.capture.cleanup()
+        self.ocr.close()
+        self.translator.close()
         self.quit()
\ No newline at end of file
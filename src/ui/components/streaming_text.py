@@ -0,0 +1,165 @@
+import tkinter as tk
+import threading
+import time
+import logging
+from typing import Optional
+from src.ui.dispatcher import UIDispatcher
+
+logger = logging.getLogger(__name__)
+
+class StreamingText(tk.Text):
+    """
+    Read-only text widget that renders streamed lines incrementally.
+
+    Lines can be set from any thread. Changes are buffered and flushed to
+    the widget at most max_fps times per second, each flush replacing only
+    the lines that changed instead of relaying out the whole text. The
+    height follows the displayed line count, measured once per change
+    after Tk has laid the text out.
+    """
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        dispatcher: UIDispatcher,
+        max_fps: int = 60,
+        max_height: int = 20,
+        **kwargs
+    ):
+        """
+        Args:
+            parent: Parent widget
+            dispatcher: Dispatcher used to reach the Tk main thread
+            max_fps: Maximum number of flushes per second
+            max_height: Height limit in lines when growing with content
+            **kwargs: Options passed to tk.Text
+        """
+        kwargs.setdefault('height', 1)
+        kwargs.setdefault('wrap', 'word')
+        kwargs.setdefault('borderwidth', 0)
+        kwargs.setdefault('highlightthickness', 0)
+        super().__init__(parent, **kwargs)
+        self.config(state='disabled')
+
+        self.dispatcher = dispatcher
+        self.frame_interval = 1.0 / max_fps
+        self.max_height = max_height
+        self._lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._lines = {}
+        self._clear_pending = False
+        self._flush_pending = False
+        self._last_flush = 0.0
+        self._fit_pending = False
+        self._fit_width = None
+        self.flushes = 0
+        self.fits = 0
+        # Rewrapping changes the display line count
+        self.bind('<Configure>', self._on_configure, add='+')
+
+    def set_line(self, index: int, text: str, tag: Optional[str] = None):
+        """
+        Replace one line in place, safe to call from any thread
+
+        Missing lines up to index are added empty. Applied after any
+        pending set_text, the latest text per line wins.
+
+        Args:
+            index: Zero-based line number
+            text: New line content without newline
+            tag: Optional text tag to render the line with
+        """
+        with self._lock:
+            self._lines[index] = (text, tag)
+            self._request_flush()
+
+    def reset(self):
+        """Clear the widget and any buffered changes, safe from any thread"""
+        self.set_text('')
+
+    def set_text(self, text: str):
+        """Replace the content, safe to call from any thread"""
+        with self._lock:
+            self._lines.clear()
+            self._text = text
+            self._clear_pending = True
+            self._request_flush()
+
+    def _request_flush(self):
+        """Post a flush unless one is pending, called with the lock held"""
+        if self._flush_pending:
+            return
+        self._flush_pending = True
+        self.dispatcher.post(self._schedule_flush)
+
+    def _schedule_flush(self):
+        """Flush now or once the frame interval has elapsed"""
+        delay = self._last_flush + self.frame_interval - time.perf_counter()
+        if delay > 0:
+            self.after(int(delay * 1000) + 1, self._flush)
+        else:
+            self._flush()
+
+    def _flush(self):
+        """Apply buffered changes to the widget on the main thread"""
+        with self._lock:
+            text = self._text
+            self._text = None
+            lines = self._lines
+            self._lines = {}
+            clear = self._clear_pending
+            self._clear_pending = False
+            self._flush_pending = False
+
+        self.config(state='normal')
+        if clear:
+            self.delete('1.0', tk.END)
+        if text:
+            self.insert(tk.END, text)
+        for index, (line, tag) in sorted(lines.items()):
+            self._replace_line(index, line, tag)
+        self.config(state='disabled')
+
+        if clear or lines:
+            self._schedule_fit()
+        self._last_flush = time.perf_counter()
+        self.flushes += 1
+
+    def _replace_line(self, index: int, text: str, tag: Optional[str]):
+        """Swap the content of one line, adding empty lines to reach it"""
+        line = index + 1
+        last = int(self.index('end-1c').split('.')[0])
+        if line > last:
+            self.insert(tk.END, '\n' * (line - last))
+        self.delete(f'{line}.0', f'{line}.end')
+        self.insert(f'{line}.0', text, tag or ())
+
+    def _on_configure(self, event):
+        # Height changes come from _fit_height itself, only a new width
+        # rewraps the text
+        if event.width != self._fit_width:
+            self._fit_width = event.width
+            self._schedule_fit()
+
+    def _schedule_fit(self):
+        """Fit the height once Tk is idle, however many changes come first"""
+        if self._fit_pending:
+            return
+        self._fit_pending = True
+        self.after_idle(self._fit_height)
+
+    def _fit_height(self):
+        """Grow or shrink to the number of displayed lines"""
+        self._fit_pending = False
+        self.fits += 1
+        try:
+            # 'update' brings the line metrics of this widget up to date
+            # without running every pending idle task of the application
+            lines = self.count('1.0', 'end-1c', 'update', 'displaylines')
+            # An int, a 1-tuple on some versions, or None when empty
+            lines = lines[0] if isinstance(lines, tuple) else lines or 0
+        except tk.TclError:
+            lines = int(self.index('end-1c').split('.')[0])
+        height = min(max(lines + 1, 1), self.max_height)
+        if int(self.cget('height')) != height:
+            self.config(height=height)
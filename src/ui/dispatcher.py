@@ -0,0 +1,112 @@
+"""Thread-safe marshalling of UI updates onto the Tk main thread"""
+import threading
+import time
+import tkinter as tk
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_EVENT = '<<UIDispatch>>'
+
+class DispatchStats:
+    """Latency between posting an update and Tk running it"""
+
+    def __init__(self):
+        self.posted = 0
+        self.coalesced = 0
+        self.run = 0
+        self.wakeups = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.total_latency * 1000 / self.run if self.run else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'posted': self.posted,
+            'coalesced': self.coalesced,
+            'run': self.run,
+            'wakeups': self.wakeups,
+            'avg_latency_ms': self.avg_latency_ms,
+            'max_latency_ms': self.max_latency * 1000,
+            'last_latency_ms': self.last_latency * 1000
+        }
+
+class UIDispatcher:
+    """
+    Runs callbacks posted from any thread on the Tk main thread.
+
+    Posting only wakes Tk when nothing is pending yet, and updates posted
+    with the same key replace each other until Tk gets to them, so a burst
+    of streaming updates costs a single wakeup and a single redraw.
+    """
+
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.stats = DispatchStats()
+        self._main_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, tuple] = {}
+        self._scheduled = False
+        root.bind(DISPATCH_EVENT, lambda event: self._drain())
+
+    def post(self, callback: Callable[..., Any], *args, key: Optional[Hashable] = None):
+        """
+        Schedule a callback on the Tk main thread
+
+        Args:
+            callback: Function to run
+            *args: Arguments passed to the callback
+            key: Updates sharing a key are coalesced, only the latest runs
+        """
+        with self._lock:
+            if key is None:
+                key = object()
+            elif key in self._pending:
+                self.stats.coalesced += 1
+                # Keep the original post time so latency covers the wait
+                posted_at = self._pending[key][2]
+                self._pending[key] = (callback, args, posted_at)
+                return
+            self._pending[key] = (callback, args, time.perf_counter())
+            self.stats.posted += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wakeup()
+
+    def _wakeup(self):
+        """Ask Tk to drain the pending updates"""
+        self.stats.wakeups += 1
+        try:
+            if threading.get_ident() == self._main_thread:
+                self.root.after_idle(self._drain)
+            else:
+                # Tk marshals the event to the main thread's event queue
+                self.root.event_generate(DISPATCH_EVENT, when='tail')
+        except (RuntimeError, tk.TclError) as e:
+            logger.debug(f"UI wakeup failed: {e}")
+            with self._lock:
+                self._scheduled = False
+
+    def _drain(self):
+        """Run pending callbacks in posting order on the main thread"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+
+        now = time.perf_counter()
+        for callback, args, posted_at in pending.values():
+            latency = now - posted_at
+            self.stats.run += 1
+            self.stats.total_latency += latency
+            self.stats.last_latency = latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"UI update failed: {e}")
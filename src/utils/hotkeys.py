@@ -1,49 +1,63 @@
 """Hotkey management"""
 import keyboard
+import logging
 import threading
 import time
-import logging
-from src.config.constants import HOTKEYS
+from typing import Dict, Optional
+from src.config.constants import HOTKEYS, HOTKEY_DEBOUNCE
 
 logger = logging.getLogger(__name__)
 
 class HotkeyManager:
-    def __init__(self, app):
+    def __init__(
+        self,
+        app,
+        hotkeys: Optional[Dict[str, str]] = None,
+        debounce: float = HOTKEY_DEBOUNCE
+    ):
+        """
+        Args:
+            app: Overlay receiving the commands
+            hotkeys: Per-command combos overriding the HOTKEYS defaults
+            debounce: Quiet seconds needed before a combo triggers again
+        """
         self.app = app
-        self.running = False
-        self.thread = None
+        self.hotkeys = {**HOTKEYS, **(hotkeys or {})}
+        self.debounce = debounce
+        self._handles = []
+        self._last_event: Dict[str, float] = {}
+        self._lock = threading.Lock()
     
     def start(self):
-        """Start hotkey monitoring"""
-        self.running = True
-        self.thread = threading.Thread(target=self._monitor_hotkeys)
-        self.thread.daemon = True
-        self.thread.start()
+        """Register global hotkeys"""
+        for command, combo in self.hotkeys.items():
+            try:
+                handle = keyboard.add_hotkey(combo, self._trigger, args=(command,))
+                self._handles.append(handle)
+            except Exception as e:
+                logger.error(f"Failed to register hotkey {combo} for {command}: {e}")
         logger.info("Hotkey monitoring started")
     
     def stop(self):
-        """Stop hotkey monitoring"""
-        self.running = False
-        if self.thread:
-            self.thread.join()
+        """Unregister global hotkeys"""
+        for handle in self._handles:
+            try:
+                keyboard.remove_hotkey(handle)
+            except (KeyError, ValueError):
+                pass
+        self._handles = []
         logger.info("Hotkey monitoring stopped")
     
-    def _monitor_hotkeys(self):
-        """Monitor for hotkey presses"""
-        while self.running:
-            try:
-                if keyboard.is_pressed(HOTKEYS['select_area']):
-                    self.app.command_queue.put('select_area')
-                    time.sleep(0.3)
-                elif keyboard.is_pressed(HOTKEYS['toggle_overlay']):
-                    self.app.command_queue.put('toggle_overlay')
-                    time.sleep(0.3)
-                elif keyboard.is_pressed(HOTKEYS['clear_fields']):
-                    self.app.command_queue.put('clear_fields')
-                    time.sleep(0.3)
-                elif keyboard.is_pressed(HOTKEYS['copy_translation']):
-                    self.app.command_queue.put('copy_translation')
-                    time.sleep(0.3)
-            except Exception as e:
-                logger.error(f"Error in hotkey monitoring: {e}")
-            time.sleep(0.1)
+    def _trigger(self, command: str):
+        """Called from the keyboard hook thread when a combo is pressed"""
+        now = time.monotonic()
+        with self._lock:
+            # Repeats push the window forward, so a held combo fires once
+            last = self._last_event.get(command)
+            self._last_event[command] = now
+        if last is not None and now - last < self.debounce:
+            return
+        try:
+            self.app.dispatch_command(command)
+        except Exception as e:
+            logger.error(f"Error handling hotkey {command}: {e}")
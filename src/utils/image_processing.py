@@ -3,18 +3,22 @@ from PIL import Image
 import cv2
 import numpy as np
 from datetime import datetime
+from typing import List, Optional, Tuple, Union
 import os
 from src.config.constants import DEBUG_DIR
+from src.utils.preprocessing import DEFAULT_STAGES, PreprocessPipeline
 import logging
 
 logger = logging.getLogger(__name__)
 
-def save_debug_image(image: Image.Image, suffix: str, debug_dir: str) -> None:
+_default_pipeline: Optional[PreprocessPipeline] = None
+
+def save_debug_image(image: Union[Image.Image, np.ndarray], suffix: str, debug_dir: str) -> None:
     """
     Save an image for debugging purposes
     
     Args:
-        image: PIL Image to save
+        image: PIL Image (RGB) or numpy array (grayscale, RGB or BGRA) to save
         suffix: Suffix to add to filename (e.g., 'original', 'processed')
         debug_dir: Directory to save debug images
     """
@@ -27,52 +31,91 @@ def save_debug_image(image: Image.Image, suffix: str, debug_dir: str) -> None:
         image_np = np.array(image)
     else:
         image_np = image
+    
+    # Grayscale and BGRA arrays are already in a layout cv2 can write
+    if image_np.ndim == 3 and image_np.shape[2] == 3:
+        image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
         
     filename = os.path.join(debug_dir, f'debug_{timestamp}_{suffix}.png')
-    cv2.imwrite(filename, cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR))
+    cv2.imwrite(filename, image_np)
 
-def preprocess_image(image: Image.Image, save_debug: bool = False, debug_dir: str = DEBUG_DIR) -> Image.Image:
+def to_grayscale(frame: np.ndarray) -> np.ndarray:
     """
-    Preprocess image for better OCR results
+    Convert a captured frame to grayscale in a single pass
     
     Args:
-        image: PIL Image to process
+        frame: BGRA array from ScreenCapture.capture_area_array, or an
+            already grayscale array
+        
+    Returns:
+        Grayscale uint8 array
+    """
+    if frame.ndim == 2:
+        return frame
+    if frame.shape[2] == 4:
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+def preprocess_array(
+    frame: np.ndarray,
+    save_debug: bool = False,
+    debug_dir: str = DEBUG_DIR,
+    pipeline: Optional[PreprocessPipeline] = None
+) -> Optional[np.ndarray]:
+    """
+    Preprocess a raw captured frame for better OCR results
+    
+    Args:
+        frame: BGRA array from ScreenCapture.capture_area_array
         save_debug: Whether to save debug images
+        pipeline: Stages to run, the default stages if omitted
         
     Returns:
-        Processed PIL Image
+        Processed grayscale array, black text on white background, or None
+        when the frame holds no text
     """
     try:
         if save_debug:
-            save_debug_image(image, 'original', debug_dir)
-        # Convert to numpy array
-        np_image = np.array(image)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(np_image, cv2.COLOR_RGB2GRAY)
-        
-        # Apply threshold
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            save_debug_image(frame, 'original', debug_dir)
         
-        # Find text contours
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        result = (pipeline or default_pipeline()).run(frame)
         
-        # Create mask for text
-        mask = np.zeros_like(binary)
-        for contour in contours:
-            cv2.drawContours(mask, [contour], -1, (255, 255, 255), -1)
+        if save_debug and result is not None:
+            save_debug_image(result, 'processed', debug_dir)
         
-        # Apply mask
-        result = cv2.bitwise_and(binary, mask)
+        return result
         
-        # Invert to black text on white background
-        result = cv2.bitwise_not(result)
+    except Exception as e:
+        logger.error(f"Image preprocessing failed: {e}")
+        raise
+
+def preprocess_image(
+    image: Image.Image,
+    save_debug: bool = False,
+    debug_dir: str = DEBUG_DIR,
+    pipeline: Optional[PreprocessPipeline] = None
+) -> Optional[Image.Image]:
+    """
+    Preprocess image for better OCR results
+    
+    Compatibility wrapper around preprocess_array for PIL callers.
+    
+    Args:
+        image: PIL Image to process
+        save_debug: Whether to save debug images
+        pipeline: Stages to run, the default stages if omitted
         
-        # Add white border
-        result = cv2.copyMakeBorder(result, 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+    Returns:
+        Processed PIL Image, or None when the image holds no text
+    """
+    try:
+        if save_debug:
+            save_debug_image(image, 'original', debug_dir)
         
-        # Scale up
-        result = cv2.resize(result, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+        gray = np.asarray(image.convert('L'))
+        result = (pipeline or default_pipeline()).run(gray)
+        if result is None:
+            return None
         
         if save_debug:
             save_debug_image(result, 'processed', debug_dir)
@@ -81,4 +124,60 @@ def preprocess_image(image: Image.Image, save_debug: bool = False, debug_dir: st
         
     except Exception as e:
         logger.error(f"Image preprocessing failed: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def default_pipeline() -> PreprocessPipeline:
+    """Shared pipeline with DEFAULT_STAGES, created on first use"""
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = PreprocessPipeline.from_names(DEFAULT_STAGES)
+    return _default_pipeline
+
+def split_line_strips(
+    processed: np.ndarray,
+    min_gap: int = 2,
+    min_height: int = 8,
+    padding: int = 4
+) -> List[Tuple[int, int]]:
+    """
+    Split a preprocessed image into text line strips
+    
+    Uses the horizontal projection of the ink pixels: runs of rows
+    containing ink separated by at least min_gap blank rows form a strip.
+    Ink is the minority value inside the bounding box of dark pixels, so
+    captures of dark chat backgrounds (white text after preprocessing) work
+    as well as light ones.
+    
+    Args:
+        processed: Binary output of preprocess_array
+        min_gap: Blank rows needed to separate two lines
+        min_height: Strips with fewer ink rows are treated as noise
+        padding: Blank rows kept above and below each strip
+        
+    Returns:
+        List of (top, bottom) row ranges, bottom exclusive, in reading order
+    """
+    dark = processed < 128
+    rows = np.flatnonzero(dark.any(axis=1))
+    if rows.size == 0:
+        return []
+    cols = np.flatnonzero(dark.any(axis=0))
+    
+    # Ignore the white border and pick the ink polarity inside the content
+    box = dark[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    ink = box if np.count_nonzero(box) * 2 < box.size else ~box
+    ink_rows = np.flatnonzero(ink.any(axis=1)) + rows[0]
+    if ink_rows.size == 0:
+        return []
+    
+    # Split wherever consecutive ink rows are more than min_gap apart
+    breaks = np.flatnonzero(np.diff(ink_rows) > min_gap)
+    starts = np.concatenate(([ink_rows[0]], ink_rows[breaks + 1]))
+    ends = np.concatenate((ink_rows[breaks], [ink_rows[-1]])) + 1
+    
+    height = processed.shape[0]
+    return [
+        (max(0, int(top) - padding), min(height, int(bottom) + padding))
+        for top, bottom in zip(starts, ends)
+        if bottom - top >= min_height
+    ]
@@ -0,0 +1,455 @@
+"""Configurable OCR preprocessing stages with reusable buffers"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+from src.config.constants import (
+    PREPROCESS_STAGES,
+    OCR_TARGET_GLYPH_HEIGHT,
+    OCR_MIN_SCALE,
+    OCR_MAX_SCALE,
+    OCR_MAX_OUTPUT_PIXELS,
+    OCR_MAX_GLYPH_HEIGHT,
+    OCR_REGION_MARGIN,
+    OCR_REGION_FALLBACK_HEIGHT
+)
+
+Shape = Tuple[int, ...]
+
+class Stage(ABC):
+    """
+    One preprocessing step writing into a buffer owned by the pipeline
+
+    Subclasses report the shape they produce for a given input shape and
+    fill the destination buffer, so buffers can be allocated once per frame
+    size and reused.
+    """
+    name = 'base'
+
+    def output_shape(self, shape: Shape) -> Optional[Shape]:
+        """Shape of the buffer apply writes to, None if it needs none"""
+        return shape[:2]
+
+    @abstractmethod
+    def apply(self, src: np.ndarray, dst: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Process src into dst, returning the array holding the result
+
+        None means the frame holds no text and stops the pipeline.
+        """
+
+    def stats(self) -> Dict[str, float]:
+        """Counters worth logging, empty for most stages"""
+        return {}
+
+class GrayscaleStage(Stage):
+    """BGRA, BGR or grayscale frame to grayscale"""
+    name = 'grayscale'
+
+    def apply(self, src, dst):
+        if src.ndim == 2:
+            return src
+        code = cv2.COLOR_BGRA2GRAY if src.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(src, code, dst=dst)
+
+class ThresholdStage(Stage):
+    """Otsu binarization, inverted so text becomes the white foreground"""
+    name = 'threshold'
+
+    def __init__(self, invert: bool = True):
+        self.flags = (cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY) + cv2.THRESH_OTSU
+
+    def apply(self, src, dst):
+        cv2.threshold(src, 0, 255, self.flags, dst=dst)
+        return dst
+
+class ContourMaskStage(Stage):
+    """
+    Keep only pixels inside external contours
+
+    All filled in one drawContours call. With RETR_EXTERNAL every
+    foreground pixel lies inside its own contour, so on a binarized image
+    this changes nothing and is left out of the default stages.
+    """
+    name = 'mask'
+
+    def __init__(self):
+        # Scratch mask per thread, like the pipeline's own buffers
+        self._local = threading.local()
+
+    def apply(self, src, dst):
+        contours, _ = cv2.findContours(src, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        mask = getattr(self._local, 'mask', None)
+        if mask is None or mask.shape != src.shape:
+            mask = self._local.mask = np.empty_like(src)
+        mask.fill(0)
+        cv2.drawContours(mask, contours, -1, 255, -1)
+        return cv2.bitwise_and(src, mask, dst=dst)
+
+class InvertStage(Stage):
+    """Swap black and white, giving black text on white"""
+    name = 'invert'
+
+    def apply(self, src, dst):
+        return cv2.bitwise_not(src, dst=dst)
+
+class BorderStage(Stage):
+    """Constant border around the image, Tesseract dislikes text at the edge"""
+    name = 'border'
+
+    def __init__(self, size: int = 20, value: int = 255):
+        self.size = size
+        self.value = value
+
+    def output_shape(self, shape):
+        return shape[0] + 2 * self.size, shape[1] + 2 * self.size
+
+    def apply(self, src, dst):
+        size = self.size
+        return cv2.copyMakeBorder(
+            src, size, size, size, size, cv2.BORDER_CONSTANT, dst=dst, value=self.value
+        )
+
+class ResizeStage(Stage):
+    """Fixed factor scaling"""
+    name = 'resize'
+
+    def __init__(self, scale: float = 2.0, interpolation: int = cv2.INTER_CUBIC):
+        self.scale = scale
+        self.interpolation = interpolation
+
+    def output_shape(self, shape):
+        return max(1, round(shape[0] * self.scale)), max(1, round(shape[1] * self.scale))
+
+    def apply(self, src, dst):
+        if self.scale == 1:
+            return src
+        return cv2.resize(src, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=self.interpolation)
+
+class TextRegionStage(Stage):
+    """
+    Crop to the text blocks of a binarized image
+
+    Character-sized connected components are kept and dilated into word
+    and line blocks, sized by their median height; the output is the union
+    of the blocks plus a margin, a view into the input. UI chrome such as
+    frames, separators and filled panels is dropped by the component
+    filter. A frame without any block has no text and yields None, so OCR
+    is skipped, unless it is small enough to be a tight crop around a line
+    whose glyphs the filter rejected; such frames are passed on whole.
+    """
+    name = 'regions'
+
+    def __init__(
+        self,
+        margin: int = OCR_REGION_MARGIN,
+        max_fill: float = 0.7,
+        max_stroke: int = 6,
+        fallback_height: int = OCR_REGION_FALLBACK_HEIGHT
+    ):
+        """
+        Args:
+            margin: Pixels kept around the union of the text blocks
+            max_fill: Components filling more of their box than this are
+                solid shapes such as icons and bars
+            max_stroke: Solid components no thicker than this still count
+                as glyphs, like 'l', '-' or '.'
+            fallback_height: Frames up to this tall are kept whole when
+                they have ink but no block
+        """
+        self.margin = margin
+        self.max_fill = max_fill
+        self.max_stroke = max_stroke
+        self.fallback_height = fallback_height
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.empty = 0
+        self.fallbacks = 0
+        self.pixels_in = 0
+        self.pixels_out = 0
+        self._local = threading.local()
+
+    @property
+    def last_blocks(self) -> List[Tuple[int, int, int, int]]:
+        """Blocks found in the last frame this thread processed"""
+        return getattr(self._local, 'blocks', [])
+
+    def output_shape(self, shape):
+        # The crop is a view into the input
+        return None
+
+    def blocks(self, binary: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Text blocks as (x, y, width, height), in no particular order"""
+        ink = binary if np.count_nonzero(binary) * 2 < binary.size else cv2.bitwise_not(binary)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        widths = stats[1:count, cv2.CC_STAT_WIDTH]
+        heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+        areas = stats[1:count, cv2.CC_STAT_AREA]
+        fill = areas / (widths * heights)
+        glyphs = (
+            _character_sized(heights, areas)
+            # Long rules and borders are wider than any run of glyphs is tall
+            & (widths <= heights * 8)
+            & ((fill <= self.max_fill) | (np.minimum(widths, heights) <= self.max_stroke))
+        )
+        if not glyphs.any():
+            return []
+
+        # Paint the kept components and smear them into words and lines
+        lookup = np.zeros(count, dtype=np.uint8)
+        lookup[1:][glyphs] = 255
+        mask = lookup[labels]
+        glyph_height = float(np.median(heights[glyphs]))
+        kernel = cv2.getStructuringElement(
+            cv2.MORPH_RECT,
+            (max(3, round(glyph_height)) | 1, max(1, round(glyph_height / 3)) | 1)
+        )
+        cv2.dilate(mask, kernel, dst=mask)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # A block must be about as tall as a glyph, lone specks are noise
+        return [
+            box for box in map(cv2.boundingRect, contours)
+            if box[3] >= glyph_height * 0.8
+        ]
+
+    def apply(self, src, dst):
+        blocks = self._local.blocks = self.blocks(src)
+        with self._lock:
+            self.frames += 1
+            self.pixels_in += src.size
+            if not blocks:
+                # A short frame with any ink may be a tight crop around a line
+                if src.shape[0] > self.fallback_height or cv2.countNonZero(src) in (0, src.size):
+                    self.empty += 1
+                    return None
+                self.fallbacks += 1
+                self.pixels_out += src.size
+                return src
+        boxes = np.array(blocks)
+        margin = self.margin
+        left = max(0, int(boxes[:, 0].min()) - margin)
+        top = max(0, int(boxes[:, 1].min()) - margin)
+        right = min(src.shape[1], int((boxes[:, 0] + boxes[:, 2]).max()) + margin)
+        bottom = min(src.shape[0], int((boxes[:, 1] + boxes[:, 3]).max()) + margin)
+        with self._lock:
+            self.pixels_out += (right - left) * (bottom - top)
+        return src[top:bottom, left:right]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'empty': self.empty,
+                'fallbacks': self.fallbacks,
+                'pixel_ratio': self.pixels_out / self.pixels_in if self.pixels_in else 1.0
+            }
+
+def _character_sized(
+    heights: np.ndarray,
+    areas: np.ndarray,
+    min_height: int = 3,
+    max_ratio: float = 3.0,
+    max_height: int = OCR_MAX_GLYPH_HEIGHT
+) -> np.ndarray:
+    """
+    Mask of the connected components that could be characters
+
+    Specks below min_height are dropped, and so is anything taller than
+    max_height or than max_ratio times the median height of the rest, like
+    frames and panels. The caps do not depend on the image size, so a
+    capture cropped tightly around a single line keeps its glyphs.
+    """
+    candidates = (heights >= min_height) & (heights <= max_height) & (areas >= 4)
+    if not candidates.any():
+        return candidates
+    return candidates & (heights <= np.median(heights[candidates]) * max_ratio)
+
+def estimate_glyph_height(binary: np.ndarray, min_height: int = 3) -> Optional[float]:
+    """
+    Median height of character-sized connected components in a binary image
+
+    Text is taken to be the minority value, so both polarities work.
+    Returns None when nothing character-like is found.
+    """
+    ink = binary if np.count_nonzero(binary) * 2 < binary.size else cv2.bitwise_not(binary)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:count, cv2.CC_STAT_AREA]
+    heights = heights[_character_sized(heights, areas, min_height)]
+    if heights.size == 0:
+        return None
+    return float(np.median(heights))
+
+class AdaptiveScaleStage(Stage):
+    """
+    Scale so glyphs reach the height Tesseract reads best
+
+    The glyph height is estimated from connected components and the scale
+    rounded to quarter steps. Scales close to 1 are skipped, downscaling
+    uses INTER_AREA and upscaling INTER_CUBIC. The output never exceeds
+    max_pixels, OCR time grows with it. Expects a binarized image.
+    """
+    name = 'scale'
+
+    def __init__(
+        self,
+        target_height: float = OCR_TARGET_GLYPH_HEIGHT,
+        min_scale: float = OCR_MIN_SCALE,
+        max_scale: float = OCR_MAX_SCALE,
+        tolerance: float = 0.15,
+        max_pixels: Optional[int] = OCR_MAX_OUTPUT_PIXELS
+    ):
+        self.target_height = target_height
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.tolerance = tolerance
+        self.max_pixels = max_pixels
+        self._local = threading.local()
+
+    @property
+    def last_scale(self) -> float:
+        """Scale applied to the last frame this thread processed"""
+        return getattr(self._local, 'scale', 1.0)
+
+    def output_shape(self, shape):
+        # The output size depends on the content, apply keeps its own buffer
+        return None
+
+    def scale_for(self, binary: np.ndarray) -> float:
+        height = estimate_glyph_height(binary)
+        if height is None:
+            return 1.0
+        scale = min(self.max_scale, max(self.min_scale, self.target_height / height))
+        limit = math.sqrt(self.max_pixels / binary.size) if self.max_pixels else math.inf
+        scale = min(scale, limit)
+        if abs(scale - 1) <= self.tolerance and limit >= 1:
+            return 1.0
+        # Quarter steps keep the output, and so the OCR line cache keys,
+        # stable when the estimate wobbles between frames
+        scale = max(self.min_scale, round(scale * 4) / 4)
+        if scale > limit:
+            scale = math.floor(limit * 4) / 4 or limit
+        return scale
+
+    def apply(self, src, dst):
+        scale = self._local.scale = self.scale_for(src)
+        if scale == 1.0:
+            return src
+        size = (max(1, round(src.shape[1] * scale)), max(1, round(src.shape[0] * scale)))
+        # The output size varies with the text, keep a buffer per size
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None or buffer.shape != (size[1], size[0]):
+            buffer = self._local.buffer = np.empty((size[1], size[0]), dtype=np.uint8)
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+        return cv2.resize(src, size, dst=buffer, interpolation=interpolation)
+
+STAGES = {
+    'grayscale': GrayscaleStage,
+    'threshold': ThresholdStage,
+    'mask': ContourMaskStage,
+    'regions': TextRegionStage,
+    'invert': InvertStage,
+    'border': BorderStage,
+    'resize': ResizeStage,
+    'scale': AdaptiveScaleStage
+}
+
+DEFAULT_STAGES = PREPROCESS_STAGES
+
+class StageTimings:
+    """Cumulative wall time per stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.total: Dict[str, float] = {}
+
+    def record(self, timings: List[Tuple[str, float]]):
+        with self._lock:
+            self.runs += 1
+            for name, seconds in timings:
+                self.total[name] = self.total.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Average milliseconds per run for each stage"""
+        with self._lock:
+            runs = self.runs or 1
+            return {name: seconds * 1000 / runs for name, seconds in self.total.items()}
+
+class PreprocessPipeline:
+    """
+    Ordered preprocessing stages sharing preallocated buffers
+
+    Each thread keeps one output buffer per stage, reallocated only when the
+    stage's input size changes, so consecutive captures of the same area
+    allocate nothing but the returned copy. Stages can be reordered or toggled per
+    region by building another pipeline, e.g. from_names(['grayscale',
+    'threshold', 'border']).
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = list(stages)
+        self.timings = StageTimings()
+        self._local = threading.local()
+
+    @classmethod
+    def from_names(cls, names: Sequence[str] = DEFAULT_STAGES, **options) -> "PreprocessPipeline":
+        """
+        Build a pipeline from stage names
+
+        Args:
+            names: Stage names from STAGES, in order
+            **options: Per stage constructor arguments keyed by stage name,
+                e.g. resize={'scale': 1.5}
+        """
+        unknown = [name for name in names if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stages: {unknown}")
+        return cls([STAGES[name](**options.get(name, {})) for name in names])
+
+    @property
+    def names(self) -> List[str]:
+        return [stage.name for stage in self.stages]
+
+    @property
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Counters of the stages that keep any"""
+        return {stage.name: stage.stats() for stage in self.stages if stage.stats()}
+
+    def _buffer(self, index: int, shape: Shape) -> Optional[np.ndarray]:
+        """This thread's output buffer of a stage for an input shape, if it uses one"""
+        cache = getattr(self._local, 'buffers', None)
+        if cache is None:
+            cache = self._local.buffers = [None] * len(self.stages)
+        entry = cache[index]
+        if entry is None or entry[0] != shape:
+            # Keyed by the stage's own input, so a crop or scale earlier in
+            # the pipeline only reallocates when its output size changes
+            output_shape = self.stages[index].output_shape(shape)
+            buffer = None if output_shape is None else np.empty(output_shape, dtype=np.uint8)
+            entry = cache[index] = (shape, buffer)
+        return entry[1]
+
+    def run(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Run every stage on a frame
+
+        Returns:
+            A new array owned by the caller, the stage buffers are reused
+            by the next frame. None when a stage found no text.
+        """
+        timings = []
+        result = frame
+        for index, stage in enumerate(self.stages):
+            start = time.perf_counter()
+            result = stage.apply(result, self._buffer(index, result.shape))
+            timings.append((stage.name, time.perf_counter() - start))
+            if result is None:
+                break
+        self.timings.record(timings)
+        if result is None:
+            return None
+        return result.copy() if result is not frame else result
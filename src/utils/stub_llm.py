@@ -0,0 +1,324 @@
+"""
+Offline stand-in for the OpenAI-compatible chat completions API
+
+StubModel produces deterministic translations with configurable latency,
+throughput, errors and stalls. SimulatedClient serves it in-process with the
+same shape as AsyncOpenAI (used by OpenAIChatAnalyzer in dev mode) and
+StubServer serves it over HTTP with SSE streaming, so the real client and
+HTTP stack can be benchmarked without network access:
+
+    python -m src.utils.stub_llm --port 8765 --ttft 0.4 --tokens-per-second 60
+
+then point the analyzer at base_url="http://127.0.0.1:8765/v1".
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.config.constants import LLM_TRANSLATE_HEADER
+
+logger = logging.getLogger(__name__)
+
+CHAT_LINE = re.compile(r'^\[[^\]]+\]\s*[^:]+:')
+
+# Canned translations of a chat image, vision requests have no text to echo
+VISION_REPLIES = [
+    """[Team] Player1: hi everyone, wanna play?
+[Team] Player2: yeah, let's go!
+[Team] Player3: wait a moment please""",
+
+    """[Team] TeamLeader: does anyone know how to play Hulk?
+[Team] Pro_Gamer: just smash everything lol
+[Team] NewPlayer: I need help with the controls""",
+
+    """[Team] Player4: nice play!
+[Team] Player5: thanks for the help
+[Team] Player6: let's win this match"""
+]
+
+class StubAPIError(Exception):
+    """Injected API failure, carries an HTTP status code"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+class StubModel:
+    """Deterministic fake model with injectable timing and failures"""
+
+    def __init__(
+        self,
+        ttft: float = 0.3,
+        tokens_per_second: float = 80.0,
+        error_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        stall: float = 2.0,
+        chars_per_token: int = 4,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            ttft: Seconds before the first token
+            tokens_per_second: Streaming throughput after the first token
+            error_rate: Fraction of requests failing with a 500 or 429
+            stall_rate: Fraction of requests pausing once mid-stream
+            stall: Length of a stall in seconds
+            chars_per_token: Characters sent per streamed token
+            seed: Random seed for reproducible failures, stalls and
+                vision replies
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.chars_per_token = chars_per_token
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.vision_replies = list(VISION_REPLIES)
+        self.requests = 0
+        self.errors = 0
+        self.stalls = 0
+
+    def reply(self, messages: List[Dict]) -> str:
+        """Fake translation of the last user message, one line per input line"""
+        content = messages[-1]['content']
+        if not isinstance(content, str):
+            with self._lock:
+                return self._rng.choice(self.vision_replies)
+        # Drop the context preamble the analyzer adds
+        content = content.split(LLM_TRANSLATE_HEADER)[-1]
+        lines = []
+        for line in content.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if not CHAT_LINE.match(line):
+                line = f"[Team] Player: {line}"
+            lines.append(f"{line} (en)")
+        return '\n'.join(lines)
+
+    def tokens(self, text: str, max_tokens: Optional[int] = None) -> Tuple[List[str], str]:
+        """Split a reply into streamed tokens, truncated to max_tokens"""
+        size = self.chars_per_token
+        tokens = [text[start:start + size] for start in range(0, len(text), size)]
+        if max_tokens is not None and len(tokens) > max_tokens:
+            return tokens[:max_tokens], 'length'
+        return tokens, 'stop'
+
+    def plan(self, token_count: int) -> Tuple[Optional[StubAPIError], Optional[int]]:
+        """Decide whether a request fails and after which token it stalls"""
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                status = self._rng.choice([429, 500])
+                return StubAPIError(status, f"Injected {status} error"), None
+            if token_count and self._rng.random() < self.stall_rate:
+                self.stalls += 1
+                return None, self._rng.randrange(token_count)
+        return None, None
+
+    def stats(self) -> Dict[str, int]:
+        return {'requests': self.requests, 'errors': self.errors, 'stalls': self.stalls}
+
+def _chunk(content: Optional[str], finish_reason: Optional[str] = None) -> Dict:
+    return {
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': 'stub',
+        'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': finish_reason}]
+    }
+
+def _completion(content: str, finish_reason: str, completion_tokens: int) -> Dict:
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': 'stub',
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': finish_reason
+        }],
+        'usage': {'completion_tokens': completion_tokens}
+    }
+
+def _namespace(value):
+    """Turn decoded JSON into attribute-accessible objects like the SDK's"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+class _SimulatedCompletions:
+    def __init__(self, model: StubModel):
+        self.model = model
+
+    async def create(self, messages: List[Dict], max_tokens: Optional[int] = None, stream: bool = False, **kwargs):
+        tokens, finish_reason = self.model.tokens(self.model.reply(messages), max_tokens)
+        error, stall_at = self.model.plan(len(tokens))
+        await asyncio.sleep(self.model.ttft)
+        if error is not None:
+            raise error
+        if not stream:
+            await asyncio.sleep(len(tokens) / self.model.tokens_per_second)
+            return _namespace(_completion(''.join(tokens), finish_reason, len(tokens)))
+        return self._stream(tokens, finish_reason, stall_at)
+
+    async def _stream(self, tokens: List[str], finish_reason: str, stall_at: Optional[int]):
+        interval = 1 / self.model.tokens_per_second
+        for index, token in enumerate(tokens):
+            if index == stall_at:
+                await asyncio.sleep(self.model.stall)
+            yield _namespace(_chunk(token))
+            await asyncio.sleep(interval)
+        yield _namespace(_chunk(None, finish_reason))
+
+class SimulatedClient:
+    """In-process replacement for AsyncOpenAI backed by a StubModel"""
+
+    def __init__(self, model: Optional[StubModel] = None):
+        self.model = model or StubModel()
+        self.chat = SimpleNamespace(completions=_SimulatedCompletions(self.model))
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Buffered so headers and body don't go out as separate small packets
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        model: StubModel = self.server.model
+
+        tokens, finish_reason = model.tokens(model.reply(request.get('messages', [])), request.get('max_tokens'))
+        error, stall_at = model.plan(len(tokens))
+        time.sleep(model.ttft)
+        if error is not None:
+            self._send_json(error.status_code, {'error': {'message': str(error), 'code': error.status_code}})
+            return
+        if not request.get('stream'):
+            time.sleep(len(tokens) / model.tokens_per_second)
+            self._send_json(200, _completion(''.join(tokens), finish_reason, len(tokens)))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for event in self._events(model, tokens, finish_reason, stall_at):
+            self._write_chunk(event)
+        self._write_chunk(b'')
+
+    def _events(self, model: StubModel, tokens, finish_reason, stall_at) -> Iterator[bytes]:
+        interval = 1 / model.tokens_per_second
+        for index, token in enumerate(tokens):
+            if index == stall_at:
+                time.sleep(model.stall)
+            yield f"data: {json.dumps(_chunk(token))}\n\n".encode('utf-8')
+            time.sleep(interval)
+        yield f"data: {json.dumps(_chunk(None, finish_reason))}\n\n".encode('utf-8')
+        yield b"data: [DONE]\n\n"
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+class StubServer:
+    """OpenAI-compatible HTTP server for a StubModel, run in a daemon thread"""
+
+    def __init__(self, model: Optional[StubModel] = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            model: Model to serve, defaults to StubModel()
+            host: Interface to bind
+            port: Port to bind, 0 picks a free one
+        """
+        self.model = model or StubModel()
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.model = self.model
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        """Serve on the calling thread until stop is called"""
+        self._server.serve_forever()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions stub")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ttft', type=float, default=0.3, help="seconds to first token")
+    parser.add_argument('--tokens-per-second', type=float, default=80.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--stall-rate', type=float, default=0.0)
+    parser.add_argument('--stall', type=float, default=2.0, help="stall length in seconds")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    model = StubModel(
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+        seed=args.seed
+    )
+    server = StubServer(model, args.host, args.port)
+    print(f"Serving {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Shrinking chat captures before uploading them to a vision model"""
+import math
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from PIL import Image
+import cv2
+import numpy as np
+from src.utils.preprocessing import estimate_glyph_height
+from src.config.constants import (
+    LLM_MODEL,
+    VISION_BINARIZE_MIN_SEPARATION,
+    VISION_MIN_GLYPH_HEIGHT,
+    VISION_TOKEN_COSTS,
+    VISION_JPEG_QUALITY
+)
+
+class VisionPayload:
+    """Encoded image ready for upload plus what it cost"""
+    __slots__ = ('data', 'mime', 'size', 'original_size', 'lines', 'tokens', 'original_tokens')
+
+    def __init__(
+        self,
+        data: bytes,
+        mime: str,
+        size: Tuple[int, int],
+        original_size: Tuple[int, int],
+        lines: int = 0,
+        model: str = LLM_MODEL
+    ):
+        self.data = data
+        self.mime = mime
+        self.size = size
+        self.original_size = original_size
+        self.lines = lines
+        self.tokens = estimate_image_tokens(*size, model=model)
+        self.original_tokens = estimate_image_tokens(*original_size, model=model)
+
+class VisionStats:
+    """Upload size, token cost and latency of vision requests"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.tokens = 0
+        self.original_tokens = 0
+        self.encode_time = 0.0
+        self.request_time = 0.0
+
+    def record(self, payload: VisionPayload, encode_time: float):
+        self.requests += 1
+        self.bytes_sent += len(payload.data)
+        self.tokens += payload.tokens
+        self.original_tokens += payload.original_tokens
+        self.encode_time += encode_time
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def as_dict(self) -> Dict[str, float]:
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'avg_bytes': self.bytes_sent / requests,
+            'avg_tokens': self.tokens / requests,
+            'tokens_saved': self.tokens_saved,
+            'avg_encode_ms': self.encode_time * 1000 / requests,
+            'avg_request_ms': self.request_time * 1000 / requests
+        }
+
+def image_token_costs(model: str = LLM_MODEL) -> Tuple[int, int]:
+    """(base, per tile) image tokens of a model, e.g. 'openai/gpt-4o-mini'"""
+    name = model.rsplit('/', 1)[-1]
+    # Longest prefix first, so gpt-4o-mini does not match gpt-4o
+    for prefix in sorted(VISION_TOKEN_COSTS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return VISION_TOKEN_COSTS[prefix]
+    return VISION_TOKEN_COSTS['gpt-4o']
+
+def estimate_image_tokens(width: int, height: int, model: str = LLM_MODEL) -> int:
+    """
+    Estimate image input tokens with OpenAI's high detail tiling rule
+
+    The image is fit inside 2048x2048, its short side scaled down to 768,
+    and each 512px tile costs a fixed amount on top of a base cost, both
+    depending on the model.
+    """
+    if width <= 0 or height <= 0:
+        return 0
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    base, per_tile = image_token_costs(model)
+    return base + per_tile * tiles
+
+def _text_bounds(binary: np.ndarray, margin: int) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box (x0, y0, x1, y1) of the text pixels, None if blank"""
+    # Text is the minority class whichever way Otsu split the image
+    ink = binary > 0
+    if np.count_nonzero(ink) * 2 > ink.size:
+        ink = ~ink
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if rows.size == 0:
+        return None
+    height, width = binary.shape
+    return (
+        max(0, int(cols[0]) - margin),
+        max(0, int(rows[0]) - margin),
+        min(width, int(cols[-1]) + 1 + margin),
+        min(height, int(rows[-1]) + 1 + margin)
+    )
+
+def _count_lines(binary: np.ndarray) -> int:
+    """Number of horizontal bands containing text pixels"""
+    ink = binary > 0
+    if np.count_nonzero(ink) * 2 > ink.size:
+        ink = ~ink
+    rows = ink.any(axis=1).astype(np.int8)
+    # Each band starts where a blank row is followed by an inked one
+    return int(rows[0]) + int(np.count_nonzero(np.diff(rows) == 1))
+
+def otsu_separation(gray: np.ndarray, threshold: float) -> float:
+    """
+    How cleanly a threshold splits a grayscale image into two classes
+
+    Otsu's effectiveness measure: between-class variance over total
+    variance, 1.0 for a two-valued image and 0.0 for a flat one.
+    """
+    values = gray.astype(np.float64).ravel()
+    variance = values.var()
+    if variance == 0:
+        return 0.0
+    dark = values <= threshold
+    dark_share = np.count_nonzero(dark) / values.size
+    if dark_share in (0.0, 1.0):
+        return 0.0
+    gap = values[dark].mean() - values[~dark].mean()
+    return float(dark_share * (1 - dark_share) * gap * gap / variance)
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffered = BytesIO()
+    if fmt == 'JPEG':
+        image.save(buffered, format='JPEG', quality=VISION_JPEG_QUALITY, optimize=True)
+    else:
+        image.save(buffered, format='PNG', optimize=True)
+    return buffered.getvalue()
+
+def optimize_vision_image(
+    image: Image.Image,
+    min_glyph_height: int = VISION_MIN_GLYPH_HEIGHT,
+    margin: int = 8,
+    model: str = LLM_MODEL,
+    min_separation: float = VISION_BINARIZE_MIN_SEPARATION
+) -> VisionPayload:
+    """
+    Make a capture as cheap to upload as possible while keeping text legible
+
+    Crops to the text, converts to grayscale, downscales until glyphs reach
+    min_glyph_height and encodes as grayscale PNG or JPEG, whichever is
+    smallest. A binarized PNG competes too when Otsu separates text from
+    background cleanly enough to keep it legible.
+
+    Args:
+        image: Captured PIL Image
+        min_glyph_height: Smallest glyph height in pixels kept after scaling
+        margin: Pixels kept around the text
+        model: Model the image is sent to, for the token estimate
+        min_separation: Otsu separation needed to try the binarized PNG,
+            above 1.0 never binarizes
+
+    Returns:
+        Encoded payload with its size, text line count and estimated token cost
+    """
+    original_size = image.size
+    gray = np.asarray(image.convert('L'))
+    threshold, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    bounds = _text_bounds(binary, margin)
+    if bounds is not None:
+        x0, y0, x1, y1 = bounds
+        gray = gray[y0:y1, x0:x1]
+        binary = binary[y0:y1, x0:x1]
+
+    # Unlike OCR input, the capture is at screen resolution and not yet
+    # cleaned: Otsu leaves anti-aliasing specks and accent marks of 3 px
+    # around the glyphs, which would pull the median down and keep the
+    # image larger than needed
+    glyph_height = estimate_glyph_height(binary, min_height=4)
+    if glyph_height and glyph_height > min_glyph_height:
+        scale = min_glyph_height / glyph_height
+        size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        threshold, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    gray_image = Image.fromarray(gray)
+    candidates = [
+        (_encode(gray_image, 'PNG'), 'image/png'),
+        (_encode(gray_image, 'JPEG'), 'image/jpeg')
+    ]
+    # 1-bit PNG nearly always wins on size, so only offer it when the
+    # threshold keeps every stroke
+    if otsu_separation(gray, threshold) >= min_separation:
+        candidates.append((_encode(Image.fromarray(binary).convert('1'), 'PNG'), 'image/png'))
+    data, mime = min(candidates, key=lambda candidate: len(candidate[0]))
+    return VisionPayload(data, mime, gray_image.size, original_size, _count_lines(binary), model)
@@ -0,0 +1,113 @@
+"""Backend registry options, and BackendRouter ranking, hedging and fallback"""
+import asyncio
+import threading
+import time
+import pytest
+from src.core.backends import BackendRouter, TranslationBackend, create_backend
+
+class FakeBackend(TranslationBackend):
+    """Answers with its own name after a fixed delay, or fails"""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, source_lang, target_lang, priority=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return f"{self.name}:{text}"
+
+def make_router(backends, **options):
+    options.setdefault('min_hedge_delay', 0.01)
+    options.setdefault('default_hedge_delay', 0.05)
+    return BackendRouter(backends, **options)
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        TranslationBackend()
+
+def test_fast_primary_is_not_hedged():
+    fast, slow = FakeBackend('fast'), FakeBackend('slow')
+    router = make_router([fast, slow])
+
+    assert router.translate('hi', 'en', 'pt') == 'fast:hi'
+    router.close()
+
+    assert router.stats()['hedged'] == 0
+    assert slow.calls == 0
+
+def test_slow_primary_is_hedged_and_the_hedge_wins():
+    slow, fast = FakeBackend('slow', delay=0.5), FakeBackend('fast')
+    router = make_router([slow, fast])
+
+    start = time.perf_counter()
+    result = router.translate('hi', 'en', 'pt')
+    elapsed = time.perf_counter() - start
+    router.close()
+
+    assert result == 'fast:hi'
+    assert elapsed < 0.4
+    stats = router.stats()
+    assert stats['hedged'] == 1 and stats['hedge_wins'] == 1
+
+def test_failed_backend_falls_through_the_ranking():
+    broken, working = FakeBackend('broken', fail=True), FakeBackend('working')
+    router = make_router([broken, working], hedge=False)
+
+    assert router.translate('hi', 'en', 'pt') == 'working:hi'
+    router.close()
+
+def test_every_backend_failing_raises_the_last_error():
+    router = make_router([FakeBackend('a', fail=True), FakeBackend('b', fail=True)], hedge=False)
+
+    with pytest.raises(RuntimeError):
+        router.translate('hi', 'en', 'pt')
+    router.close()
+
+def test_ranking_prefers_the_lower_median_latency():
+    slow, fast = FakeBackend('slow'), FakeBackend('fast')
+    for _ in range(5):
+        slow.stats.record(0.4, ok=True)
+        fast.stats.record(0.1, ok=True)
+    router = make_router([slow, fast])
+
+    assert [backend.name for backend in router.ranked()] == ['fast', 'slow']
+    router.close()
+
+def test_libre_needs_an_api_key():
+    with pytest.raises(ValueError):
+        create_backend('libre')
+
+def test_libre_options_reach_the_translator():
+    backend = create_backend('libre', api_key='secret', base_url='http://localhost:5000/')
+    translator = backend._get_translator('pt', 'en')
+    assert translator.api_key == 'secret'
+    assert translator._base_url == 'http://localhost:5000/'
+
+def test_llm_backend_looks_the_loop_up_per_request():
+    class Analyzer:
+        async def translate_text(self, text, source_lang, target_lang, priority=None):
+            return f"{target_lang}:{text}"
+
+    loops = []
+    backend = create_backend('llm', analyzer=Analyzer(), get_loop=lambda: loops[0] if loops else None)
+    with pytest.raises(RuntimeError):
+        backend.translate('oi', 'pt', 'en')
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    loops.append(loop)
+    try:
+        assert backend.translate('oi', 'pt', 'en') == 'en:oi'
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,147 @@
+"""Two-tier translation cache: expiry, eviction, warm start and batching"""
+import sqlite3
+import pytest
+from src.core import cache as cache_module
+from src.core.cache import TranslationCache
+
+class Clock:
+    """Stands in for the time module inside the cache module"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, 'time', clock)
+    return clock
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / 'cache.sqlite3'
+
+def rows(path):
+    with sqlite3.connect(str(path)) as db:
+        return db.execute('SELECT text, translation, last_used FROM translations ORDER BY text').fetchall()
+
+def test_memory_only_round_trip():
+    cache = TranslationCache(path=None)
+    assert cache.get('pt', 'en', 'bom dia') is None
+    cache.put('pt', 'en', 'bom dia', 'good morning')
+    assert cache.get('pt', 'en', 'bom dia') == 'good morning'
+    assert cache.get('pt', 'es', 'bom dia') is None
+    assert (cache.memory_hits, cache.misses) == (1, 2)
+
+def test_normalization_shares_one_entry():
+    cache = TranslationCache(path=None)
+    cache.put('pt', 'en', '  Bom   DIA ', 'good morning')
+    assert cache.get('pt', 'en', 'bom dia') == 'good morning'
+    assert cache.get('pt', 'en', 'BOM\tdia\n') == 'good morning'
+
+def test_ttl_expiry(clock, db_path):
+    cache = TranslationCache(path=db_path, ttl=60)
+    cache.put('pt', 'en', 'gg', 'gg')
+    clock.now += 59
+    assert cache.get('pt', 'en', 'gg') == 'gg'
+    clock.now += 2
+    assert cache.get('pt', 'en', 'gg') is None
+    assert cache.stats()['memory_entries'] == 0
+    cache.close()
+
+    # Expired rows are dropped when the database is opened
+    TranslationCache(path=db_path, ttl=60).close()
+    assert rows(db_path) == []
+
+def test_memory_eviction_falls_back_to_disk(db_path):
+    cache = TranslationCache(path=db_path, memory_size=2)
+    for word in ('um', 'dois', 'tres'):
+        cache.put('pt', 'en', word, word.upper())
+    assert cache.stats()['memory_entries'] == 2
+
+    assert cache.get('pt', 'en', 'um') == 'UM'
+    assert cache.disk_hits == 1
+    # Promoted back into memory
+    assert cache.get('pt', 'en', 'um') == 'UM'
+    assert cache.memory_hits == 1
+    cache.close()
+
+def test_memory_eviction_without_disk():
+    cache = TranslationCache(path=None, memory_size=2)
+    for word in ('um', 'dois', 'tres'):
+        cache.put('pt', 'en', word, word.upper())
+    assert cache.get('pt', 'en', 'um') is None
+    assert cache.get('pt', 'en', 'tres') == 'TRES'
+
+def test_disk_eviction_keeps_the_most_recently_used(clock, db_path):
+    cache = TranslationCache(path=db_path, max_rows=50)
+    cache.put('pt', 'en', 'keep', 'KEEP')
+    for index in range(99):
+        clock.now += 1
+        if index == 90:
+            # Read just before the prune, written along with the next put
+            assert cache.get('pt', 'en', 'keep') == 'KEEP'
+        cache.put('pt', 'en', f"line {index}", f"LINE {index}")
+    cache.close()
+
+    texts = [text for text, _, _ in rows(db_path)]
+    assert len(texts) == 50
+    assert 'keep' in texts
+    assert 'line 0' not in texts
+
+def test_warm_start_loads_recent_rows(clock, db_path):
+    cache = TranslationCache(path=db_path)
+    for index in range(5):
+        clock.now += 1
+        cache.put('pt', 'en', f"line {index}", f"LINE {index}")
+    cache.close()
+
+    warm = TranslationCache(path=db_path, memory_size=3)
+    assert warm.stats()['memory_entries'] == 3
+    assert warm.get('pt', 'en', 'line 4') == 'LINE 4'
+    assert warm.memory_hits == 1
+    assert warm.get('pt', 'en', 'line 0') == 'LINE 0'
+    assert warm.disk_hits == 1
+    warm.close()
+
+    cold = TranslationCache(path=db_path, warm_start=False)
+    assert cold.stats()['memory_entries'] == 0
+    cold.close()
+
+def test_reads_do_not_commit(clock, db_path):
+    cache = TranslationCache(path=db_path, memory_size=1)
+    cache.put('pt', 'en', 'gg', 'GG')
+    cache.put('pt', 'en', 'wp', 'WP')
+    written = rows(db_path)
+
+    clock.now += 10
+    assert cache.get_many('pt', 'en', ['gg', 'wp', 'nope']) == ['GG', 'WP', None]
+    assert rows(db_path) == written
+
+    # The last_used times land with the next write
+    cache.put('pt', 'en', 'ez', 'EZ')
+    assert {text: used for text, _, used in rows(db_path)} == {
+        'ez': clock.now, 'gg': clock.now, 'wp': clock.now
+    }
+    cache.close()
+
+def test_touched_rows_are_written_in_batches(clock, db_path, monkeypatch):
+    monkeypatch.setattr(TranslationCache, 'TOUCH_BATCH', 3)
+    cache = TranslationCache(path=db_path)
+    cache.put_many('pt', 'en', [(word, word.upper()) for word in ('a', 'b', 'c')])
+    clock.now += 10
+    cache.get_many('pt', 'en', ['a', 'b'])
+    assert all(used < clock.now for _, _, used in rows(db_path))
+    cache.get('pt', 'en', 'c')
+    assert all(used == clock.now for _, _, used in rows(db_path))
+    cache.close()
+
+def test_close_writes_pending_last_used(clock, db_path):
+    cache = TranslationCache(path=db_path)
+    cache.put('pt', 'en', 'gg', 'GG')
+    clock.now += 10
+    cache.get('pt', 'en', 'gg')
+    cache.close()
+    assert rows(db_path)[0][2] == clock.now
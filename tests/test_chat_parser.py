@@ -0,0 +1,37 @@
+"""StreamParser line splitting and ChatLine parsing"""
+from src.core.chat_parser import ChatLine, StreamParser
+
+def feed_all(parser, deltas):
+    records = []
+    for delta in deltas:
+        records.extend(parser.feed(delta))
+    return records + parser.close()
+
+def test_lines_complete_across_deltas():
+    parser = StreamParser()
+
+    assert parser.feed('[Team] Ana: o') == []
+    records = parser.feed('i\n[Team] Bi')
+    assert [str(record) for record in records] == ['[Team] Ana: oi']
+    assert [str(record) for record in parser.feed('a: gg\n')] == ['[Team] Bia: gg']
+    assert parser.close() == []
+    assert parser.lines == 2
+
+def test_final_line_without_newline_is_flushed_on_close():
+    records = feed_all(StreamParser(), ['[All] Caio: ', 'bora'])
+
+    assert [str(record) for record in records] == ['[All] Caio: bora']
+
+def test_fences_blank_lines_and_preamble_are_dropped():
+    deltas = ["Here's the translation:\n", '```\n', '[Team] Ana: hi\n', '\n', 'plain line\n', '```']
+
+    records = feed_all(StreamParser(), deltas)
+
+    assert [str(record) for record in records] == ['[Team] Ana: hi', 'plain line']
+    assert not records[1].formatted
+
+def test_chat_line_fields():
+    record = ChatLine.parse('[Team] Ana Paula: vamos: agora')
+
+    assert (record.team, record.name, record.message) == ('Team', 'Ana Paula', 'vamos: agora')
+    assert ChatLine.parse('no format').name is None
@@ -0,0 +1,68 @@
+"""deep-translator providers routed through the shared session"""
+import importlib
+import json
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from deep_translator import GoogleTranslator, LibreTranslator, MyMemoryTranslator
+from src.core.connections import DEEP_TRANSLATOR_MODULES, ConnectionPool
+
+REPLIES = {
+    'translate.google.com': '<html><div class="t0">hello</div></html>',
+    'api.mymemory.translated.net': json.dumps({'responseData': {'translatedText': 'hello'}, 'matches': []}),
+    'libre.test': json.dumps({'translatedText': 'hello'})
+}
+
+class CannedAdapter(BaseAdapter):
+    """Answers each host with a canned body and records the requests"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        host = requests.utils.urlparse(request.url).hostname
+        response._content = REPLIES[host].encode('utf-8')
+        return response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Undo the module swap after the test
+    for name in DEEP_TRANSLATOR_MODULES:
+        module = importlib.import_module(f'deep_translator.{name}')
+        monkeypatch.setattr(module, 'requests', module.requests)
+    pool = ConnectionPool()
+    pool.install_deep_translator()
+    yield pool
+    pool.close()
+
+@pytest.fixture
+def adapter(pool):
+    adapter = CannedAdapter()
+    pool.session.mount('https://', adapter)
+    pool.session.mount('http://', adapter)
+    return adapter
+
+@pytest.mark.parametrize('translator', [
+    lambda: GoogleTranslator(source='pt', target='en'),
+    lambda: MyMemoryTranslator(source='pt-BR', target='en-US'),
+    lambda: LibreTranslator(source='pt', target='en', api_key='test', custom_url='http://libre.test/')
+], ids=['google', 'mymemory', 'libre'])
+def test_providers_use_the_shared_session(adapter, translator):
+    assert translator().translate('olá') == 'hello'
+    assert len(adapter.requests) == 1
+
+def test_rest_of_the_module_is_still_requests(pool):
+    for name in DEEP_TRANSLATOR_MODULES:
+        proxy = importlib.import_module(f'deep_translator.{name}').requests
+        assert proxy.exceptions is requests.exceptions
+        assert proxy.ConnectionError is requests.ConnectionError
+        assert proxy.get.__self__ is pool.session
@@ -0,0 +1,129 @@
+"""IncrementalTranslator against a fake streaming client"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.core.conversation import IncrementalTranslator
+from src.core.openai import OpenAIChatAnalyzer, RequestSuperseded
+
+class FakeCompletions:
+    """Streams each message of the request back with ' (en)' appended"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+
+    async def create(self, messages, **options):
+        text = messages[-1]['content']
+        self.requests.append(text)
+        # Context requests put the messages to translate last
+        lines = text.split('one per line:\n')[-1].split('\n')
+        reply = ''.join(f"{line} (en)\n" for line in lines)
+        return self._stream(reply)
+
+    async def _stream(self, reply):
+        for line in reply.splitlines(keepends=True):
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=line))])
+
+def make_translator(delay=0.0):
+    analyzer = OpenAIChatAnalyzer(api_key='test')
+    completions = FakeCompletions(delay)
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return IncrementalTranslator(analyzer), completions
+
+def test_only_new_lines_are_sent():
+    translator, completions = make_translator()
+
+    async def scenario():
+        first = await translator.translate("[Time] Ana: oi")
+        second = await translator.translate("[Time] Ana: oi\n[Time] Bia: bora")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == '[Time] Ana: oi (en)'
+    assert second == '[Time] Ana: oi (en)\n[Time] Bia: bora (en)'
+    assert translator.stats.lines_sent == 2
+    assert completions.requests[-1].endswith('one per line:\n[Time] Bia: bora')
+
+def test_cached_capture_cancels_the_older_stream():
+    translator, completions = make_translator()
+
+    async def scenario():
+        await translator.translate("[Time] Ana: oi", stream_key='box')
+        # Slow the client down so the next request is still streaming
+        completions.delay = 0.5
+        older = asyncio.ensure_future(
+            translator.translate("[Time] Ana: oi\n[Time] Bia: bora", stream_key='box')
+        )
+        await asyncio.sleep(0.05)
+        # Everything in this capture is cached, no LLM call is needed
+        await translator.translate("[Time] Ana: oi", stream_key='box')
+        with pytest.raises(RequestSuperseded):
+            await older
+
+    asyncio.run(scenario())
+    assert translator.analyzer.superseded == 1
+
+def test_chunked_dump_reports_lines_in_order():
+    translator, _ = make_translator()
+    text = '\n'.join(f"[Time] P{index}: msg {index}" for index in range(40))
+    reported = {}
+
+    async def on_line(index, line, final):
+        reported[index] = line
+
+    translations = asyncio.run(translator.translate_lines(text, on_line))
+
+    expected = [f"[Time] P{index}: msg {index} (en)" for index in range(40)]
+    assert translations == expected
+    assert [reported[index] for index in range(40)] == expected
+
+def test_shared_stream_survives_superseding_one_key():
+    translator, completions = make_translator(delay=0.05)
+    analyzer = translator.analyzer
+    box = []
+
+    async def on_delta(delta):
+        box.append(delta)
+
+    async def scenario():
+        first = asyncio.ensure_future(analyzer.analyze_text_only("[Time] Ana: oi", stream_key='a'))
+        second = asyncio.ensure_future(
+            analyzer.analyze_text_only("[Time] Ana: oi", stream_key='b', callback=on_delta)
+        )
+        await asyncio.sleep(0.02)
+        assert analyzer.deduplicated == 1
+        # Key a moves on, key b still follows the shared request
+        newer = await analyzer.analyze_text_only("[Time] Bia: bora", stream_key='a')
+        with pytest.raises(RequestSuperseded):
+            await first
+        return newer, await second
+
+    newer, shared = asyncio.run(scenario())
+    assert newer == '[Time] Bia: bora (en)'
+    assert shared == '[Time] Ana: oi (en)'
+    assert ''.join(box).strip() == shared
+    assert completions.requests == ["[Time] Ana: oi", "[Time] Bia: bora"]
+    assert analyzer.superseded == 1
+
+def test_stream_is_cancelled_once_no_key_follows_it():
+    translator, completions = make_translator(delay=0.05)
+    analyzer = translator.analyzer
+
+    async def scenario():
+        first = asyncio.ensure_future(analyzer.analyze_text_only("[Time] Ana: oi", stream_key='a'))
+        second = asyncio.ensure_future(analyzer.analyze_text_only("[Time] Ana: oi", stream_key='b'))
+        await asyncio.sleep(0.02)
+        flight, = analyzer._in_flight.values()
+        analyzer.cancel_stream('a')
+        assert not flight.task.cancelled()
+        analyzer.cancel_stream('b')
+        await asyncio.sleep(0)
+        assert flight.task.cancelled()
+        for caller in (first, second):
+            with pytest.raises(RequestSuperseded):
+                await caller
+
+    asyncio.run(scenario())
+    assert analyzer.superseded == 2
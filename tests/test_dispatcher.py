@@ -0,0 +1,115 @@
+"""UIDispatcher coalescing and wakeups against a stub Tk root"""
+import threading
+import tkinter as tk
+import pytest
+from src.ui.dispatcher import DISPATCH_EVENT, UIDispatcher
+
+class StubRoot:
+    """Records wakeups instead of running a Tk event loop"""
+
+    def __init__(self, error=None):
+        self.bindings = {}
+        self.idle = []
+        self.events = []
+        self.error = error
+
+    def bind(self, sequence, handler):
+        self.bindings[sequence] = handler
+
+    def after_idle(self, callback):
+        if self.error is not None:
+            raise self.error
+        self.idle.append(callback)
+
+    def event_generate(self, sequence, when=None):
+        if self.error is not None:
+            raise self.error
+        self.events.append((sequence, when))
+
+    def deliver(self):
+        """Run what Tk would run for the recorded wakeups"""
+        idle, self.idle = self.idle, []
+        events, self.events = self.events, []
+        for callback in idle:
+            callback()
+        for sequence, _ in events:
+            self.bindings[sequence](None)
+
+def post_from_thread(dispatcher, *args, **kwargs):
+    thread = threading.Thread(target=dispatcher.post, args=args, kwargs=kwargs)
+    thread.start()
+    thread.join()
+
+@pytest.fixture
+def root():
+    return StubRoot()
+
+@pytest.fixture
+def dispatcher(root):
+    return UIDispatcher(root)
+
+def test_one_wakeup_per_drain(dispatcher, root):
+    ran = []
+    for index in range(5):
+        dispatcher.post(ran.append, index)
+
+    assert len(root.idle) == 1
+    root.deliver()
+    assert ran == [0, 1, 2, 3, 4]
+
+    # Drained, so the next post wakes Tk again
+    dispatcher.post(ran.append, 5)
+    assert len(root.idle) == 1
+    assert dispatcher.stats.wakeups == 2
+
+def test_posts_from_other_threads_use_the_virtual_event(dispatcher, root):
+    ran = []
+    post_from_thread(dispatcher, ran.append, 'a')
+    post_from_thread(dispatcher, ran.append, 'b')
+
+    assert root.events == [(DISPATCH_EVENT, 'tail')]
+    assert root.idle == []
+    root.deliver()
+    assert ran == ['a', 'b']
+
+def test_same_key_keeps_only_the_latest(dispatcher, root):
+    ran = []
+    dispatcher.post(ran.append, 'first', key='text')
+    dispatcher.post(ran.append, 'other')
+    dispatcher.post(ran.append, 'second', key='text')
+    dispatcher.post(ran.append, 'third', key='text')
+
+    root.deliver()
+    # The coalesced update keeps the slot of its first post
+    assert ran == ['third', 'other']
+    assert dispatcher.stats.coalesced == 2
+    assert dispatcher.stats.run == 2
+
+def test_failing_callback_does_not_stop_the_drain(dispatcher, root):
+    ran = []
+    dispatcher.post(lambda: 1 / 0)
+    dispatcher.post(ran.append, 'after')
+    root.deliver()
+    assert ran == ['after']
+
+@pytest.mark.parametrize('error', [
+    RuntimeError('main thread is not in main loop'),
+    tk.TclError('application has been destroyed')
+])
+def test_wakeup_failure_during_shutdown(error):
+    root = StubRoot(error=error)
+    dispatcher = UIDispatcher(root)
+    ran = []
+
+    post_from_thread(dispatcher, ran.append, 'lost')
+    dispatcher.post(ran.append, 'also lost')
+
+    # Each post tried to wake Tk again instead of waiting on a dead wakeup
+    assert dispatcher.stats.wakeups == 2
+    assert ran == []
+
+    # Once Tk answers again, the pending updates run
+    root.error = None
+    dispatcher.post(ran.append, 'delivered')
+    root.deliver()
+    assert ran == ['lost', 'also lost', 'delivered']
@@ -0,0 +1,41 @@
+"""Splitting preprocessed captures into text line strips"""
+import numpy as np
+from src.utils.image_processing import split_line_strips
+
+def page(rows, height=120, width=300, ink=0, background=255):
+    """Preprocessed image with ink on the given (top, bottom) row ranges"""
+    image = np.full((height, width), background, dtype=np.uint8)
+    # A white border like the border stage's, text only in the middle
+    for top, bottom in rows:
+        image[top:bottom, 30:270:3] = ink
+    return image
+
+def test_separate_lines():
+    strips = split_line_strips(page([(20, 34), (50, 64), (80, 94)]), padding=0)
+    assert strips == [(20, 34), (50, 64), (80, 94)]
+
+def test_padding_is_clamped_to_the_image():
+    strips = split_line_strips(page([(2, 16), (100, 118)]), padding=4)
+    assert strips == [(0, 20), (96, 120)]
+
+def test_touching_lines_form_one_strip():
+    strips = split_line_strips(page([(20, 34), (35, 49)]), min_gap=2, padding=0)
+    assert strips == [(20, 49)]
+
+def test_blank_frame_has_no_strips():
+    assert split_line_strips(page([])) == []
+    assert split_line_strips(np.zeros((50, 50), dtype=np.uint8) + 255) == []
+
+def test_single_line():
+    assert split_line_strips(page([(40, 56)]), padding=0) == [(40, 56)]
+
+def test_short_runs_are_noise():
+    strips = split_line_strips(page([(20, 34), (60, 63)]), min_height=8, padding=0)
+    assert strips == [(20, 34)]
+
+def test_light_text_on_dark_background():
+    # Dark chat boxes come out white on black inside the white border
+    image = page([(20, 34), (50, 64)], ink=255, background=0)
+    image[:10] = 255
+    image[-10:] = 255
+    assert split_line_strips(image, padding=0) == [(20, 34), (50, 64)]
@@ -0,0 +1,177 @@
+"""OCR backend selection, backend cost and the line strip cache"""
+import logging
+import multiprocessing
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+from src.core import ocr
+from src.core.ocr import (
+    LineCache,
+    OCRProcessor,
+    PytesseractBackend,
+    TesserocrBackend,
+    create_ocr_backend
+)
+from src.utils.image_processing import split_line_strips
+
+TESSERACT = shutil.which('tesseract') or '/usr/bin/tesseract'
+
+class FakeAPI:
+    """Stands in for tesserocr.PyTessBaseAPI"""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def GetPageSegMode(self):
+        return self.options.get('psm', 3)
+
+def fake_tesserocr(api=FakeAPI):
+    return SimpleNamespace(PyTessBaseAPI=api, PSM=SimpleNamespace(SINGLE_LINE=7))
+
+def broken_api(**options):
+    raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+
+def test_auto_uses_tesserocr_when_available(monkeypatch):
+    monkeypatch.setattr(ocr, 'tesserocr', fake_tesserocr())
+    backend = create_ocr_backend(TESSERACT, 'auto', config='--psm 6 --oem 1')
+    assert isinstance(backend, TesserocrBackend)
+    assert backend._api.options['psm'] == 6 and backend._api.options['oem'] == 1
+
+def test_auto_falls_back_when_tesserocr_is_missing(monkeypatch):
+    monkeypatch.setattr(ocr, 'tesserocr', None)
+    assert isinstance(create_ocr_backend(TESSERACT, 'auto'), PytesseractBackend)
+
+def test_fallback_when_the_engine_fails_to_start(monkeypatch, caplog):
+    monkeypatch.setattr(ocr, 'tesserocr', fake_tesserocr(broken_api))
+    with caplog.at_level(logging.INFO, logger=ocr.__name__):
+        assert isinstance(create_ocr_backend(TESSERACT, 'auto'), PytesseractBackend)
+        assert caplog.records[-1].levelno == logging.INFO
+
+        # Asking for tesserocr explicitly still works, but warns
+        assert isinstance(create_ocr_backend(TESSERACT, 'tesserocr'), PytesseractBackend)
+        assert caplog.records[-1].levelno == logging.WARNING
+
+def test_pytesseract_is_used_when_asked_for(monkeypatch):
+    monkeypatch.setattr(ocr, 'tesserocr', fake_tesserocr())
+    assert isinstance(create_ocr_backend(TESSERACT, 'pytesseract'), PytesseractBackend)
+
+def text_image(lines):
+    image = np.full((40 * len(lines) + 20, 700), 255, dtype=np.uint8)
+    for index, line in enumerate(lines):
+        cv2.putText(image, line, (10, 40 * index + 40), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+    return image
+
+@pytest.mark.skipif(shutil.which('tesseract') is None, reason='tesseract is not installed')
+@pytest.mark.skipif(ocr.tesserocr is None, reason='tesserocr is not installed')
+def test_tesserocr_against_pytesseract():
+    """Average time per call of both backends, shown with -s"""
+    image = text_image(['[Red] Gabi: vamos pelo meio', '[Blue] Rafa: cuidado'])
+    backends = [
+        PytesseractBackend(TESSERACT, lang='eng'),
+        TesserocrBackend(TESSERACT, lang='eng')
+    ]
+    results = {}
+    for backend in backends:
+        backend.image_to_string(image)
+        start = time.perf_counter()
+        texts = [backend.image_to_string(image) for _ in range(5)]
+        results[backend.name] = (time.perf_counter() - start) / 5
+        backend.close()
+        print(f"{backend.name}: {results[backend.name] * 1000:.1f} ms per call")
+        assert 'Gabi' in texts[-1]
+
+    # No process spawn and no model reload per call
+    assert results['tesserocr'] < results['pytesseract']
+
+def strip(value):
+    return np.full((20, 100), value, dtype=np.uint8)
+
+def test_line_cache_hits_and_misses():
+    cache = LineCache(max_entries=4)
+    key = LineCache.key(strip(0))
+    assert cache.get(key) is None
+    cache.put(key, 'gg wp')
+    assert cache.get(key) == 'gg wp'
+    assert (cache.hits, cache.misses, cache.hit_rate) == (1, 1, 0.5)
+
+def test_line_cache_key_includes_the_shape():
+    assert LineCache.key(strip(0)) != LineCache.key(strip(0).reshape(40, 50))
+    assert LineCache.key(strip(0)) == LineCache.key(strip(0).copy())
+    # Views of a larger image hash the same as a copy
+    assert LineCache.key(np.zeros((20, 200), dtype=np.uint8)[:, :100]) == LineCache.key(strip(0))
+
+def test_line_cache_evicts_least_recently_used():
+    cache = LineCache(max_entries=2)
+    keys = [LineCache.key(strip(value)) for value in (0, 1, 2)]
+    cache.put(keys[0], 'first')
+    cache.put(keys[1], 'second')
+    cache.get(keys[0])
+    cache.put(keys[2], 'third')
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 'first'
+    assert cache.evictions == 1
+    assert cache.stats()['entries'] == 2
+
+def test_line_cache_memory_bytes():
+    cache = LineCache()
+    assert cache.memory_bytes == 0
+    cache.put(LineCache.key(strip(0)), 'olá')
+    assert cache.memory_bytes == len('olá'.encode('utf-8')) + LineCache.ENTRY_OVERHEAD
+    cache.clear()
+    assert cache.memory_bytes == 0
+
+class InkWidthBackend(ocr.OCRBackend):
+    """Reads each line strip as the number of ink columns in it"""
+    name = 'ink-width'
+
+    def __init__(self, persistent: bool):
+        self.persistent = persistent
+
+    def image_to_string(self, image, single_line=False):
+        image = np.asarray(image)
+        return '\n'.join(
+            f"line: {np.count_nonzero((image[top:bottom] < 128).any(axis=0))}"
+            for top, bottom in split_line_strips(image)
+        )
+
+def chat_page(count):
+    """Preprocessed page whose n-th line has 10 * (n + 1) ink columns"""
+    image = np.full((30 * count + 20, 400), 255, dtype=np.uint8)
+    for index in range(count):
+        image[20 + 30 * index:34 + 30 * index, 10:10 + 30 * (index + 1):3] = 0
+    return image
+
+@pytest.fixture
+def fork_context():
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip('the fake backend reaches the workers by forking')
+    return multiprocessing.get_context('fork')
+
+@pytest.mark.parametrize('persistent', [True, False])
+@pytest.mark.parametrize('line_cache_size', [0, 64])
+def test_worker_pool_keeps_line_order(monkeypatch, fork_context, persistent, line_cache_size):
+    monkeypatch.setattr(ocr, 'create_ocr_backend', lambda *args, **kwargs: InkWidthBackend(persistent))
+    processor = OCRProcessor(TESSERACT, workers=2, line_cache_size=line_cache_size)
+    # What _get_pool starts, forked so the workers see the fake backend
+    processor._pool = ProcessPoolExecutor(
+        max_workers=2,
+        mp_context=fork_context,
+        initializer=ocr._init_worker,
+        initargs=(TESSERACT, 'ink-width', 'eng', '')
+    )
+    try:
+        expected = '\n'.join(f"line: {10 * (index + 1)}" for index in range(7))
+        assert processor._extract_text(chat_page(7)) == expected
+
+        strips = [chat_page(7)[16 + 30 * index:38 + 30 * index] for index in range(7)]
+        texts = processor._ocr_strips(strips)
+        assert texts == [(f"line: {10 * (index + 1)}", True) for index in range(7)]
+        # Persistent engines get one call per strip, others one per worker
+        assert processor.calls == (14 if persistent else 4)
+    finally:
+        processor.close()
@@ -0,0 +1,57 @@
+"""Chunking and response budgets of text requests"""
+import pytest
+from src.config.constants import (
+    LLM_CHARS_PER_TOKEN,
+    LLM_CHUNK_LINES,
+    LLM_MAX_TOKENS,
+    LLM_MIN_TOKENS,
+    LLM_OUTPUT_RATIO,
+    LLM_TOKENS_PER_LINE
+)
+from src.core.openai import estimate_output_tokens, split_chunks
+
+def messages(count):
+    return [f"[Time] P{index}: msg {index}" for index in range(count)]
+
+def test_no_lines_is_one_empty_chunk():
+    assert split_chunks([]) == [[]]
+
+def test_up_to_chunk_lines_is_one_chunk():
+    lines = messages(LLM_CHUNK_LINES)
+    assert split_chunks(lines) == [lines]
+
+def test_one_line_over_splits_evenly():
+    lines = messages(LLM_CHUNK_LINES + 1)
+    chunks = split_chunks(lines)
+    assert len(chunks) == 2
+    assert abs(len(chunks[0]) - len(chunks[1])) <= 1
+    assert sum(chunks, []) == lines
+
+@pytest.mark.parametrize('count', [1, 14, 31, 46, 100])
+def test_chunks_keep_order_and_size(count):
+    lines = messages(count)
+    chunks = split_chunks(lines)
+    assert sum(chunks, []) == lines
+    assert all(0 < len(chunk) <= LLM_CHUNK_LINES for chunk in chunks)
+    assert max(map(len, chunks)) - min(map(len, chunks)) <= 1
+
+def test_long_single_line_is_not_split():
+    line = 'k' * 20000
+    assert split_chunks([line]) == [[line]]
+
+def test_budget_of_empty_text_is_the_minimum():
+    assert estimate_output_tokens('') == LLM_MIN_TOKENS
+
+def test_budget_grows_with_text():
+    text = '\n'.join(messages(LLM_CHUNK_LINES))
+    expected = len(text) / LLM_CHARS_PER_TOKEN * LLM_OUTPUT_RATIO + LLM_CHUNK_LINES * LLM_TOKENS_PER_LINE
+    assert LLM_MIN_TOKENS < estimate_output_tokens(text) < LLM_MAX_TOKENS
+    assert estimate_output_tokens(text) == pytest.approx(expected, abs=1)
+
+def test_budget_of_very_long_line_is_capped():
+    assert estimate_output_tokens('k' * 20000) == LLM_MAX_TOKENS
+
+def test_budget_bounds():
+    assert (LLM_MIN_TOKENS, LLM_MAX_TOKENS) == (32, 2048)
+    for length in (0, 1, 10, 100, 1000, 10000, 100000):
+        assert LLM_MIN_TOKENS <= estimate_output_tokens('a' * length) <= LLM_MAX_TOKENS
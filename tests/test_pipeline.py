@@ -0,0 +1,56 @@
+"""Watch-mode pipeline: a newer capture cancels the older translation"""
+import asyncio
+from src.core.pipeline import TranslationPipeline
+from src.core.scheduler import Priority
+
+class FakeOCR:
+    """Frames are already the OCR text"""
+
+    def process_array(self, frame):
+        return frame
+
+def test_newer_text_cancels_the_running_translation():
+    started, finished, cancelled = [], [], []
+
+    async def translate(text, priority):
+        started.append(text)
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            cancelled.append(text)
+            raise
+        finished.append(text)
+
+    async def scenario():
+        pipeline = TranslationPipeline(capture=None, ocr=FakeOCR(), translate=translate)
+        pipeline.submit('first')
+        await asyncio.sleep(0.05)
+        pipeline.submit('second')
+        await asyncio.sleep(0.4)
+        pipeline.shutdown()
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+
+    assert started == ['first', 'second']
+    assert cancelled == ['first']
+    assert finished == ['second']
+    assert pipeline.stats.superseded == 1
+
+def test_priority_follows_the_trigger():
+    priorities = []
+
+    async def translate(text, priority):
+        priorities.append((text, priority))
+
+    async def scenario():
+        pipeline = TranslationPipeline(capture=None, ocr=FakeOCR(), translate=translate)
+        # Watch ticks submit frames
+        pipeline.submit('tick')
+        await asyncio.sleep(0.05)
+        # A selection made while watching still runs at capture priority
+        await pipeline.run_translation('selection')
+        pipeline.shutdown()
+
+    asyncio.run(scenario())
+    assert priorities == [('tick', Priority.BACKGROUND), ('selection', Priority.CAPTURE)]
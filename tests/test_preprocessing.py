@@ -0,0 +1,172 @@
+"""Preprocessing stages and the pipeline's buffers"""
+import difflib
+import shutil
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from src.utils.preprocessing import (
+    AdaptiveScaleStage,
+    PreprocessPipeline,
+    Stage,
+    TextRegionStage,
+    estimate_glyph_height
+)
+
+CHAT = [
+    '[Red] Gabi: vamos pelo meio agora',
+    '[Blue] Rafa: cuidado com o sniper',
+    '[Red] Lu: preciso de cura aqui'
+]
+# Fixed 2x scaling the adaptive stage replaced
+FIXED_STAGES = ['grayscale', 'threshold', 'invert', 'border', 'resize']
+
+def text_frame(lines, height=None, width=500, scale=0.6, thickness=1):
+    """BGR frame with dark lines of text on a light background"""
+    line_height = round(30 * scale) + 8
+    frame = np.full((height or line_height * len(lines) + 8, width, 3), 235, dtype=np.uint8)
+    for index, line in enumerate(lines):
+        baseline = 4 + line_height * index + round(22 * scale)
+        cv2.putText(frame, line, (6, baseline), cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), thickness)
+    return frame
+
+def binarize(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+
+def test_stage_requires_apply():
+    class Incomplete(Stage):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_default_stages_match_the_fixed_preprocessing():
+    frame = text_frame(CHAT)
+    result = PreprocessPipeline.from_names(['grayscale', 'threshold', 'invert', 'border', 'resize']).run(frame)
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    _, expected = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    expected = cv2.copyMakeBorder(cv2.bitwise_not(expected), 20, 20, 20, 20, cv2.BORDER_CONSTANT, value=255)
+    expected = cv2.resize(expected, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    assert np.array_equal(result, expected)
+
+def test_content_sized_stages_get_no_pipeline_buffer():
+    pipeline = PreprocessPipeline.from_names()
+    frame = text_frame(['Blue Team Player: ready when you are'] * 3)
+    assert pipeline.run(frame) is not None
+
+    buffers = {
+        name: entry[1] for name, entry in zip(pipeline.names, pipeline._local.buffers)
+        if entry is not None
+    }
+    assert buffers['regions'] is None and buffers['scale'] is None
+    assert buffers['threshold'].shape == frame.shape[:2]
+
+def test_last_scale_is_per_thread():
+    stage = AdaptiveScaleStage()
+    small = binarize(text_frame(['small text here'], scale=0.4))
+    stage.apply(small, None)
+    assert stage.last_scale > 1
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(stage.last_scale))
+    thread.start()
+    thread.join()
+    assert seen == [1.0]
+
+def add_chrome(frame):
+    """Window border, a separator and a filled panel, as game chat UIs draw them"""
+    height, width = frame.shape[:2]
+    cv2.rectangle(frame, (2, 2), (width - 3, height - 3), (20, 20, 20), 2)
+    cv2.line(frame, (10, height // 2), (width - 10, height // 2), (20, 20, 20), 2)
+    cv2.rectangle(frame, (width - 60, 10), (width - 20, 50), (20, 20, 20), -1)
+    return frame
+
+def test_regions_keep_a_tight_single_line():
+    stage = TextRegionStage()
+    binary = binarize(text_frame(CHAT[:1], height=22, scale=0.6))
+    crop = stage.apply(binary, None)
+    assert crop is not None
+    # The whole line survives the crop
+    (text_width, _), _ = cv2.getTextSize(CHAT[0], cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+    assert crop.shape[1] >= text_width
+    assert stage.stats()['empty'] == 0
+
+def test_regions_skip_empty_and_chrome_only_frames():
+    stage = TextRegionStage()
+    blank = binarize(text_frame([], height=200, width=500))
+    chrome = binarize(add_chrome(text_frame([], height=200, width=500)))
+    assert stage.apply(blank, None) is None
+    assert stage.apply(binarize(text_frame([], height=22)), None) is None
+    assert stage.apply(chrome, None) is None
+    assert stage.stats()['empty'] == 3
+
+def test_regions_drop_chrome_around_text():
+    frame = add_chrome(text_frame([], height=300, width=600))
+    frame[100:100 + 3 * 26] = text_frame(CHAT, width=600)[:3 * 26]
+    crop = TextRegionStage().apply(binarize(frame), None)
+    assert crop is not None
+    assert 60 <= crop.shape[0] <= 110 and crop.shape[1] < 560
+
+def test_regions_pass_small_frames_without_blocks_whole():
+    stage = TextRegionStage()
+    # Only a rule: no glyph, but too short a frame to call it empty
+    frame = text_frame([], height=30)
+    cv2.line(frame, (10, 15), (490, 15), (20, 20, 20), 2)
+    binary = binarize(frame)
+    assert stage.apply(binary, None) is binary
+    assert stage.stats()['fallbacks'] == 1
+
+def test_glyph_height_of_a_tight_single_line():
+    # Glyphs fill most of the capture's height
+    binary = binarize(text_frame(CHAT[:1], height=22, scale=0.6))
+    assert 8 <= estimate_glyph_height(binary) <= 14
+    assert 1.5 <= AdaptiveScaleStage().scale_for(binary) <= 3
+
+def test_glyph_height_ignores_frames_and_specks():
+    frame = text_frame(CHAT, scale=0.6, width=400)
+    cv2.rectangle(frame, (1, 1), (398, frame.shape[0] - 2), (20, 20, 20), 1)
+    frame[5:7, 380:382] = 20
+    plain = estimate_glyph_height(binarize(text_frame(CHAT, scale=0.6, width=400)))
+    assert estimate_glyph_height(binarize(frame)) == plain
+
+def test_scaled_output_is_capped():
+    stage = AdaptiveScaleStage(max_pixels=1_000_000)
+    binary = binarize(text_frame(CHAT * 8, width=1200, scale=0.35))
+    output = stage.apply(binary, None)
+    assert stage.last_scale < AdaptiveScaleStage(max_pixels=None).scale_for(binary)
+    assert output.size <= 1_000_000
+
+@pytest.mark.parametrize('font_scale', [0.4, 0.6, 1.0, 1.6])
+def test_adaptive_pixels_against_fixed_2x(font_scale):
+    frame = text_frame(CHAT, width=round(800 * font_scale), scale=font_scale)
+    adaptive = PreprocessPipeline.from_names().run(frame)
+    fixed = PreprocessPipeline.from_names(FIXED_STAGES).run(frame)
+    # Small text is enlarged further, large text is left as is or shrunk
+    if font_scale >= 1.0:
+        assert adaptive.size < fixed.size
+    else:
+        assert adaptive.size > fixed.size
+
+@pytest.mark.skipif(shutil.which('tesseract') is None, reason='tesseract is not installed')
+@pytest.mark.parametrize('font_scale', [0.4, 0.6, 1.0, 1.6])
+def test_adaptive_accuracy_against_fixed_2x(font_scale):
+    """Character accuracy and OCR time of both policies, shown with -s"""
+    from src.core.ocr import PytesseractBackend
+    backend = PytesseractBackend(shutil.which('tesseract'), lang='eng')
+    frame = text_frame(CHAT, width=round(800 * font_scale), scale=font_scale, thickness=2)
+    expected = '\n'.join(CHAT)
+
+    results = {}
+    for name, stages in [('fixed', FIXED_STAGES), ('adaptive', PreprocessPipeline.from_names().names)]:
+        image = PreprocessPipeline.from_names(stages).run(frame)
+        start = time.perf_counter()
+        text = backend.image_to_string(image)
+        seconds = time.perf_counter() - start
+        accuracy = difflib.SequenceMatcher(None, expected, text.strip()).ratio()
+        results[name] = accuracy
+        print(f"font {font_scale}: {name} {accuracy:.1%} in {seconds * 1000:.0f} ms, {image.size} px")
+
+    assert results['adaptive'] >= results['fixed'] - 0.05
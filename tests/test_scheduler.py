@@ -0,0 +1,127 @@
+"""RequestScheduler ordering and limits on a FakeClock, and the router using it"""
+import asyncio
+import threading
+import time
+import pytest
+from src.core.backends import BackendRouter, StubBackend
+from src.core.scheduler import FakeClock, Priority, RequestScheduler
+
+def make_scheduler(clock, **limits):
+    return RequestScheduler(limits=limits, burst_seconds=1.0, clock=clock, call_later=clock.call_later)
+
+def test_queued_requests_are_admitted_by_priority_then_arrival():
+    clock = FakeClock()
+    # One request per second, nothing banked beyond the first
+    scheduler = make_scheduler(clock, api={'rpm': 60})
+    order = []
+
+    async def request(name, priority):
+        await scheduler.acquire('api', priority)
+        order.append(name)
+
+    async def scenario():
+        await request('first', Priority.BACKGROUND)
+        tasks = [
+            asyncio.ensure_future(request(name, priority))
+            for name, priority in [
+                ('background', Priority.BACKGROUND),
+                ('capture-1', Priority.CAPTURE),
+                ('capture-2', Priority.CAPTURE),
+                ('typed', Priority.INTERACTIVE)
+            ]
+        ]
+        await asyncio.sleep(0)
+        assert order == ['first']
+        for _ in tasks:
+            clock.advance(1.0)
+            # Let the granted future's callbacks run
+            for _ in range(3):
+                await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ['first', 'typed', 'capture-1', 'capture-2', 'background']
+    assert scheduler.stats.as_dict()['interactive']['avg_wait_ms'] == pytest.approx(1000)
+
+def test_token_limit_slows_large_requests():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, api={'tpm': 600})
+    granted = []
+
+    # 10 tokens per second, a 30 token request leaves the bucket in debt
+    scheduler.acquire_blocking('api', tokens=30, timeout=0)
+    thread = threading.Thread(
+        target=lambda: granted.append(scheduler.acquire_blocking('api', tokens=5, timeout=5))
+    )
+    thread.start()
+    time.sleep(0.05)
+    clock.advance(2.0)
+    time.sleep(0.05)
+    assert not granted
+    clock.advance(0.5)
+    thread.join(1)
+    assert granted == [None]
+
+def test_blocking_wait_times_out_and_leaves_the_queue():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, api={'rpm': 60})
+    scheduler.acquire_blocking('api')
+
+    with pytest.raises(TimeoutError):
+        scheduler.acquire_blocking('api', timeout=0.01)
+
+    clock.advance(1.0)
+    assert scheduler.try_acquire('api')
+    assert scheduler.stats.cancelled == 1
+
+def test_try_acquire_does_not_jump_the_queue():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, api={'rpm': 60})
+    assert scheduler.try_acquire('api')
+    assert not scheduler.try_acquire('api')
+    assert scheduler.try_acquire('unlimited')
+
+    async def scenario():
+        waiting = asyncio.ensure_future(scheduler.acquire('api', Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        # A slot frees up, but the queued request is owed it
+        clock.now += 1.0
+        assert not scheduler.try_acquire('api', Priority.INTERACTIVE)
+        clock.advance(0)
+        await asyncio.sleep(0)
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(scenario())
+
+def test_router_skips_hedges_without_a_free_slot():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, fast={'rpm': 60})
+    slow = StubBackend('slow', delay=0.2)
+    fast = StubBackend('fast')
+    router = BackendRouter([slow, fast], default_hedge_delay=0.02, scheduler=scheduler)
+    # Use up the hedge backend's only slot
+    assert scheduler.try_acquire('fast')
+
+    result = router.translate('hi', 'en', 'pt', Priority.CAPTURE)
+    router.close()
+
+    stats = router.stats()
+    assert result == '[pt] hi'
+    assert stats['hedged'] == 0 and stats['hedges_skipped'] == 1
+    assert fast.stats.samples == 0
+
+def test_router_hedges_when_a_slot_is_free():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, fast={'rpm': 60})
+    slow = StubBackend('slow', delay=0.5)
+    fast = StubBackend('fast')
+    router = BackendRouter([slow, fast], default_hedge_delay=0.02, scheduler=scheduler)
+
+    start = time.perf_counter()
+    router.translate('hi', 'en', 'pt')
+    elapsed = time.perf_counter() - start
+    router.close()
+
+    assert elapsed < 0.4
+    assert router.stats()['hedge_wins'] == 1
+    assert scheduler.stats.as_dict()['interactive']['granted'] == 2
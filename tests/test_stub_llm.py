@@ -0,0 +1,134 @@
+"""Offline stub model: injected failures, truncation and SSE framing"""
+import asyncio
+import http.client
+import json
+import time
+import pytest
+from PIL import Image
+from src.core.openai import OpenAIChatAnalyzer
+from src.utils.stub_llm import VISION_REPLIES, SimulatedClient, StubAPIError, StubModel, StubServer
+
+MESSAGES = [{'role': 'user', 'content': "[Time] Ana: oi\n[Time] Bia: bora"}]
+
+def fast_model(**options):
+    return StubModel(ttft=0.0, tokens_per_second=100000.0, **options)
+
+def create(client, **options):
+    async def request():
+        return await client.chat.completions.create(messages=MESSAGES, **options)
+    return asyncio.run(request())
+
+def collect(stream):
+    async def read():
+        return [chunk async for chunk in stream]
+    return asyncio.run(read())
+
+def test_reply_echoes_each_line():
+    assert fast_model().reply(MESSAGES) == "[Time] Ana: oi (en)\n[Time] Bia: bora (en)"
+
+def test_injected_errors_are_429_or_500():
+    model = fast_model(error_rate=1.0, seed=3)
+    statuses = set()
+    for _ in range(20):
+        error, stall_at = model.plan(10)
+        assert isinstance(error, StubAPIError) and stall_at is None
+        statuses.add(error.status_code)
+    assert statuses == {429, 500}
+    assert model.stats() == {'requests': 20, 'errors': 20, 'stalls': 0}
+
+def test_simulated_client_raises_injected_errors():
+    client = SimulatedClient(fast_model(error_rate=1.0, seed=0))
+    with pytest.raises(StubAPIError) as error:
+        create(client, stream=True)
+    assert error.value.status_code in (429, 500)
+
+def test_same_seed_same_failures():
+    def plans(seed):
+        model = fast_model(error_rate=0.3, stall_rate=0.3, seed=seed)
+        return [
+            (error and error.status_code, stall_at)
+            for error, stall_at in (model.plan(10) for _ in range(20))
+        ]
+    assert plans(7) == plans(7)
+    assert plans(7) != plans(8)
+
+def test_stall_pauses_the_stream_once():
+    model = fast_model(stall_rate=1.0, stall=0.2, seed=0)
+    client = SimulatedClient(model)
+    start = time.perf_counter()
+    chunks = collect(create(client, stream=True))
+    assert time.perf_counter() - start >= 0.2
+    assert ''.join(chunk.choices[0].delta.content or '' for chunk in chunks) == model.reply(MESSAGES)
+    assert model.stats()['stalls'] == 1
+
+def test_max_tokens_truncates_with_length():
+    model = fast_model(chars_per_token=4)
+    tokens, finish_reason = model.tokens('abcdefghij', max_tokens=2)
+    assert (tokens, finish_reason) == (['abcd', 'efgh'], 'length')
+    assert model.tokens('abcdefghij') == (['abcd', 'efgh', 'ij'], 'stop')
+
+    response = create(SimulatedClient(model), max_tokens=3)
+    assert response.choices[0].finish_reason == 'length'
+    assert response.choices[0].message.content == model.reply(MESSAGES)[:12]
+
+    chunks = collect(create(SimulatedClient(model), max_tokens=3, stream=True))
+    assert chunks[-1].choices[0].finish_reason == 'length'
+
+@pytest.fixture
+def server():
+    server = StubServer(fast_model(seed=0)).start()
+    yield server
+    server.stop()
+
+def post(server, body):
+    host, port = server._server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    connection.request(
+        'POST', '/v1/chat/completions', json.dumps(body), {'Content-Type': 'application/json'}
+    )
+    response = connection.getresponse()
+    return response, response.read().decode('utf-8')
+
+def test_server_streams_sse_events(server):
+    response, body = post(server, {'messages': MESSAGES, 'stream': True})
+    assert response.status == 200
+    assert response.getheader('Content-Type') == 'text/event-stream'
+    assert response.getheader('Transfer-Encoding') == 'chunked'
+
+    # Every event is one data line followed by a blank line
+    assert body.endswith('\n\n')
+    events = body[:-2].split('\n\n')
+    assert all(event.startswith('data: ') and '\n' not in event for event in events)
+    assert events[-1] == 'data: [DONE]'
+
+    chunks = [json.loads(event[len('data: '):]) for event in events[:-1]]
+    assert all(chunk['object'] == 'chat.completion.chunk' for chunk in chunks)
+    assert chunks[-1]['choices'][0] == {'index': 0, 'delta': {'content': None}, 'finish_reason': 'stop'}
+    text = ''.join(chunk['choices'][0]['delta']['content'] for chunk in chunks[:-1])
+    assert text == server.model.reply(MESSAGES)
+
+def test_server_returns_injected_errors_as_json(server):
+    server.model.error_rate = 1.0
+    response, body = post(server, {'messages': MESSAGES, 'stream': True})
+    assert response.status in (429, 500)
+    assert json.loads(body)['error']['code'] == response.status
+
+def test_dev_mode_image_replies_come_from_the_seeded_model():
+    image = Image.new('RGB', (300, 80), (30, 30, 30))
+
+    def replies(seed):
+        analyzer = OpenAIChatAnalyzer(api_key='test', dev_mode=True, stub_model=fast_model(seed=seed))
+
+        async def run():
+            return [await analyzer.analyze_chat(image) for _ in range(6)]
+        return asyncio.run(run())
+
+    first = replies(11)
+    assert first == replies(11)
+    assert set(first) <= set(VISION_REPLIES)
+
+def test_added_mock_responses_can_be_picked():
+    analyzer = OpenAIChatAnalyzer(api_key='test', dev_mode=True, stub_model=fast_model(seed=0))
+    analyzer.mock_responses.clear()
+    analyzer.add_mock_response("[Team] Solo: gg")
+    assert asyncio.run(analyzer.analyze_chat(Image.new('RGB', (64, 32)))) == "[Team] Solo: gg"
@@ -0,0 +1,79 @@
+"""translate_batch packing and unpacking against a fake router"""
+import pytest
+from src.core.translator import TranslationService
+
+class FakeRouter:
+    """Translates by upper-casing each line and records every request"""
+
+    def __init__(self, merge_packs: bool = False):
+        self.requests = []
+        self.merge_packs = merge_packs
+
+    def translate(self, text, source_lang, target_lang, priority=None):
+        self.requests.append(text)
+        if self.merge_packs and '\n' in text:
+            # A backend that joins the lines of a pack into one
+            return text.replace('\n', ' ').upper()
+        return text.upper()
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def router():
+    return FakeRouter()
+
+@pytest.fixture
+def service(router):
+    service = TranslationService(router=router)
+    yield service
+    service.close()
+
+def test_single_pack_fills_every_result(service, router):
+    lines = [f"line {index}" for index in range(30)]
+
+    results = service.translate_batch(lines, 'pt')
+
+    assert results == [line.upper() for line in lines]
+    assert len(router.requests) == 1
+
+def test_several_packs_keep_order(service, router):
+    lines = [f"message number {index}" for index in range(20)]
+
+    results = service.translate_batch(lines, 'pt', max_chars=60)
+
+    assert results == [line.upper() for line in lines]
+    assert len(router.requests) > 1
+    assert all(len(request) <= 60 for request in router.requests)
+
+def test_duplicates_and_blank_lines(service, router):
+    results = service.translate_batch(['gg', '', 'gg', '  wp  ', '   '], 'pt')
+
+    assert results == ['GG', '', 'GG', 'WP', '']
+    assert router.requests == ['gg\nwp']
+
+def test_pack_with_wrong_line_count_is_retried_per_line():
+    router = FakeRouter(merge_packs=True)
+    service = TranslationService(router=router)
+
+    results = service.translate_batch(['one', 'two', 'three'], 'pt')
+    service.close()
+
+    assert results == ['ONE', 'TWO', 'THREE']
+    assert router.requests == ['one\ntwo\nthree', 'one', 'two', 'three']
+
+def test_oversized_line_is_split_under_the_limit(service, router):
+    long_line = ' '.join(f"word{index}." for index in range(100))
+
+    results = service.translate_batch(['short', long_line], 'pt', max_chars=80)
+
+    assert results == ['SHORT', long_line.upper()]
+    assert all(len(request) <= 80 for request in router.requests)
+
+def test_unbroken_line_is_cut_at_the_limit():
+    pieces = TranslationService._split_line('x' * 250, 100)
+
+    assert [len(piece) for piece in pieces] == [100, 100, 50]
@@ -0,0 +1,66 @@
+"""Vision token estimates per model and capture encoding"""
+from io import BytesIO
+import cv2
+import numpy as np
+from PIL import Image
+from src.utils.vision_payload import (
+    estimate_image_tokens,
+    image_token_costs,
+    optimize_vision_image,
+    otsu_separation
+)
+
+LINES = ['[Red] Gabi: vamos pelo meio', '[Blue] Rafa: cuidado']
+
+def chat_capture(background):
+    image = background.copy()
+    for index, line in enumerate(LINES):
+        cv2.putText(image, line, (10, 40 + 40 * index), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 230, 2)
+    return image
+
+def chat_box():
+    return chat_capture(np.full((120, 600), 30, dtype=np.uint8))
+
+def game_scene():
+    """Chat drawn straight over a noisy gradient"""
+    rng = np.random.default_rng(0)
+    gradient = np.tile(np.linspace(0, 200, 600), (120, 1)) + rng.normal(0, 30, (120, 600))
+    return chat_capture(gradient.clip(0, 255).astype(np.uint8))
+
+def otsu(gray):
+    threshold, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return otsu_separation(gray, threshold)
+
+def test_costs_are_matched_by_longest_model_prefix():
+    assert image_token_costs('openai/gpt-4o-mini-2024-07-18') == (2833, 5667)
+    assert image_token_costs('openai/gpt-4o-2024-08-06') == (85, 170)
+
+def test_tiling_rule():
+    # 1200x700 is scaled to 1317x768: 3x2 tiles
+    assert estimate_image_tokens(1200, 700, model='gpt-4o') == 85 + 170 * 6
+    assert estimate_image_tokens(1200, 700, model='gpt-4o-mini') == 2833 + 5667 * 6
+    assert estimate_image_tokens(0, 700) == 0
+
+def test_otsu_separation():
+    two_valued = np.zeros((10, 10), dtype=np.uint8)
+    two_valued[:, 5:] = 255
+    assert otsu(two_valued) == 1.0
+    assert otsu(np.full((10, 10), 128, dtype=np.uint8)) == 0.0
+    assert otsu(chat_box()) > 0.9
+    assert otsu(game_scene()) < 0.8
+
+def is_one_bit(payload):
+    return Image.open(BytesIO(payload.data)).mode == '1'
+
+def test_clean_chat_box_may_be_binarized():
+    payload = optimize_vision_image(Image.fromarray(chat_box()))
+    assert payload.mime == 'image/png' and is_one_bit(payload)
+    assert payload.lines == 2
+
+def test_text_over_scenery_is_not_binarized():
+    payload = optimize_vision_image(Image.fromarray(game_scene()))
+    assert not is_one_bit(payload)
+
+def test_binarizing_can_be_turned_off():
+    payload = optimize_vision_image(Image.fromarray(chat_box()), min_separation=1.1)
+    assert not is_one_bit(payload)
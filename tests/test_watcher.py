@@ -0,0 +1,105 @@
+"""Watch mode change detection and its counters"""
+import asyncio
+import numpy as np
+from PIL import Image
+from src.core.watcher import AreaWatcher, FrameChangeDetector, WatchStats
+
+def frame(height=200, width=600, value=30):
+    """Flat BGRA frame, like a capture of an empty chat box"""
+    image = np.full((height, width, 4), value, dtype=np.uint8)
+    image[..., 3] = 255
+    return image
+
+def test_first_frame_counts_as_changed():
+    detector = FrameChangeDetector()
+    assert detector.has_changed(frame())
+    assert not detector.has_changed(frame())
+
+def test_reset_forgets_the_reference():
+    detector = FrameChangeDetector()
+    detector.has_changed(frame())
+    detector.reset()
+    assert detector.has_changed(frame())
+
+def test_change_must_exceed_the_pixel_threshold():
+    detector = FrameChangeDetector(pixel_threshold=24, change_ratio=0.0)
+    detector.has_changed(frame(value=30))
+    # Brightness noise under the threshold is not a change
+    assert not detector.has_changed(frame(value=50))
+    assert detector.has_changed(frame(value=60))
+
+def test_change_must_cover_the_change_ratio():
+    detector = FrameChangeDetector(change_ratio=0.05)
+    detector.has_changed(frame())
+    speck = frame()
+    speck[100:104, 300:304] = 255
+    assert not detector.has_changed(speck)
+
+    new_line = frame()
+    new_line[150:190, :] = 255
+    assert detector.has_changed(new_line)
+
+def test_unchanged_frames_compare_against_the_last_changed_one():
+    detector = FrameChangeDetector(pixel_threshold=24, change_ratio=0.0)
+    detector.has_changed(frame(value=30))
+    # Each step is small, together they drift past the threshold
+    assert not detector.has_changed(frame(value=45))
+    assert detector.has_changed(frame(value=60))
+
+def test_size_change_counts_as_changed():
+    detector = FrameChangeDetector()
+    detector.has_changed(frame(width=600))
+    assert detector.has_changed(frame(width=400))
+    assert not detector.has_changed(frame(width=400))
+
+def test_pil_frames():
+    detector = FrameChangeDetector()
+    image = Image.new('RGB', (600, 200), (30, 30, 30))
+    assert detector.has_changed(image)
+    assert not detector.has_changed(image.copy())
+
+def test_stats_without_ticks():
+    stats = WatchStats()
+    assert stats.skip_ratio == 0.0
+    assert stats.avg_check_ms == 0.0
+    assert stats.processed == 0
+
+def test_stats_skip_ratio():
+    stats = WatchStats()
+    stats.ticks = 8
+    stats.skipped = 6
+    stats.check_time = 0.016
+    assert stats.skip_ratio == 0.75
+    assert stats.processed == 2
+    assert stats.as_dict()['avg_check_ms'] == 2.0
+
+class FakePipeline:
+    """Returns queued frames as captures and records submitted ones"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.submitted = []
+
+    async def capture_area(self, area):
+        return self.frames.pop(0)
+
+    def submit(self, image):
+        self.submitted.append(image)
+
+    def stop(self):
+        pass
+
+def test_ticks_submit_only_changed_frames():
+    changed = frame()
+    changed[150:190, :] = 255
+    pipeline = FakePipeline([frame(), frame(), frame(), changed])
+    watcher = AreaWatcher(pipeline)
+    watcher.area = {'left': 0, 'top': 0, 'width': 600, 'height': 200}
+
+    async def scenario():
+        return [await watcher.tick() for _ in range(4)]
+
+    assert asyncio.run(scenario()) == [True, False, False, True]
+    assert len(pipeline.submitted) == 2
+    assert watcher.stats.ticks == 4
+    assert watcher.stats.skip_ratio == 0.5